@@ -1,16 +1,70 @@
+import os
+import time
 import streamlit as st
-from src.pipeline import ArticleProcessor
+from src.ingest import REFRESH_INTERVAL, RefreshLock, SnapshotStore, refresh_in_background
+from src.pipeline import ArticleProcessor, warm_up
+from src.records import Summary, from_dicts
 from src.schemas import SummaryDict
+from src.search import SearchIndex
+from src.store import ArticleStore, PAGE_SIZE, add_articles, store_version
+from src.trends import DIMENSIONS, WINDOWS, TrendStore, rebuild, trends_version
 
 
 SUMMARY_DIR = "data/summaries"
-TTL = 24 * 60 * 60  # 24 hours
+WARM_UP_MODELS = os.getenv("WARM_UP_MODELS") == "1"
+BACKGROUND_REFRESH = os.getenv("BACKGROUND_REFRESH", "1") == "1"  # 0 when `python -m src.ingest` does the refreshing
 
-@st.cache_data(show_spinner=False, ttl=TTL)
-def load_all_summaries() -> list[SummaryDict]:
-    news = ArticleProcessor()
-    summaries = news.get_processed_articles()
-    return sorted(summaries, key=lambda x: x.get("published_at", ""), reverse=True)
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    return warm_up(background=True)
+
+@st.cache_resource(show_spinner=False)
+def get_search_index() -> SearchIndex:
+    return SearchIndex()
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_store() -> SnapshotStore:
+    return SnapshotStore()
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_snapshot(version: tuple) -> list[Summary]:
+    # keyed by the snapshot file's version, so a newly published snapshot is picked up on the next page run;
+    # held as slotted records, which read like the dicts but take a fraction of the memory
+    snapshot = get_snapshot_store().load() or {"articles": []}
+    summaries = snapshot["articles"]
+    get_search_index().add_many(summaries)  # no-op for summaries indexed when they were produced
+    summaries.sort(key=lambda x: x.get("published_at") or x.get("fetched_at", ""), reverse=True)
+    return from_dicts(summaries, Summary)
+
+def load_all_summaries() -> list[Summary]:
+    version = get_snapshot_store().version()
+    return load_snapshot(version) if version else []
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_article_store(version: tuple) -> ArticleStore:
+    # keyed by the store file's version like load_snapshot; opening is a memory map plus index building
+    return ArticleStore()
+
+def get_article_store() -> ArticleStore:
+    # stores written before the article history existed start from the last snapshot
+    if store_version() is None:
+        with RefreshLock() as locked:
+            if locked and store_version() is None:
+                add_articles(load_all_summaries())
+    return load_article_store(store_version())
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_trends(version: tuple) -> TrendStore:
+    return TrendStore(merge_on_save=False)  # read only; the pipeline writes the file
+
+def get_trends() -> TrendStore:
+    # trends start from the article history the first time, like the store starts from the snapshot
+    if trends_version() is None and store_version() is not None:
+        with RefreshLock() as locked:
+            if locked and trends_version() is None:
+                with st.spinner("Computing sentiment trends from the article history..."):
+                    rebuild()
+    return load_trends(trends_version())
 
 def format_sentiment(label: str) -> str:
     emoji = {"POSITIVE": "📈", "NEGATIVE": "📉", "NEUTRAL": "📊"}.get(label.upper(), "")
@@ -18,7 +72,8 @@ def format_sentiment(label: str) -> str:
 
 def render_article(summary: SummaryDict):
     with st.expander(f"📰 {summary['title']}"):
-        st.markdown(f"**Published:** {summary['published_at']}  |  **Source:** {summary['source']}")
+        published = summary.get("published_at") or f"{summary.get('fetched_at', '')} (fetched)"
+        st.markdown(f"**Published:** {published}  |  **Source:** {summary['source']}")
         st.markdown(f"**Sentiment:** {format_sentiment(summary['sentiment'])} ({summary['sentiment_score']:.2f})")
         st.markdown("---")
         st.markdown(summary["summary"])
@@ -29,6 +84,9 @@ def main():
     st.title("🧠 Financial News Summarizer")
     st.markdown("Summarized and analyzed financial news powered by LLMs.")
 
+    if WARM_UP_MODELS:
+        start_warm_up()
+
     # Sidebar filters
     st.sidebar.header("🔍 Filters")
     sentiment_filter = st.sidebar.multiselect(
@@ -36,16 +94,135 @@ def main():
         options=["POSITIVE", "NEUTRAL", "NEGATIVE"],
         default=["POSITIVE", "NEUTRAL", "NEGATIVE"]
     )
+    query = st.sidebar.text_input("Search articles", placeholder='e.g. "rate cut" or semicond*')
+    date_range = st.sidebar.date_input("Published between", value=[])
+
+    store = get_snapshot_store()
+    if store.version() is None:
+        stream_first_snapshot(store, sentiment_filter)
+        return
+    render_freshness(store)
+
+    articles = get_article_store()
+    source_filter = st.sidebar.multiselect("Filter by source", options=articles.sources, placeholder="All sources")
+    ticker_filter = st.sidebar.multiselect("Filter by ticker", options=articles.tickers, placeholder="All tickers")
+
+    render_trends(get_trends(), tickers=ticker_filter, sources=source_filter)
+    if query.strip():
+        render_search(query, sentiment_filter, date_range)
+        return
 
-    # Load summaries
-    summaries = load_all_summaries()
+    render_page(articles, sentiments=sentiment_filter, sources=source_filter or None, tickers=ticker_filter or None,
+                date_from=date_range[0].isoformat() if len(date_range) > 0 else "",
+                date_to=date_range[1].isoformat() if len(date_range) > 1 else "")
 
-    filtered = [s for s in summaries if s["sentiment"].upper() in sentiment_filter]
+def render_trends(trends: TrendStore, tickers: list[str], sources: list[str]):
+    # drawn from the rolling aggregates alone, so it costs the same however long the article history is
+    import numpy as np
+    import pandas as pd
 
-    st.success(f"Loaded {len(filtered)} article summaries.")
-    for summary in filtered:
+    with st.expander("📈 Sentiment trends"):
+        left, right = st.columns(2)
+        dimension = left.radio("Group by", DIMENSIONS, horizontal=True, format_func=str.title)
+        window = right.radio("Window", list(WINDOWS), index=1, horizontal=True)
+        stats = trends.window(dimension, window)
+        ranked = [i for i in np.argsort(-stats.count, kind="stable") if stats.count[i]]
+        if not ranked:
+            st.info(f"No articles in the last {window}.")
+            return
+
+        # the sidebar's tickers or sources when set, otherwise the most covered series
+        selected = {"ticker": tickers, "source": sources}.get(dimension) or [stats.names[i] for i in ranked[:5]]
+        timeline, _, mean = trends.hourly(dimension, selected, hours=max(WINDOWS[window], 24))
+        st.caption("Hourly mean sentiment: +1 all positive at full confidence, -1 all negative")
+        st.line_chart(pd.DataFrame(mean.T, index=pd.to_datetime(timeline, unit="s"), columns=selected))
+        st.dataframe(pd.DataFrame({
+            "articles": stats.count[ranked],
+            "mean": stats.mean[ranked],
+            "EWMA": stats.ewma[ranked],
+            "positive": stats.mix[ranked, 0],
+            "neutral": stats.mix[ranked, 1],
+            "negative": stats.mix[ranked, 2],
+        }, index=[stats.names[i] for i in ranked]).round(3))
+
+def turn_page(step: int):
+    st.session_state.page += step
+
+def render_page(articles: ArticleStore, **filters):
+    # only the current page is queried and rendered; changing a filter goes back to the first page
+    if st.session_state.get("filters") != filters:
+        st.session_state.filters, st.session_state.page = filters, 0
+    result = articles.query(**filters, page=st.session_state.page, page_size=PAGE_SIZE)
+    st.session_state.page = result.page
+
+    if not result.total:
+        st.info("No article summaries match these filters.")
+        return
+    first = result.page * PAGE_SIZE
+    st.success(f"Showing {first + 1}–{first + len(result.rows)} of {result.total} article summaries.")
+    for summary in result.rows:
+        render_article(summary)
+
+    previous, position, following = st.columns([1, 2, 1])
+    previous.button("← Newer", on_click=turn_page, args=(-1,), disabled=result.page == 0)
+    position.markdown(f"Page {result.page + 1} of {result.pages}")
+    following.button("Older →", on_click=turn_page, args=(1,), disabled=result.page + 1 >= result.pages)
+
+def render_search(query: str, sentiment_filter: list[str], date_range):
+    load_all_summaries()  # makes sure today's summaries are indexed
+    results = get_search_index().search(
+        query,
+        sentiments=sentiment_filter,
+        date_from=date_range[0].isoformat() if len(date_range) > 0 else "",
+        date_to=date_range[1].isoformat() if len(date_range) > 1 else "",
+        limit=50,
+    )
+    st.success(f"Found {len(results)} articles matching {query!r}.")
+    for summary in results:
         render_article(summary)
 
+def render_freshness(store: SnapshotStore):
+    # stale-while-revalidate: the last snapshot is served right away and a refresh runs behind it,
+    # unless one is already running in this or another process
+    age = store.age() or 0.0
+    refreshing = RefreshLock().held_elsewhere()
+    if age >= REFRESH_INTERVAL and BACKGROUND_REFRESH and not refreshing:
+        refresh_in_background(store)
+        refreshing = True
+    note = " · refreshing in the background, reload to see new articles" if refreshing else ""
+    st.caption(f"Updated {age / 60:.0f} min ago{note}")
+
+def stream_first_snapshot(store: SnapshotStore, sentiment_filter: list[str]):
+    # nothing published yet: stream the pipeline into this page and publish the result,
+    # or wait for whichever session or worker is already building the first snapshot
+    lock = RefreshLock()
+    if not lock.acquire():
+        with st.spinner("Fetching and summarizing the latest news..."):
+            while store.version() is None and lock.held_elsewhere():
+                time.sleep(1)
+        st.rerun()
+    try:
+        summaries = stream_articles(ArticleProcessor(), sentiment_filter)
+        if summaries:
+            add_articles(summaries)
+            store.publish(summaries)
+    finally:
+        lock.release()
+
+def stream_articles(processor: ArticleProcessor, sentiment_filter: list[str]) -> list[SummaryDict]:
+    # render each summary as soon as the pipeline emits it
+    status = st.info("Fetching and summarizing the latest news...")
+    summaries, shown = [], 0
+    for summary in processor.stream_processed_articles():
+        summaries.append(summary)
+        if summary["sentiment"].upper() in sentiment_filter:
+            render_article(summary)
+            shown += 1
+            status.info(f"Summarized {shown} articles so far...")
+
+    status.success(f"Loaded {shown} article summaries.")
+    return summaries
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,68 @@
+import time
+import argparse
+
+from src.aggregator import NewsAggregator, CNNNewsClient
+from src.api_news import NewsAPIClient, AlphaVantageAPIClient
+from benchmarks.fake_browserless import FakeBrowserless
+from benchmarks.fake_news_apis import FakeNewsAPI
+
+
+def sources(cnn: FakeBrowserless, newsapi: FakeNewsAPI, alpha: FakeNewsAPI) -> list:
+    return [
+        CNNNewsClient(browserless_url=cnn.url, use_cache=False, incremental=False),
+        NewsAPIClient("local", base_url=newsapi.url, use_cache=False, incremental=False),
+        AlphaVantageAPIClient("local", base_url=alpha.url, use_cache=False, incremental=False),
+    ]
+
+
+def sequential(clients: list) -> tuple[float, int]:
+    start = time.perf_counter()
+    total = 0
+    for client in clients:
+        t0 = time.perf_counter()
+        articles = client.fetch_latest_articles()
+        total += len(articles)
+        print(f"    {client.name:<13} {len(articles):4d} articles in {time.perf_counter() - t0:6.2f}s")
+    return time.perf_counter() - start, total
+
+
+def aggregated(clients: list, timeout: float) -> tuple[float, int, NewsAggregator]:
+    aggregator = NewsAggregator(clients, timeout=timeout)
+    start = time.perf_counter()
+    articles = aggregator.fetch_latest_articles()
+    return time.perf_counter() - start, len(articles), aggregator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-source fetch: one source after another vs concurrent")
+    parser.add_argument("--cnn-articles", type=int, default=20)
+    parser.add_argument("--cnn-latency", type=float, default=0.25)
+    parser.add_argument("--newsapi-latency", type=float, default=1.5)
+    parser.add_argument("--alpha-latency", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with FakeBrowserless(n_articles=args.cnn_articles, latency=args.cnn_latency) as cnn, \
+            FakeNewsAPI("newsapi", latency=args.newsapi_latency) as newsapi, \
+            FakeNewsAPI("alphavantage", latency=args.alpha_latency) as alpha:
+        print("sequential:")
+        seq_time, seq_count = sequential(sources(cnn, newsapi, alpha))
+        print(f"  total {seq_time:6.2f}s  {seq_count} articles")
+
+        agg_time, agg_count, aggregator = aggregated(sources(cnn, newsapi, alpha), args.timeout)
+        slowest = max(r.latency for r in aggregator.reports.values())
+        print(f"concurrent:\n  total {agg_time:6.2f}s  {agg_count} articles  slowest source {slowest:.2f}s  "
+              f"speedup={seq_time / agg_time:4.1f}x")
+
+    # one source erroring, one stalling past the aggregator timeout
+    with FakeBrowserless(n_articles=args.cnn_articles, latency=args.cnn_latency) as cnn, \
+            FakeNewsAPI("newsapi", latency=0.1, status=500) as newsapi, \
+            FakeNewsAPI("alphavantage", latency=args.timeout * 3) as alpha:
+        elapsed, count, aggregator = aggregated(sources(cnn, newsapi, alpha), args.timeout)
+        print(f"degraded:\n  total {elapsed:6.2f}s  {count} articles (timeout {args.timeout:.1f}s)")
+        for report in aggregator.reports.values():
+            print(f"    {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import io
+import os
+import json
+import hashlib
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+os.environ.setdefault("TQDM_DISABLE", "1")  # read when tqdm is first imported
+
+from openai import OpenAI
+
+import src.sentiment as sentiment
+from src.batch import BatchSummaryJob
+from src.pipeline import ArticleProcessor
+from src.summarizer import FinNewsSummarizer
+from src.utils import metrics
+from src.utils.cache import migrate_json_dir
+from benchmarks import cnn_fixtures, tiny_finbert
+from benchmarks.fake_openai import FakeOpenAI
+
+
+def make_articles(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [{
+        "title": f"Markets story {i}",
+        "description": "",
+        "content": " ".join(rng.choice(cnn_fixtures.WORDS) for _ in range(400)),
+        "published_at": f"2025-07-01T{i % 24:02d}:{i % 60:02d}:00Z",
+        "url": f"https://example.com/backfill/{i}",
+        "source": "CNN",
+        "overall_sentiment_label": "",
+        "overall_sentiment_score": 0.0,
+        "topics": [],
+        "ticker_sentiment": [],
+    } for i in range(n)]
+
+
+def processor(client: OpenAI) -> ArticleProcessor:
+    # a fresh process's worth of state: only the caches and indexes on disk carry over
+    processor = ArticleProcessor(sources=[])
+    processor.summarizer = FinNewsSummarizer(openai_client=client)
+    return processor
+
+
+def legacy_duplicate(client: OpenAI, article: dict) -> bool:
+    # a near-duplicate whose story only has a legacy per-article file (a plain summary, imported by
+    # migrate_json_dir) is skipped with a warning rather than failing the run
+    legacy = {**article, "url": "https://example.com/legacy/0"}
+    summary = {key: legacy[key] for key in ("title", "description", "published_at", "url", "source")}
+    summary.update(summary="An older summary.", sentiment="NEUTRAL", sentiment_score=0.5)
+    run = processor(client)
+    url_key = hashlib.sha1(legacy["url"].encode()).hexdigest()
+    path = os.path.join(run.CACHE_DIR, hashlib.sha256(f"{url_key}.json".encode()).hexdigest() + ".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+    migrate_json_dir(run.CACHE_DIR, remove=True)
+    run.duplicates.assign(legacy["url"], f"{legacy['title']}\n{legacy['content']}")
+    duplicate = {**legacy, "url": "https://example.com/legacy/1"}
+    try:
+        return run.process_summarised([duplicate], {}) == []
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        return False
+
+
+class CrashAfterUpload(BatchSummaryJob):
+    def create(self, state: dict) -> dict:
+        raise RuntimeError("killed between the upload and the batch")
+
+
+def crash_after_upload(client: OpenAI, server: FakeOpenAI, articles: list, interval: float) -> tuple:
+    # -> (files uploaded, batches created, summaries) by the restarted process: it creates the batch from the
+    # checkpointed upload instead of uploading and submitting again
+    articles = [{**article, "url": article["url"].replace("/backfill/", "/crash/")} for article in articles]
+    first = processor(client)
+    try:
+        CrashAfterUpload(first.summarizer, name="crash").run(first, lambda: articles, interval=interval)
+    except RuntimeError:
+        pass
+    files, batches = len(server.files), len(server.batches)
+    resumed = processor(client)
+    summaries = BatchSummaryJob(resumed.summarizer, name="crash").run(resumed, lambda: articles, interval=interval)
+    outputs = sum(bool(b["output_file_id"]) + bool(b["error_file_id"]) for b in list(server.batches.values())[batches:])
+    return len(server.files) - files - outputs, len(server.batches) - batches, len(summaries)
+
+
+def cost(prompt: int, completion: int, args, discount: float = 1.0) -> float:
+    return (prompt * args.input_price + completion * args.output_price) / 1e6 * discount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nightly backfill: live OpenAI requests vs a batch job, "
+                                                 "including a restart while the job runs")
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--live-sample", type=int, default=100, help="articles sent live; the rest is projected")
+    parser.add_argument("--latency", type=float, default=0.3, help="live request latency")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02)
+    parser.add_argument("--server-error-rate", type=float, default=0.01)
+    parser.add_argument("--batch-latency", type=float, default=5.0, help="seconds the fake batch job runs")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--input-price", type=float, default=0.10, help="$ per 1M prompt tokens")
+    parser.add_argument("--output-price", type=float, default=0.40, help="$ per 1M completion tokens")
+    parser.add_argument("--batch-discount", type=float, default=0.5)
+    args = parser.parse_args()
+
+    sentiment.FINBERT_MODEL = tiny_finbert.build(os.path.join(tempfile.gettempdir(), "tiny-finbert"))
+    os.chdir(tempfile.mkdtemp(prefix="bench-batch-"))  # caches and indexes start empty
+    metrics.set_backend(metrics.MetricsBackend())
+    articles = make_articles(args.articles)
+    log = io.StringIO()
+
+    with FakeOpenAI(latency=args.latency, jitter=0.05, rate_limit_rate=args.rate_limit_rate,
+                    server_error_rate=args.server_error_rate, batch_latency=args.batch_latency) as server:
+        client = OpenAI(api_key="sk-local", base_url=server.base_url)
+
+        # live: the repo's default concurrency and rate limits, on a sample
+        sample = articles[:args.live_sample]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(log):
+            live = FinNewsSummarizer(openai_client=client).summarize_openai(sample)
+        live_seconds = (time.perf_counter() - start) * len(articles) / len(sample)
+        live_requests = server.requests * len(articles) / len(sample)
+        completion = sum(len(text) // 4 for text in live if text) * len(articles) / len(sample)
+        server.prompt_tokens = 0
+
+        # batch: submit and check once (the cron mode), then a new process resumes and finishes the run;
+        # batch requests don't count against the live rate limits, so only server errors remain
+        server.rate_limit_rate = 0.0
+        start = time.perf_counter()
+        first = processor(client)
+        with contextlib.redirect_stdout(log):
+            try:
+                BatchSummaryJob(first.summarizer).run(first, lambda: articles, timeout=0)
+            except TimeoutError:
+                pass
+        submitted = time.perf_counter() - start
+        resumed = processor(client)
+        with contextlib.redirect_stdout(log):
+            summaries = BatchSummaryJob(resumed.summarizer).run(resumed, lambda: articles,
+                                                                interval=args.poll_interval)
+        batch_seconds = time.perf_counter() - start
+        batches, calls, failed = len(server.batches), server.batch_api_calls, server.batch_requests - len(summaries)
+        prompt = server.prompt_tokens
+        mapped = all(summary["title"] in summary["summary"] for summary in summaries)
+
+        # the next night: stored summaries are reused and only the failed articles go up again
+        with contextlib.redirect_stdout(log):
+            again = processor(client)
+            rerun = BatchSummaryJob(again.summarizer).run(again, lambda: articles, interval=args.poll_interval)
+            rerun_batches = len(server.batches) - batches
+            legacy_ok = legacy_duplicate(client, make_articles(1, seed=1)[0])
+            crash = crash_after_upload(client, server, make_articles(20, seed=2), args.poll_interval)
+
+    print(f"{args.articles} articles, live latency {args.latency}s, fake batch job {args.batch_latency}s")
+    print(f"\n{'':<24}{'live':>14}{'batch job':>14}")
+    print(f"{'wall seconds':<24}{live_seconds:>14.0f}{batch_seconds:>14.1f}   (live projected from "
+          f"{len(sample)} articles)")
+    print(f"{'HTTP requests':<24}{live_requests:>14.0f}{calls:>14}")
+    print(f"{'est. cost $':<24}{cost(prompt, completion, args):>14.4f}"
+          f"{cost(prompt, completion, args, args.batch_discount):>14.4f}   ({prompt} prompt tokens)")
+    print(f"\nsubmitted in {submitted:.1f}s, resumed after a restart: {batches} batch created, "
+          f"{len(summaries)}/{args.articles} summarised ({failed} failed requests), "
+          f"summaries matched to their articles: {mapped}")
+    print(f"next run: {len(rerun)} summaries, {failed} failed articles resubmitted in "
+          f"{rerun_batches} new batch")
+    print(f"near-duplicate of a migrated legacy record handled: {legacy_ok}")
+    print(f"restart after a crash between upload and batch: {crash[0]} files uploaded, {crash[1]} batch created, "
+          f"{crash[2]} summaries")
+
+
+if __name__ == "__main__":
+    main()
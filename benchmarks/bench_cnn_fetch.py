@@ -0,0 +1,40 @@
+import time
+import argparse
+
+from src.cnn import CNNInvestingScraper
+from src.utils.http import HostLimiter
+from benchmarks.fake_browserless import FakeBrowserless
+
+
+def run(workers: int, server: FakeBrowserless) -> tuple[float, list]:
+    scraper = CNNInvestingScraper(max_workers=workers, browserless_url=server.url)
+    scraper.limiter = HostLimiter(max_concurrency=max(workers, 1))
+    start = time.perf_counter()
+    articles = scraper.run()
+    return time.perf_counter() - start, articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CNN article fetch: sequential vs pooled workers")
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with FakeBrowserless(n_articles=args.articles, latency=args.latency, error_rate=args.error_rate) as server:
+        baseline = None
+        reference = None
+        for workers in args.workers:
+            elapsed, articles = run(workers, server)
+            urls = [a["url"] for a in articles]
+            if reference is None:
+                reference = urls
+            baseline = baseline or elapsed
+            filled = sum(1 for a in articles if a.get("content"))
+            print(f"workers={workers:<3} {elapsed:7.2f}s  speedup={baseline / elapsed:5.1f}x  "
+                  f"filled={filled}/{len(articles)}  order_ok={urls == reference}")
+
+
+if __name__ == "__main__":
+    main()
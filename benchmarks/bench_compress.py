@@ -0,0 +1,100 @@
+import time
+import random
+import argparse
+import statistics
+
+import numpy as np
+from openai import OpenAI
+
+from src.compress import CONTENT_TOKEN_BUDGET, ContentCompressor, count_tokens, get_encoder
+from src.summarizer import FinNewsSummarizer
+from src.utils.extract import extract_content
+from benchmarks import cnn_fixtures
+from benchmarks.fake_openai import FakeOpenAI
+
+BOILERPLATE_LINES = [
+    "Read more: The latest on the markets",
+    "Related article Stocks slip as traders weigh the Fed outlook",
+    "Sign up for our Before the Bell newsletter.",
+    "Ad Feedback",
+    "Most stock quote data provided by BATS. Market indices are shown in real time.",
+]
+
+
+def scraped_article(seed: int, pages: int) -> dict:
+    # extracted CNN-shaped text with a dateline, boilerplate lines and a repeated paragraph or two;
+    # `pages` > 1 stands in for live blogs and long features
+    rng = random.Random(seed)
+    paragraphs = []
+    for page in range(pages):
+        paragraphs.extend(extract_content(cnn_fixtures.article_page(seed * 100 + page, head_kb=1)).split("\n\n"))
+    for line in rng.sample(BOILERPLATE_LINES, 3):
+        paragraphs.insert(rng.randrange(len(paragraphs)), line)
+    for _ in range(2):
+        paragraphs.insert(rng.randrange(len(paragraphs)), rng.choice(paragraphs))
+    paragraphs[0] = f"New York CNN — {paragraphs[0]}"
+    return {"title": f"Markets story {seed}", "content": "\n\n".join(paragraphs)}
+
+
+def summarize_all(articles: list, server: FakeOpenAI, budget: int, in_flight: int) -> tuple:
+    summarizer = FinNewsSummarizer(openai_client=OpenAI(api_key="sk-local", base_url=server.base_url),
+                                   max_in_flight=in_flight, requests_per_minute=60_000, tokens_per_minute=50_000_000,
+                                   content_budget=budget)
+    server.prompt_tokens = 0
+    start = time.perf_counter()
+    summaries = summarizer.summarize_openai(articles)
+    return time.perf_counter() - start, server.prompt_tokens, sum(1 for s in summaries if s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token-budgeted content compression: tokens saved and "
+                                                 "effect on summarization time")
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--budget", type=int, default=CONTENT_TOKEN_BUDGET)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 1, 2, 4, 10], help="pages per article, cycled")
+    parser.add_argument("--show", type=int, default=10, help="per-article rows to print")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--prompt-latency", type=float, default=0.05, help="fake server seconds per 1k prompt tokens")
+    parser.add_argument("--in-flight", type=int, default=8)
+    args = parser.parse_args()
+
+    model = FinNewsSummarizer.OPENAI_MODEL
+    print(f"tokenizer: {get_encoder(model).name if get_encoder(model) else 'estimate (~4 chars/token)'}, "
+          f"budget {args.budget} tokens/article")
+    articles = [scraped_article(i, args.sizes[i % len(args.sizes)]) for i in range(args.articles)]
+    compressor = ContentCompressor(args.budget, model=model)
+
+    rows, times = [], []
+    for article in articles:
+        start = time.perf_counter()
+        result = compressor.compress(article["content"])
+        times.append((time.perf_counter() - start) * 1000)
+        rows.append(result)
+
+    print(f"\n{'article':<10}{'tokens':>8}{'sent':>8}{'saved':>8}{'saved %':>9}  method     ms")
+    for article, result, ms in list(zip(articles, rows, times))[:args.show]:
+        saved = result.original_tokens - result.tokens
+        print(f"{article['title'].split()[-1]:<10}{result.original_tokens:>8}{result.tokens:>8}{saved:>8}"
+              f"{saved / max(result.original_tokens, 1):>9.0%}  {result.method:<9}{ms:5.1f}")
+    original = sum(r.original_tokens for r in rows)
+    sent = sum(r.tokens for r in rows)
+    print(f"\n{len(rows)} articles: {original} -> {sent} tokens ({1 - sent / original:.0%} saved), "
+          f"median saved {statistics.median(r.original_tokens - r.tokens for r in rows):.0f}/article, "
+          f"max sent {max(r.tokens for r in rows)} (budget {args.budget})")
+    print(f"compression p50 {np.percentile(times, 50):.1f} ms, p95 {np.percentile(times, 95):.1f} ms, "
+          f"cleaned only {sum(r.method == 'cleaned' for r in rows)}, ranked {sum(r.method == 'textrank' for r in rows)}, "
+          f"all within budget: {all(count_tokens(r.text, model) <= args.budget for r in rows)}")
+
+    with FakeOpenAI(latency=args.latency, jitter=0.0, prompt_latency=args.prompt_latency) as server:
+        print(f"\nsummarization, {args.in_flight} in flight, fake latency {args.latency}s + "
+              f"{args.prompt_latency}s per 1k prompt tokens:")
+        baseline = None
+        for label, budget in (("as scraped", 0), ("compressed", args.budget)):
+            elapsed, prompt_tokens, done = summarize_all(articles, server, budget, args.in_flight)
+            baseline = baseline or elapsed
+            print(f"  {label:<11} {elapsed:6.2f}s  prompt tokens {prompt_tokens:>8}  done {done}/{len(articles)}  "
+                  f"speedup={baseline / elapsed:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from src.dedup import DuplicateIndex, shingles
+
+WORDS = [f"w{i}" for i in range(5000)]
+
+
+def make_corpus(n: int, dup_rate: float, rng: random.Random) -> tuple[list[str], list[int]]:
+    # returns texts and the index of the original each one copies (itself for originals)
+    texts, origin = [], []
+    for i in range(n):
+        if texts and rng.random() < dup_rate:
+            src = rng.randrange(len(texts))
+            words = texts[src].split()
+            for _ in range(rng.randint(1, 8)):  # wire-style light edits
+                words[rng.randrange(len(words))] = rng.choice(WORDS)
+            texts.append(" ".join(words))
+            origin.append(origin[src])
+        else:
+            texts.append(" ".join(rng.choices(WORDS, k=rng.randint(300, 800))))
+            origin.append(i)
+    return texts, origin
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH dedup vs all-pairs Jaccard")
+    parser.add_argument("--articles", type=int, nargs="+", default=[1_000, 5_000])
+    parser.add_argument("--dup-rate", type=float, default=0.3)
+    parser.add_argument("--pairwise-limit", type=int, default=1_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for n in args.articles:
+        texts, origin = make_corpus(n, args.dup_rate, rng)
+        with tempfile.TemporaryDirectory() as workdir:
+            index = DuplicateIndex(os.path.join(workdir, "dedup.sqlite3"))
+            start = time.perf_counter()
+            reps = [index.assign(str(i), text) for i, text in enumerate(texts)]
+            elapsed = time.perf_counter() - start
+
+        flagged = [i for i, rep in enumerate(reps) if rep != str(i)]
+        truth = [i for i in range(n) if origin[i] != i]
+        hits = sum(1 for i in flagged if origin[int(reps[i])] == origin[i])
+        print(f"articles={n:<6} lsh {elapsed:7.2f}s ({n / elapsed:7.1f}/s)  "
+              f"precision={hits / max(len(flagged), 1):.3f}  recall={hits / max(len(truth), 1):.3f}")
+
+        if n <= args.pairwise_limit:
+            sets = [set(shingles(t).tolist()) for t in texts]
+            start = time.perf_counter()
+            for i in range(n):
+                for j in range(i):
+                    jaccard(sets[i], sets[j])
+            elapsed = time.perf_counter() - start
+            print(f"{'':<14} all-pairs {elapsed:7.2f}s ({n / elapsed:7.1f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import io
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+import platform
+import tempfile
+import functools
+import threading
+import contextlib
+import subprocess
+from collections import defaultdict
+from datetime import date, datetime
+
+os.environ.setdefault("TQDM_DISABLE", "1")  # read when tqdm is first imported
+
+import numpy as np
+from openai import OpenAI
+
+import src.pipeline as pipeline
+import src.sentiment as sentiment
+from src.aggregator import CNNNewsClient
+from src.cnn import CNNInvestingScraper
+from src.pipeline import ArticleProcessor
+from src.summarizer import FinNewsSummarizer
+from src.utils.cache import save_to_cache
+from benchmarks import cnn_fixtures, tiny_finbert
+from benchmarks.fake_browserless import FakeBrowserless
+from benchmarks.fake_openai import FakeOpenAI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+# collects (start, end, items) per stage from wrapped functions and model forward hooks
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.run_start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.samples = defaultdict(list)
+            self.run_start = time.perf_counter()
+
+    def add(self, stage: str, start: float, end: float, items: int = 1):
+        with self._lock:
+            self.samples[stage].append((start, end, items))
+
+    def wrap(self, owner, attr: str, stage: str, items=lambda args, kwargs: 1, on_done=None):
+        original = getattr(owner, attr)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                self.add(stage, start, end, items(args, kwargs))
+                if on_done:
+                    on_done(end)
+
+        setattr(owner, attr, timed)
+
+    def hook_model(self, model, stage: str):
+        local = threading.local()
+
+        def before(module, args, kwargs):
+            local.start = time.perf_counter()
+
+        def after(module, args, kwargs, output):
+            self.add(stage, local.start, time.perf_counter(), int(kwargs["input_ids"].shape[0]))
+
+        model.register_forward_pre_hook(before, with_kwargs=True)
+        model.register_forward_hook(after, with_kwargs=True)
+
+    def stats(self) -> dict:
+        result = {}
+        for stage, samples in sorted(self.samples.items()):
+            starts, ends, items = (np.array(column, dtype=np.float64) for column in zip(*samples))
+            latencies = (ends - starts) * 1000
+            span = max(ends.max() - starts.min(), 1e-9)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            result[stage] = {
+                "calls": len(samples), "items": int(items.sum()), "throughput_per_s": float(items.sum() / span),
+                "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+                "mean_ms": float(latencies.mean()), "max_ms": float(latencies.max()),
+            }
+        return result
+
+
+def instrument(recorder: Recorder):
+    recorder.wrap(CNNInvestingScraper, "_fill_content", "fetch_article")
+    recorder.wrap(CNNInvestingScraper, "_extract_content", "extract")
+    recorder.wrap(FinNewsSummarizer, "_complete", "summarize")
+    recorder.wrap(pipeline, "classify_sentiment_batch", "sentiment", items=lambda a, k: len(a[0]))
+    recorder.wrap(pipeline, "tag_ticker_sentiment", "tickers", items=lambda a, k: len(a[0]))
+    # time from the start of the run until each article's summary is stored
+    recorder.wrap(ArticleProcessor, "_store_summary", "store",
+                  on_done=lambda end: recorder.add("article_ready", recorder.run_start, end))
+    recorder.hook_model(sentiment.load_sentiment_pipeline().model, "finbert_batch")
+
+
+def run_once(args, n_articles: int, seed: int, browserless: FakeBrowserless, openai_url: str,
+             recorder: Recorder) -> dict:
+    # fresh urls per run, so nothing is served from the incremental store
+    browserless.index = cnn_fixtures.index_page(seed, lead_cards=n_articles, strips=0, head_kb=args.head_kb)
+    processor = ArticleProcessor(dedup=args.dedup,
+                                 sources=[CNNNewsClient(browserless_url=browserless.url, use_cache=False,
+                                                        incremental=False)])
+    processor.aggregator.timeout = args.source_timeout
+    processor.summarizer = FinNewsSummarizer(
+        openai_client=OpenAI(api_key="sk-local", base_url=openai_url), max_in_flight=args.in_flight,
+        requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+    )
+    save_to_cache(key=f"processed_{date.today()}", data=[], cache_dir=ArticleProcessor.CACHE_DIR)
+
+    log = io.StringIO()
+    recorder.reset()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+        start = time.perf_counter()
+        summaries = processor.get_processed_articles()
+        end = time.perf_counter()
+    recorder.add("end_to_end", start, end, len(summaries))
+
+    return {
+        "articles": n_articles, "seed": seed, "summaries": len(summaries), "wall_s": end - start,
+        "articles_per_s": len(summaries) / (end - start), "stages": recorder.stats(),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def print_run(run: dict):
+    print(f"\n{run['articles']} articles: {run['wall_s']:.2f}s end to end, {run['articles_per_s']:.1f} articles/s "
+          f"({run['summaries']} summaries)")
+    if run["summaries"] < run["articles"]:
+        print(f"  [WARN] {run['articles'] - run['summaries']} articles produced no summary")
+    print(f"  {'stage':<14}{'calls':>7}{'items/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, s in run["stages"].items():
+        print(f"  {stage:<14}{s['calls']:>7}{s['throughput_per_s']:>11.1f}"
+              f"{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+
+
+def compare(baseline_path: str, runs: list):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {run["articles"]: run for run in json.load(f)["runs"]}
+    print(f"\nvs {os.path.basename(baseline_path)} (p50 and throughput ratios, new / old):")
+    for run in runs:
+        old = baseline.get(run["articles"])
+        if not old:
+            continue
+        for stage, s in run["stages"].items():
+            o = old["stages"].get(stage)
+            if o:
+                print(f"  {run['articles']:>6} {stage:<14} p50 x{s['p50_ms'] / max(o['p50_ms'], 1e-9):5.2f}  "
+                      f"throughput x{s['throughput_per_s'] / max(o['throughput_per_s'], 1e-9):5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark: "
+                                                 "fake Browserless + fake OpenAI + tiny local FinBERT")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--fixtures", help="directory of saved article .html pages to replay (default: generated)")
+    parser.add_argument("--head-kb", type=int, default=20, help="inline script/style weight of generated pages")
+    parser.add_argument("--browserless-latency", type=float, default=0.05)
+    parser.add_argument("--browserless-error-rate", type=float, default=0.01)
+    parser.add_argument("--openai-latency", type=float, default=0.05)
+    parser.add_argument("--openai-jitter", type=float, default=0.02)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.01)
+    parser.add_argument("--server-error-rate", type=float, default=0.01)
+    parser.add_argument("--in-flight", type=int, default=FinNewsSummarizer.MAX_IN_FLIGHT)
+    parser.add_argument("--rpm", type=int, default=60_000, help="client-side limit; high so the fake server sets the pace")
+    parser.add_argument("--tpm", type=int, default=50_000_000)
+    parser.add_argument("--source-timeout", type=float, default=3600, help="aggregator timeout; "
+                        "the app's default would cut large corpora short")
+    parser.add_argument("--model", help="FinBERT directory or hub name (default: tiny random-weight BERT)")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false")
+    parser.add_argument("--output", help=f"results file (default: {RESULTS_DIR}/e2e-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline logs")
+    args = parser.parse_args()
+
+    sentiment.FINBERT_MODEL = args.model or tiny_finbert.build(os.path.join(tempfile.gettempdir(), "tiny-finbert"))
+    fixtures = list(cnn_fixtures.load(args.fixtures).values()) if args.fixtures else []
+    if fixtures and args.dedup:
+        print("[INFO] Replayed fixtures repeat across articles; near-duplicate detection disabled")
+        args.dedup = False
+
+    # caches, search and dedup indexes are relative to the working directory: start from empty ones
+    workdir = tempfile.mkdtemp(prefix="bench-e2e-")
+    os.chdir(workdir)
+    recorder = Recorder()
+    instrument(recorder)
+
+    render = None if fixtures else (
+        lambda path: cnn_fixtures.article_page(zlib.crc32(path.encode()), head_kb=args.head_kb))
+    runs = []
+    with FakeBrowserless(latency=args.browserless_latency, error_rate=args.browserless_error_rate,
+                         fixtures=fixtures, render_article=render) as browserless, \
+            FakeOpenAI(latency=args.openai_latency, jitter=args.openai_jitter, rate_limit_rate=args.rate_limit_rate,
+                       server_error_rate=args.server_error_rate) as openai_server:
+        for n_articles in args.sizes:
+            for r in range(args.repeat):
+                run = run_once(args, n_articles, seed=n_articles * 1000 + r, browserless=browserless,
+                               openai_url=openai_server.base_url, recorder=recorder)
+                runs.append(run)
+                print_run(run)
+
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        "model": sentiment.FINBERT_MODEL, "config": vars(args), "runs": runs,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        compare(args.compare, runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import time
+import argparse
+import statistics
+
+from src.cnn import CNNInvestingScraper
+from src.utils.extract import extract_contents
+from benchmarks import cnn_fixtures
+
+
+def scraper(parser: str) -> CNNInvestingScraper:
+    return CNNInvestingScraper(max_workers=1, browserless_url="http://127.0.0.1:0/content", parser=parser)
+
+
+def parse(parser: str, name: str, html: str):
+    s = scraper(parser)
+    if "index" in name:
+        s._get_headlines(html)
+        return s.articles_data
+    return s._extract_content(html)
+
+
+def timed(parser: str, name: str, html: str, repeat: int) -> tuple:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse(parser, name, html)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CNN HTML extraction: BeautifulSoup/html.parser vs lxml fast path")
+    parser.add_argument("--fixtures", help="directory of saved .html pages (default: generated CNN-shaped pages)")
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--processes", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args()
+
+    pages = cnn_fixtures.load(args.fixtures) if args.fixtures else cnn_fixtures.generate(args.articles)
+    mismatches = []
+    totals = {"index": [0.0, 0.0, 0], "article": [0.0, 0.0, 0]}
+    for name, html in pages.items():
+        before, expected = timed("bs4", name, html, args.repeat)
+        after, actual = timed("lxml", name, html, args.repeat)
+        if expected != actual:
+            mismatches.append(name)
+        if name.startswith("edge_"):
+            continue
+        kind = "index" if "index" in name else "article"
+        totals[kind][0] += before
+        totals[kind][1] += after
+        totals[kind][2] += 1
+
+    print(f"{len(pages)} pages, avg {sum(map(len, pages.values())) / len(pages) / 1024:.0f} KiB, "
+          f"identical output: {len(pages) - len(mismatches)}/{len(pages)}")
+    for name in mismatches:
+        print(f"  MISMATCH {name}")
+    for kind, (before, after, count) in totals.items():
+        if count:
+            print(f"{kind:<8} bs4 {before / count * 1000:8.2f} ms/page   lxml {after / count * 1000:7.2f} ms/page   "
+                  f"speedup={before / after:5.1f}x")
+
+    articles = [html for name, html in pages.items() if "index" not in name]
+    reference = None
+    for processes in args.processes:
+        extract_contents(articles[:2], processes=processes)  # start the worker processes
+        start = time.perf_counter()
+        contents = extract_contents(articles, processes=processes)
+        elapsed = time.perf_counter() - start
+        reference = reference or contents
+        print(f"bulk processes={processes:<2} {len(articles) / elapsed:8.1f} pages/s  same_as_inline={contents == reference}")
+
+
+if __name__ == "__main__":
+    main()
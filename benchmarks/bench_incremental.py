@@ -0,0 +1,102 @@
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+import src.api_news as api_news
+from src.aggregator import NewsAggregator, CNNNewsClient
+from src.api_news import NewsAPIClient, AlphaVantageAPIClient
+from src.utils import metrics
+from benchmarks.fake_browserless import FakeBrowserless
+from benchmarks.fake_news_apis import FakeNewsAPI
+
+
+class Upstream:
+    # CNN, NewsAPI and Alpha Vantage feeds that gain `new` stories whenever advance() is called
+    def __init__(self, cnn: FakeBrowserless, newsapi: FakeNewsAPI, alpha: FakeNewsAPI, headlines: int = 40):
+        self.cnn, self.newsapi, self.alpha = cnn, newsapi, alpha
+        self.headlines = headlines
+        self.stories = 0
+        self.start = datetime.now() - timedelta(days=1)
+        self.cnn_ids, self.newsapi_items, self.alpha_items = [], [], []
+        self.advance(headlines)
+
+    def advance(self, new: int):
+        for _ in range(new):
+            i = self.stories
+            self.stories += 1
+            self.cnn_ids = ([i] + self.cnn_ids)[:self.headlines]
+            self.newsapi_items = ([{
+                "source": {"name": "Reuters"}, "title": f"Headline {i}", "description": f"Story {i}.",
+                "url": f"https://example.com/newsapi/{i}", "publishedAt": f"2025-07-01T12:{i % 60:02d}:00Z",
+                "content": f"Stocks moved on story {i}.",
+            }] + self.newsapi_items)[:20]
+            self.alpha_items.insert(0, {
+                "title": f"Headline {i}", "url": f"https://example.com/alpha/{i}", "summary": f"Story {i}.",
+                "time_published": (self.start + timedelta(minutes=i)).strftime("%Y%m%dT%H%M%S"),
+                "source_domain": "www.benzinga.com", "topics": [], "ticker_sentiment": [],
+            })
+        cards = "".join(
+            f'<div class="card container__item"><a href="/2025/01/01/investing/story-{i}/index.html">'
+            f'<span class="container__headline-text">Markets story {i}</span></a></div>'
+            for i in self.cnn_ids
+        )
+        self.cnn.index = ("<html><body><div class=\"container container_lead-plus-headlines-with-images\">"
+                          f"{cards}</div></body></html>")
+        self.newsapi.feed = list(self.newsapi_items)
+        self.alpha.feed = list(self.alpha_items)
+
+    def counters(self) -> dict:
+        return {"renders": self.cnn.requests, "probes": self.cnn.head_requests,
+                "api_calls": self.newsapi.requests + self.alpha.requests,
+                "api_items": self.newsapi.items_served + self.alpha.items_served,
+                "not_modified": self.newsapi.not_modified + self.alpha.not_modified}
+
+
+def run(args, incremental: bool) -> tuple[dict, float, list]:
+    api_news.SOURCE_STATE_DIR = tempfile.mkdtemp(prefix="bench-incremental-")
+    with FakeBrowserless(latency=args.latency) as cnn, \
+            FakeNewsAPI("newsapi", latency=args.latency) as newsapi, \
+            FakeNewsAPI("alphavantage", latency=args.latency) as alpha:
+        upstream = Upstream(cnn, newsapi, alpha)
+        clients = [
+            CNNNewsClient(browserless_url=cnn.url, use_cache=False, incremental=incremental, probe_url=cnn.index_url),
+            NewsAPIClient("local", base_url=newsapi.url, use_cache=False, incremental=incremental),
+            AlphaVantageAPIClient("local", base_url=alpha.url, use_cache=False, incremental=incremental),
+        ]
+        url_sets, elapsed = [], 0.0
+        for refresh in range(args.refreshes):
+            if refresh and refresh % args.change_every == 0:
+                upstream.advance(args.new)
+            start = time.perf_counter()
+            articles = NewsAggregator(clients).fetch_latest_articles()
+            elapsed += time.perf_counter() - start
+            url_sets.append({article["url"] for article in articles})
+        return upstream.counters(), elapsed, url_sets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upstream calls over repeated refreshes: full vs incremental fetching")
+    parser.add_argument("--refreshes", type=int, default=12)
+    parser.add_argument("--change-every", type=int, default=3, help="new stories appear every N refreshes")
+    parser.add_argument("--new", type=int, default=5, help="stories added per source on each change")
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    metrics.set_backend(metrics.MetricsBackend())
+    print(f"{args.refreshes} refreshes, {args.new} new stories per source every {args.change_every} refreshes, "
+          f"{args.latency}s upstream latency")
+    full, full_time, full_sets = run(args, incremental=False)
+    inc, inc_time, inc_sets = run(args, incremental=True)
+    print(f"\n{'':<14}{'full':>10}{'incremental':>14}")
+    for key in ("renders", "probes", "api_calls", "api_items", "not_modified"):
+        print(f"{key:<14}{full[key]:>10}{inc[key]:>14}")
+    print(f"{'seconds':<14}{full_time:>10.2f}{inc_time:>14.2f}")
+    same = sum(a == b for a, b in zip(full_sets, inc_sets))
+    print(f"\nBrowserless renders -{1 - inc['renders'] / full['renders']:.0%}, "
+          f"API items transferred -{1 - inc['api_items'] / full['api_items']:.0%}; "
+          f"same articles as a full fetch on {same}/{args.refreshes} refreshes")
+
+
+if __name__ == "__main__":
+    main()
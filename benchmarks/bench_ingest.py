@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing as mp
+
+import numpy as np
+
+from src.ingest import RefreshLock, SnapshotStore, refresh_snapshot
+from benchmarks import cnn_fixtures
+
+
+def make_summaries(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [{
+        "title": f"Markets story {i}",
+        "summary": " ".join(rng.choice(cnn_fixtures.WORDS) for _ in range(150)),
+        "description": " ".join(rng.choice(cnn_fixtures.WORDS) for _ in range(25)),
+        "published_at": f"2026-01-01T{i % 24:02d}:00:00Z",
+        "url": f"https://edition.cnn.com/2026/01/01/markets/story-{i}",
+        "source": "CNN",
+        "sentiment": rng.choice(["POSITIVE", "NEUTRAL", "NEGATIVE"]),
+        "sentiment_score": rng.random(),
+        "topics": [],
+        "ticker_sentiment": [],
+    } for i in range(n)]
+
+
+class FakeProcessor:
+    # stands in for ArticleProcessor: sleeps for the length of a pipeline run and logs each run to a file
+    def __init__(self, runs_path: str, seconds: float, articles: int):
+        self.runs_path, self.seconds, self.articles = runs_path, seconds, articles
+
+    def refresh(self) -> list[dict]:
+        with open(self.runs_path, "a") as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(self.seconds)
+        return make_summaries(self.articles, seed=os.getpid())
+
+
+def _instance(directory: str, runs_path: str, seconds: float, articles: int, use_lock: bool, barrier):
+    # one app instance finding a stale snapshot at the same moment as the others
+    barrier.wait()
+    processor = FakeProcessor(runs_path, seconds, articles)
+    if use_lock:
+        refresh_snapshot(SnapshotStore(directory), processor_factory=lambda: processor,
+                         article_store=os.path.join(directory, "articles.arrow"))
+    else:
+        SnapshotStore(directory).publish(processor.refresh())
+
+
+def concurrent_refreshes(instances: int, seconds: float, articles: int, use_lock: bool) -> tuple[int, float]:
+    directory = tempfile.mkdtemp(prefix="bench-ingest-")
+    runs_path = os.path.join(directory, "runs.log")
+    barrier = mp.Barrier(instances)
+    procs = [mp.Process(target=_instance, args=(directory, runs_path, seconds, articles, use_lock, barrier))
+             for _ in range(instances)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    with open(runs_path) as f:
+        return len(f.readlines()), time.perf_counter() - start
+
+
+def _reader(directory: str, stop, results):
+    # a page run: check the version, reload only when it changed
+    store = SnapshotStore(directory)
+    latencies, reloads, torn, seen = [], [], 0, None
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            version = store.version()
+            if version != seen:
+                store.load()
+                seen = version
+                reloads.append(time.perf_counter() - start)
+        except json.JSONDecodeError:
+            torn += 1
+        latencies.append(time.perf_counter() - start)
+    results.put((latencies, reloads, torn))
+
+
+def serve_during_refreshes(readers: int, publishes: int, articles: int) -> tuple[list, list, int]:
+    directory = tempfile.mkdtemp(prefix="bench-ingest-")
+    store = SnapshotStore(directory)
+    store.publish(make_summaries(articles))
+    stop, results = mp.Event(), mp.Queue()
+    procs = [mp.Process(target=_reader, args=(directory, stop, results)) for _ in range(readers)]
+    for p in procs:
+        p.start()
+    for i in range(publishes):
+        with RefreshLock(directory):
+            store.publish(make_summaries(articles, seed=i + 1))
+        time.sleep(0.02)
+    stop.set()
+    latencies, reloads, torn = [], [], 0
+    for _ in procs:
+        page_runs, page_reloads, page_torn = results.get()
+        latencies.extend(page_runs)
+        reloads.extend(page_reloads)
+        torn += page_torn
+    for p in procs:
+        p.join()
+    return latencies, reloads, torn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot serving and refresh coordination across processes")
+    parser.add_argument("--instances", type=int, default=8, help="app instances hitting a stale snapshot at once")
+    parser.add_argument("--refresh-seconds", type=float, default=2.0, help="length of one simulated pipeline run")
+    parser.add_argument("--articles", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--publishes", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.instances} instances refreshing at once, {args.refresh_seconds}s pipeline, {args.articles} articles")
+    for label, use_lock in (("no lock", False), ("refresh lock", True)):
+        runs, elapsed = concurrent_refreshes(args.instances, args.refresh_seconds, args.articles, use_lock)
+        print(f"  {label:<13} pipeline runs {runs:>3}  wall {elapsed:5.2f}s")
+
+    latencies, reloads, torn = serve_during_refreshes(args.readers, args.publishes, args.articles)
+    ms, reload_ms = np.array(latencies) * 1000, np.array(reloads) * 1000
+    print(f"\n{args.readers} readers while {args.publishes} snapshots were published: {len(ms)} page runs, "
+          f"{len(reload_ms)} reloads, torn reads {torn}")
+    print(f"  unchanged snapshot p50 {np.percentile(ms, 50):.3f} ms  p99 {np.percentile(ms, 99):.3f} ms")
+    print(f"  new snapshot       p50 {np.percentile(reload_ms, 50):.1f} ms  p99 {np.percentile(reload_ms, 99):.1f} ms  "
+          f"(vs {args.refresh_seconds * 1000:.0f} ms blocking on the pipeline)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import gc
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+import psutil
+
+from src import records
+from src.records import Summary, from_dicts, pack_records, unpack_records
+from benchmarks import cnn_fixtures
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "TSLA", "META", "GOOGL", "JPM", "XOM", "BA"]
+SOURCES = ["CNN", "Reuters", "Bloomberg", "Benzinga", "MarketWatch", "CNBC"]
+TOPICS = ["Technology", "Earnings", "Financial Markets", "Economy - Monetary", "Energy & Transportation"]
+
+
+def make_summaries(n: int, seed: int = 0) -> list[dict]:
+    # both shapes the pipeline produces: Alpha Vantage's ticker/topic entries (normalized) and the local tagger's
+    rng = random.Random(seed)
+    words = cnn_fixtures.WORDS
+    summaries = []
+    for i in range(n):
+        alpha = rng.random() < 0.4
+        tickers = rng.sample(TICKERS, rng.randint(0, 3))
+        if alpha:
+            ticker_sentiment = [{"ticker": t, "label": rng.choice(["POSITIVE", "NEUTRAL", "NEGATIVE"]),
+                                 "confidence": round(rng.random(), 6), "sentence": ""} for t in tickers]
+            topics = [{"label": t, "score": round(rng.random(), 6)} for t in rng.sample(TOPICS, 2)]
+        else:
+            ticker_sentiment = [{"ticker": t, "label": rng.choice(["POSITIVE", "NEUTRAL", "NEGATIVE"]),
+                                 "confidence": rng.random(), "sentence": " ".join(rng.choices(words, k=15))}
+                                for t in tickers]
+            topics = []
+        summaries.append({
+            "title": f"Markets story {i}: " + " ".join(rng.choices(words, k=8)),
+            "summary": " ".join(rng.choices(words, k=60)),
+            "description": " ".join(rng.choices(words, k=20)),
+            "published_at": f"2025-07-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00Z",
+            "url": f"https://example.com/{i}",
+            "source": rng.choice(SOURCES),
+            "sentiment": rng.choice(["POSITIVE", "NEUTRAL", "NEGATIVE"]),
+            "sentiment_score": rng.random(),
+            "topics": topics,
+            "ticker_sentiment": ticker_sentiment,
+        })
+    return summaries
+
+
+PATHS = {
+    # name -> (encode what is held in memory, decode bytes back into it)
+    "dict + json indent=2": (lambda data: json.dumps(data, indent=2).encode("utf-8"), json.loads),
+    "dict + codec": (records.dumps, records.loads),
+    "records + packed": (pack_records, lambda payload: unpack_records(payload, Summary)),
+}
+
+
+def child(path: str, name: str):
+    # RSS growth from decoding the file and holding the result, in a fresh interpreter
+    process = psutil.Process()
+    gc.collect()
+    before = process.memory_info().rss
+    with open(path, "rb") as f:
+        payload = f.read()
+    held = PATHS[name][1](payload)
+    del payload
+    gc.collect()
+    print((process.memory_info().rss - before) / 1e6, len(held))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summary records + packed codec vs dicts + JSON: time, size, memory")
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "NAME"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    summaries = make_summaries(args.articles)
+    codec = "orjson" if records.orjson is not None else "json"
+    start = time.perf_counter()
+    summary_records = from_dicts(summaries, Summary)
+    print(f"{args.articles} summaries, codec backend: {codec}, "
+          f"dicts -> records {time.perf_counter() - start:.2f}s")
+    print(f"\n{'path':<22}{'encode s':>10}{'decode s':>10}{'MB on disk':>12}{'RSS held MB':>13}")
+    directory = tempfile.mkdtemp(prefix="bench-records-")
+    for name, (encode, decode) in PATHS.items():
+        held = summary_records if name.startswith("records") else summaries
+        encode_times, decode_times = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            payload = encode(held)
+            encode_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            decoded = decode(payload)
+            decode_times.append(time.perf_counter() - start)
+        assert decoded == held, name
+        del decoded
+
+        path = os.path.join(directory, name.replace(" ", "_") + ".bin")
+        with open(path, "wb") as f:
+            f.write(payload)
+        result = subprocess.run([sys.executable, "-m", "benchmarks.bench_records", "--child", path, name],
+                                capture_output=True, text=True, check=True)
+        rss = float(result.stdout.split()[0])
+        print(f"{name:<22}{min(encode_times):>10.2f}{min(decode_times):>10.2f}{len(payload) / 1e6:>12.1f}{rss:>13.0f}")
+        os.remove(path)
+    assert [record.to_dict() for record in summary_records] == summaries
+
+
+if __name__ == "__main__":
+    main()
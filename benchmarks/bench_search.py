@@ -0,0 +1,84 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from src.search import SearchIndex
+
+WORDS = (
+    "stocks bonds yields treasury fed rates inflation earnings revenue guidance chip semiconductor oil opec "
+    "dollar euro yen bitcoin crypto bank lending mortgage housing jobs payrolls unemployment tariff trade china "
+    "apple nvidia microsoft tesla amazon alphabet meta rally selloff volatility dividend buyback merger "
+    "acquisition ipo layoffs consumer retail spending gdp recession growth outlook forecast analyst upgrade "
+    "downgrade quarter profit loss margin cloud ai energy gold copper shipping airline automaker"
+).split()
+SENTIMENTS = ["POSITIVE", "NEUTRAL", "NEGATIVE"]
+QUERIES = [
+    ("single term", "inflation", {}),
+    ("rare term", "copper", {}),
+    ("two terms", "fed inflation", {}),
+    ("phrase", '"treasury yields"', {}),
+    ("prefix", "semicond*", {}),
+    ("sentiment filter", "earnings", {"sentiments": ["NEGATIVE"]}),
+    ("date filter", "oil", {"date_from": "2025-06-01", "date_to": "2025-06-30"}),
+    ("narrow date", "inflation", {"date_from": "2025-06-03", "date_to": "2025-06-03"}),
+    ("newest 500 only", "inflation", {"candidates": 500}),
+]
+
+
+# zipf-distributed vocabulary: filler words at the head, domain words spread over ranks 20-400
+VOCAB = [f"w{i}" for i in range(30_000)]
+for rank, word in zip(range(20, 400, 4), WORDS):
+    VOCAB.insert(rank, word)
+CUM_WEIGHTS = list(accumulate(1.0 / (rank + 1) for rank in range(len(VOCAB))))
+
+
+def make_summary(i: int, rng: random.Random, n: int = 100_000) -> tuple[dict, str]:
+    # articles are indexed roughly in publication order, as the pipeline does
+    def text(n):
+        return " ".join(rng.choices(VOCAB, cum_weights=CUM_WEIGHTS, k=n))
+
+    summary = {
+        "title": text(10), "summary": text(80), "description": "",
+        "published_at": (datetime(2025, 1, 1) + timedelta(days=365 * i / n, hours=rng.uniform(-6, 0))
+                         ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "url": f"https://example.com/{i}", "source": rng.choice(["CNN", "Reuters", "Bloomberg"]),
+        "sentiment": rng.choice(SENTIMENTS), "sentiment_score": rng.random(),
+        "topics": [], "ticker_sentiment": [],
+    }
+    return summary, text(300)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search latency on a synthetic corpus")
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as workdir:
+        index = SearchIndex(os.path.join(workdir, "search.sqlite3"))
+        start = time.perf_counter()
+        for offset in range(0, args.articles, 5000):
+            batch = [make_summary(i, rng, args.articles) for i in range(offset, min(offset + 5000, args.articles))]
+            index.add_many([s for s, _ in batch], [c for _, c in batch])
+        index.optimize()
+        print(f"indexed {index.count()} articles in {time.perf_counter() - start:.1f}s")
+
+        for label, query, filters in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = index.search(query, limit=20, **filters)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            print(f"{label:<17} {query!r:<22} p50 {statistics.median(timings):7.2f} ms  "
+                  f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms  hits={len(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import time
+import random
+import argparse
+
+from src.sentiment import classify_sentiment_batch, load_sentiment_pipeline
+
+SENTENCES = [
+    "Stocks rallied after the Federal Reserve signalled it would hold rates steady.",
+    "Shares of the chipmaker fell 8% as guidance missed analyst expectations.",
+    "Treasury yields were little changed ahead of the jobs report.",
+    "The company raised its full-year revenue forecast on strong cloud demand.",
+    "Oil prices slid as OPEC+ agreed to boost output next quarter.",
+]
+
+
+def make_texts(n: int, seed: int = 0) -> list[str]:
+    # mix of short summaries and a few long ones that need chunking
+    rng = random.Random(seed)
+    lengths = [rng.choice([2, 4, 8, 16, 120]) for _ in range(n)]
+    return [" ".join(rng.choice(SENTENCES) for _ in range(k)) for k in lengths]
+
+
+def legacy(texts: list[str]):
+    sentiment_pipeline = load_sentiment_pipeline()
+    return [sentiment_pipeline(text[:512])[0] for text in texts]
+
+
+def main():
+    import torch
+
+    parser = argparse.ArgumentParser(description="FinBERT CPU throughput by batch size")
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    texts = make_texts(args.texts)
+    classify_sentiment_batch(texts[:8])  # warm-up
+
+    start = time.perf_counter()
+    legacy(texts)
+    elapsed = time.perf_counter() - start
+    print(f"legacy per-text pipeline (char-truncated)  {len(texts) / elapsed:8.1f} texts/sec")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        classify_sentiment_batch(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"classify_sentiment_batch batch_size={batch_size:<3}     {len(texts) / elapsed:8.1f} texts/sec")
+
+
+if __name__ == "__main__":
+    main()
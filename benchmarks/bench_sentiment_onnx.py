@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import psutil
+
+from benchmarks import tiny_finbert
+from benchmarks.bench_sentiment import make_texts
+
+BACKENDS = {
+    # name -> (SENTIMENT_BACKEND, exported model directory name)
+    "torch fp32": ("torch", None),
+    "onnx fp32": ("onnx", "onnx-fp32"),
+    "onnx int8": ("onnx", "onnx-int8"),
+}
+
+
+def child(args):
+    # one backend in a fresh process: RSS after loading, single-text latency, batched throughput, labels
+    import src.sentiment as sentiment
+
+    process = psutil.Process()
+    texts = make_texts(args.texts, seed=1)
+    if args.server:
+        sentiment.SENTIMENT_SERVER = args.server
+    start = time.perf_counter()
+    sentiment.classify_sentiment_batch(texts[:4])  # loads the model
+    loaded = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[:args.latency_texts]:
+        t0 = time.perf_counter()
+        sentiment.classify_sentiment(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    start = time.perf_counter()
+    results = sentiment.classify_sentiment_batch(texts)
+    throughput = len(texts) / (time.perf_counter() - start)
+    print(json.dumps({"rss_mb": process.memory_info().rss / 1e6, "load_s": loaded,
+                      "p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95)),
+                      "texts_per_s": throughput, "labels": [label for label, _ in results]}))
+
+
+def run_child(args, env: dict, server: str = "") -> dict:
+    command = [sys.executable, "-m", "benchmarks.bench_sentiment_onnx", "--child", "--texts", str(args.texts),
+               "--latency-texts", str(args.latency_texts)]
+    if server:
+        command += ["--server", server]
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FinBERT on PyTorch vs ONNX Runtime fp32/int8: latency, "
+                                                 "throughput, RSS, label agreement; shared-model server")
+    parser.add_argument("--model", help="FinBERT directory or hub name (default: random-weight BERT-base)")
+    parser.add_argument("--size", choices=sorted(tiny_finbert.SIZES), default="base")
+    parser.add_argument("--texts", type=int, default=256, help="evaluation set size")
+    parser.add_argument("--latency-texts", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--workers", type=int, default=3, help="app workers for the sharing comparison")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--server", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    import src.sentiment as sentiment
+
+    workdir = tempfile.mkdtemp(prefix="bench-sentiment-onnx-")
+    model = args.model or tiny_finbert.build(os.path.join(tempfile.gettempdir(), f"random-finbert-{args.size}"),
+                                             size=args.size)
+    for name, (_, directory) in BACKENDS.items():
+        if directory:
+            sentiment.export_onnx(model, os.path.join(workdir, directory), quantize=name.endswith("int8"))
+    size = {name: os.path.getsize(os.path.join(workdir, directory, sentiment.ONNX_FILE)) / 1e6
+            for name, (_, directory) in BACKENDS.items() if directory}
+
+    base_env = {**os.environ, "FINBERT_MODEL": model, "SENTIMENT_THREADS": str(args.threads), "TQDM_DISABLE": "1"}
+    env = {}
+    for name, (backend, directory) in BACKENDS.items():
+        env[name] = {**base_env, "SENTIMENT_BACKEND": backend,
+                     "FINBERT_ONNX_DIR": os.path.join(workdir, directory or "unused")}
+
+    print(f"model: {model}, {args.texts} evaluation texts, {args.threads} threads")
+    print(f"\n{'backend':<12}{'file MB':>9}{'load s':>8}{'RSS MB':>8}{'p50 ms':>8}{'p95 ms':>8}"
+          f"{'texts/s':>9}{'agree':>8}")
+    results = {}
+    for name in BACKENDS:
+        results[name] = run = run_child(args, env[name])
+        agree = np.mean([a == b for a, b in zip(run["labels"], results["torch fp32"]["labels"])])
+        print(f"{name:<12}{size.get(name, 0):>9.0f}{run['load_s']:>8.1f}{run['rss_mb']:>8.0f}{run['p50_ms']:>8.1f}"
+              f"{run['p95_ms']:>8.1f}{run['texts_per_s']:>9.1f}{agree:>8.1%}")
+
+    # sharing: N workers each holding int8 ONNX vs one server holding it and N workers calling it
+    port = 8700 + os.getpid() % 100
+    server = subprocess.Popen([sys.executable, "-m", "src.sentiment", "--serve", "--port", str(port)],
+                              env=env["onnx int8"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        while "Serving" not in server.stdout.readline():
+            if server.poll() is not None:
+                raise RuntimeError("sentiment server exited")
+        clients = [run_child(args, env["onnx int8"], server=f"http://127.0.0.1:{port}") for _ in range(args.workers)]
+        server_rss = psutil.Process(server.pid).memory_info().rss / 1e6
+    finally:
+        server.terminate()
+        server.wait()
+    alone = results["onnx int8"]["rss_mb"] * args.workers
+    shared = server_rss + sum(client["rss_mb"] for client in clients)
+    same = all(client["labels"] == results["onnx int8"]["labels"] for client in clients)
+    print(f"\n{args.workers} workers with their own int8 model: {alone:.0f} MB; sharing one server: "
+          f"{shared:.0f} MB (server {server_rss:.0f} MB), {clients[0]['texts_per_s']:.1f} texts/s per worker, "
+          f"same labels: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED = """
+from datetime import date
+from src.utils.cache import save_to_cache
+summaries = [{
+    "title": f"Story {i}", "summary": "**Market Summary:** flat", "description": "",
+    "published_at": "2025-01-01", "url": f"https://example.com/{i}", "source": "CNN",
+    "sentiment": "neutral", "sentiment_score": 0.9, "topics": [], "ticker_sentiment": [],
+} for i in range(40)]
+save_to_cache(key=f"processed_{date.today()}", data=summaries, cache_dir="data/summaries")
+"""
+
+RENDER = """
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=600).run()
+assert not at.exception, at.exception
+"""
+
+
+def run(code: str, cwd: str, *flags) -> tuple[float, str]:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *flags, "-c", code], cwd=cwd, env=env,
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(proc.stderr[-2000:])
+    return elapsed, proc.stderr
+
+
+def top_packages(importtime: str, n: int) -> list[tuple[int, str]]:
+    # "import time: self [us] | cumulative | imported package", summed per top-level package
+    totals = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    return sorted(((us, package) for package, us in totals.items()), reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and cache-hit page render from process start")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        run(SEED, workdir)
+
+        _, importtime = run("import src.pipeline", workdir, "-X", "importtime")
+        print("import src.pipeline, self time per package:")
+        for self_us, package in top_packages(importtime, args.top):
+            print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+        for label, code in [
+            ("import src.pipeline", "import src.pipeline"),
+            ("cache-hit get_processed_articles", "from src.pipeline import ArticleProcessor\n"
+                                                 "ArticleProcessor().get_processed_articles()"),
+            ("cache-hit app.py render (AppTest)", RENDER.format(app=os.path.join(ROOT, "app.py"))),
+        ]:
+            timings = sorted(run(code, workdir)[0] for _ in range(args.runs))
+            print(f"{label:<36} median {timings[len(timings) // 2]:6.2f}s from process start "
+                  f"(min {timings[0]:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
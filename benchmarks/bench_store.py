@@ -0,0 +1,108 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.store import ArticleStore, add_articles
+from benchmarks import cnn_fixtures
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "TSLA", "META", "GOOGL", "JPM", "XOM", "BA"] + [f"T{i:03d}" for i in range(490)]
+SOURCES = ["CNN", "Reuters", "Bloomberg", "Benzinga", "MarketWatch", "CNBC", "Yahoo Finance", "WSJ"]
+
+
+def make_summaries(n: int, days: int, seed: int = 0) -> list[dict]:
+    # weeks of history: skewed sources and tickers, mostly one or two tickers per article
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    summary = " ".join(rng.choice(cnn_fixtures.WORDS) for _ in range(40))
+    summaries = []
+    for i in range(n):
+        tickers = {TICKERS[min(int(rng.paretovariate(1.2)) - 1, len(TICKERS) - 1)] for _ in range(rng.randint(0, 2))}
+        summaries.append({
+            "title": f"Markets story {i}",
+            "summary": summary,
+            "published_at": (start + timedelta(seconds=rng.randrange(days * 86400))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "url": f"https://example.com/{i}",
+            "source": SOURCES[min(int(rng.expovariate(0.6)), len(SOURCES) - 1)],
+            "sentiment": rng.choice(["POSITIVE", "NEUTRAL", "NEGATIVE"]),
+            "sentiment_score": rng.random(),
+            "topics": [],
+            "ticker_sentiment": [{"ticker": t, "label": "POSITIVE", "confidence": 0.9, "sentence": ""} for t in tickers],
+        })
+    return summaries
+
+
+def list_filter(summaries: list, sentiments, sources, tickers, date_from: str, date_to: str) -> list:
+    # what app.py did: sort everything, then filter with a comprehension
+    ordered = sorted(summaries, key=lambda x: x.get("published_at", ""), reverse=True)
+    return [s for s in ordered if s["sentiment"] in sentiments
+            and (sources is None or s["source"] in sources)
+            and (tickers is None or any(t["ticker"] in tickers for t in s["ticker_sentiment"]))
+            and (not date_from or s["published_at"][:10] >= date_from)
+            and (not date_to or s["published_at"][:10] <= date_to)]
+
+
+QUERIES = {
+    "all sentiments": dict(sentiments=["POSITIVE", "NEUTRAL", "NEGATIVE"]),
+    "one sentiment": dict(sentiments=["NEGATIVE"]),
+    "sentiment+source": dict(sentiments=["POSITIVE"], sources=["Reuters", "WSJ"]),
+    "ticker": dict(sentiments=["POSITIVE", "NEUTRAL", "NEGATIVE"], tickers=["NVDA"]),
+    "rare ticker": dict(sentiments=["POSITIVE", "NEUTRAL", "NEGATIVE"], tickers=["T123"]),
+    "one week": dict(sentiments=["POSITIVE", "NEUTRAL"], date_from="2025-01-15", date_to="2025-01-21"),
+    "everything": dict(sentiments=["NEGATIVE"], sources=["CNN"], tickers=["AAPL", "MSFT"],
+                       date_from="2025-01-08", date_to="2025-02-01"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar article store: filter + page latency vs in-memory lists")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline-max", type=int, default=100_000, help="skip the list baseline above this size")
+    args = parser.parse_args()
+
+    for n in args.rows:
+        summaries = make_summaries(n, args.days)
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-store-"), "articles.arrow")
+        start = time.perf_counter()
+        add_articles(summaries, path)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        store = ArticleStore(path)
+        opened = time.perf_counter() - start
+        print(f"\n{n} rows: build {build:.1f}s, {os.path.getsize(path) / 1e6:.0f} MB, open + index {opened * 1000:.0f} ms")
+        print(f"  {'query':<18}{'matches':>9}{'page p50 ms':>13}{'p99 ms':>9}{'last page ms':>14}"
+              f"{'list ms':>10}")
+
+        for label, filters in QUERIES.items():
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                result = store.query(**filters, page=0)
+                times.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            store.query(**filters, page=result.pages - 1)
+            last = (time.perf_counter() - t0) * 1000
+
+            baseline = ""
+            if n <= args.baseline_max:
+                t0 = time.perf_counter()
+                expected = list_filter(summaries, filters["sentiments"], filters.get("sources"),
+                                       filters.get("tickers"), filters.get("date_from", ""), filters.get("date_to", ""))
+                baseline = f"{(time.perf_counter() - t0) * 1000:10.0f}"
+                assert len(expected) == result.total, (label, len(expected), result.total)
+            print(f"  {label:<18}{result.total:>9}{np.percentile(times, 50):>13.2f}{np.percentile(times, 99):>9.2f}"
+                  f"{last:>14.2f}{baseline}")
+        start = time.perf_counter()
+        add_articles(make_summaries(100, args.days, seed=n), path)
+        print(f"  adding a 100-article refresh: {time.perf_counter() - start:.2f}s")
+        del summaries, store
+
+
+if __name__ == "__main__":
+    main()
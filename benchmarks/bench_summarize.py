@@ -0,0 +1,47 @@
+import time
+import argparse
+from openai import OpenAI
+
+from src.summarizer import FinNewsSummarizer
+from benchmarks.fake_openai import FakeOpenAI
+
+
+def make_articles(n: int) -> list[dict]:
+    return [
+        {"title": f"Markets story {i}", "content": "Stocks rose as Treasury yields eased. " * 40}
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI summarization: sequential vs concurrent engine")
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05)
+    parser.add_argument("--server-error-rate", type=float, default=0.02)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--rpm", type=int, default=FinNewsSummarizer.REQUESTS_PER_MINUTE)
+    parser.add_argument("--tpm", type=int, default=FinNewsSummarizer.TOKENS_PER_MINUTE)
+    args = parser.parse_args()
+
+    articles = make_articles(args.articles)
+    with FakeOpenAI(latency=args.latency, rate_limit_rate=args.rate_limit_rate,
+                    server_error_rate=args.server_error_rate) as server:
+        client = OpenAI(api_key="sk-local", base_url=server.base_url)
+        baseline = None
+        for in_flight in args.in_flight:
+            summarizer = FinNewsSummarizer(openai_client=client, max_in_flight=in_flight,
+                                           requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+            server.max_in_flight = 0
+            start = time.perf_counter()
+            summaries = summarizer.summarize_openai(articles)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            ordered = all(f"Markets story {i}" in s for i, s in enumerate(summaries) if s)
+            done = sum(1 for s in summaries if s)
+            print(f"in_flight={in_flight:<3} {elapsed:7.2f}s  speedup={baseline / elapsed:5.1f}x  "
+                  f"done={done}/{len(articles)}  peak_in_flight={server.max_in_flight}  order_ok={ordered}")
+
+
+if __name__ == "__main__":
+    main()
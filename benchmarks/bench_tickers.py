@@ -0,0 +1,101 @@
+import re
+import time
+import random
+import string
+import argparse
+
+from src.tickers import TickerEntry, TickerExtractor, get_ticker_extractor, load_ticker_dictionary, split_sentences
+
+FILLER = ("shares rose fell after the company reported quarterly earnings guidance analysts said investors "
+          "market stocks index yields fed rates revenue outlook demand margin").split()
+
+# sentence -> tickers the bundled dictionary should find in it
+CASES = [
+    ("Apple rose 2% after earnings.", {"AAPL"}),
+    ("Microsoft's cloud revenue jumped.", {"MSFT"}),
+    ("Investors cheered Nvidia’s chips.", {"NVDA"}),
+    ("NVIDIA'S RALLY CONTINUED.", {"NVDA"}),
+    ("McDonald's raised prices.", {"MCD"}),
+    ("Shares of McDonald’s fell.", {"MCD"}),
+    ("Analysts like AAPL's buyback.", {"AAPL"}),
+    ("Target's stores reopened.", {"TGT"}),
+    ("Shares of Target fell.", {"TGT"}),
+    ("Target prices were cut.", set()),
+]
+
+
+def synthetic_dictionary(n: int, rng: random.Random) -> list[TickerEntry]:
+    entries = load_ticker_dictionary()
+    seen = {e.ticker for e in entries}
+    while len(entries) < n:
+        ticker = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 5)))
+        if ticker in seen:
+            continue
+        seen.add(ticker)
+        name = " ".join(w.capitalize() for w in rng.sample(["".join(rng.choices(string.ascii_lowercase, k=7))
+                                                             for _ in range(3)], rng.randint(1, 2)))
+        entries.append(TickerEntry(ticker, f"{name} Inc.", [name]))
+    return entries
+
+
+def synthetic_article(entries: list[TickerEntry], rng: random.Random, words: int = 600) -> str:
+    tokens = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.01:
+            tokens.append(rng.choice(entries).ticker)
+        elif roll < 0.02:
+            name = rng.choice(entries).name.replace(" Inc.", "")
+            tokens.append(name + "'s" if rng.random() < 0.3 else name)  # possessives: "Nvidia's chips"
+        else:
+            tokens.append(rng.choice(FILLER))
+        if rng.random() < 0.06:
+            tokens[-1] += "."
+    return " ".join(tokens)
+
+
+def naive(entries: list[TickerEntry], patterns: list, text: str) -> set:
+    # per-symbol regex loop the extractor replaces
+    return {entry.ticker for entry, pattern in zip(entries, patterns) if pattern.search(text)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ticker extraction throughput vs a per-symbol regex loop")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--naive-articles", type=int, default=20)
+    args = parser.parse_args()
+
+    extractor = get_ticker_extractor()
+    wrong = [(text, expected) for text, expected in CASES
+             if {m.ticker for m in extractor.extract(split_sentences(text))} != expected]
+    print(f"cases: {len(CASES) - len(wrong)}/{len(CASES)} correct")
+    for text, expected in wrong:
+        print(f"  MISMATCH {text!r}: expected {sorted(expected)}")
+
+    rng = random.Random(0)
+    for n in args.symbols:
+        entries = synthetic_dictionary(n, rng)
+        articles = [synthetic_article(entries, rng) for _ in range(args.articles)]
+
+        start = time.perf_counter()
+        extractor = TickerExtractor(entries)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = sum(len(extractor.extract(split_sentences(text))) for text in articles)
+        elapsed = time.perf_counter() - start
+        print(f"symbols={n:<6} build {build:6.2f}s  automaton {len(articles) / elapsed:8.1f} articles/sec  "
+              f"mentions={found}")
+
+        patterns = [re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, [e.ticker, *e.aliases]))) for e in entries]
+        sample = articles[:args.naive_articles]
+        start = time.perf_counter()
+        for text in sample:
+            naive(entries, patterns, text)
+        elapsed = time.perf_counter() - start
+        print(f"{'':<14} {'':<14} regex loop {len(sample) / elapsed:8.1f} articles/sec")
+
+
+if __name__ == "__main__":
+    main()
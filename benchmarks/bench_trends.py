@@ -0,0 +1,141 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from src.trends import DIMENSIONS, HOUR, WINDOWS, TrendStore, observations
+from benchmarks.bench_store import SOURCES, TICKERS
+from benchmarks.bench_records import TOPICS
+
+LABELS = ["POSITIVE", "NEUTRAL", "NEGATIVE"]
+
+
+def make_summaries(n: int, days: int, seed: int = 0) -> list[dict]:
+    # what the aggregates read, in arrival order: skewed sources and tickers, Alpha Vantage's ticker scores and
+    # topics (as normalized on ingestion) on some articles, the local tagger's labels on the rest
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    step = days * 86400 / n
+    summaries = []
+    for i in range(n):
+        tickers = {TICKERS[min(int(rng.paretovariate(1.2)) - 1, len(TICKERS) - 1)] for _ in range(rng.randint(0, 2))}
+        if rng.random() < 0.4:
+            ticker_sentiment = [{"ticker": t, "label": rng.choice(LABELS), "confidence": rng.random(), "sentence": ""}
+                                for t in tickers]
+            topics = [{"label": t, "score": rng.random()} for t in rng.sample(TOPICS, 2)]
+        else:
+            ticker_sentiment = [{"ticker": t, "label": rng.choice(LABELS), "confidence": rng.random(), "sentence": ""}
+                                for t in tickers]
+            topics = []
+        published = start + timedelta(seconds=i * step + rng.uniform(-600, 0))  # some arrive out of order
+        summaries.append({
+            "url": f"https://example.com/{seed}/{i}",
+            "published_at": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "source": SOURCES[min(int(rng.expovariate(0.6)), len(SOURCES) - 1)],
+            "sentiment": rng.choice(LABELS),
+            "sentiment_score": rng.random(),
+            "topics": topics,
+            "ticker_sentiment": ticker_sentiment,
+        })
+    return summaries
+
+
+def rescan(summaries: list, dimension: str, window: str, now: float) -> dict:
+    # the alternative: every page load walks the stored summaries for the window's count and mean; the window
+    # is the same hours as the aggregates' (the current one and the ones before it)
+    first = (int(now // HOUR) - WINDOWS[window] + 1) * HOUR
+    cutoff = datetime.fromtimestamp(first, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    end = datetime.fromtimestamp(first + WINDOWS[window] * HOUR, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    totals = {}
+    for summary in summaries:
+        if not cutoff <= summary["published_at"] < end:
+            continue
+        for found, name, value, _ in observations(summary):
+            if found == dimension:
+                count, total = totals.get(name, (0, 0.0))
+                totals[name] = count + 1, total + value
+    return {name: total / count for name, (count, total) in totals.items()}
+
+
+def timed(fn, repeat: int) -> tuple[float, float]:
+    # -> (p50, p99) milliseconds
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling sentiment aggregates: per-article update cost, window "
+                                                 "and chart queries, persistence, vs rescanning the summaries")
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--refresh", type=int, default=500, help="new articles per refresh in the load/add/save cycle")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summaries = make_summaries(args.articles, args.days)
+    print(f"{args.articles} articles over {args.days} days, generated in {time.perf_counter() - start:.0f}s")
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-trends-"), "trends.npz")
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp() + args.days * 86400 - 1  # the last article's hour
+
+    # updates, per slice of the stream: the cost per article stays flat as the history grows
+    trends = TrendStore(path, merge_on_save=False)
+    slices = 10
+    size = len(summaries) // slices
+    per_article = []
+    for i in range(slices):
+        start = time.perf_counter()
+        trends.add_many(summaries[i * size:(i + 1) * size])
+        per_article.append((time.perf_counter() - start) / size * 1e6)
+    held = sum(a[:len(trends)].nbytes for a in (trends.hours, trends.counts, trends.sums, trends.ewma_sums,
+                                                 trends.ewma_weights, trends.ewma_times))
+    series = {dimension: len(trends.names(dimension)) for dimension in DIMENSIONS}
+    print(f"\nupdate: {np.mean(per_article):.1f} us/article (first 10% {per_article[0]:.1f}, last 10% "
+          f"{per_article[-1]:.1f}); {series} series, {held / 1e6:.1f} MB of arrays")
+
+    # queries: one window table per dimension, and the app's chart of five tickers; the rescan once per row
+    print(f"\n{'query':<26}{'p50 ms':>9}{'p99 ms':>9}{'rescan ms':>11}")
+    for dimension in DIMENSIONS:
+        for window in WINDOWS:
+            p50, p99 = timed(lambda: trends.window(dimension, window, now=now), args.repeat)
+            rescan_ms = ""
+            if window == "1d":
+                stats = trends.window(dimension, window, now=now)
+                start = time.perf_counter()
+                expected = rescan(summaries, dimension, window, now)
+                rescan_ms = f"{(time.perf_counter() - start) * 1000:.0f}"
+                got = {name: mean for name, mean in zip(stats.names, stats.mean) if not np.isnan(mean)}
+                assert got.keys() == expected.keys() and all(abs(got[k] - expected[k]) < 1e-4 for k in got), dimension
+            print(f"{dimension + ' ' + window:<26}{p50:>9.2f}{p99:>9.2f}{rescan_ms:>11}")
+    weekly = trends.window("ticker", "7d", now=now)
+    top = [weekly.names[i] for i in np.argsort(-weekly.count)[:5]]
+    p50, p99 = timed(lambda: trends.hourly("ticker", top, now=now), args.repeat)
+    print(f"{'chart: 5 tickers x 168h':<26}{p50:>9.2f}{p99:>9.2f}")
+
+    # persistence, and one ingestion refresh: load, add the new articles, save
+    start = time.perf_counter()
+    trends.save()
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    TrendStore(path)
+    loaded = time.perf_counter() - start
+    extra = make_summaries(args.refresh, 1, seed=1)
+    start = time.perf_counter()
+    cycle = TrendStore(path)
+    cycle.add_many(extra)
+    cycle.save()
+    refreshed = time.perf_counter() - start
+    print(f"\nfile: {os.path.getsize(path) / 1e6:.2f} MB, save {saved * 1000:.0f} ms, load {loaded * 1000:.0f} ms; "
+          f"refresh cycle (load + {args.refresh} articles + save) {refreshed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
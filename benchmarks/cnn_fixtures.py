@@ -0,0 +1,130 @@
+import os
+import glob
+import random
+from typing import Dict
+
+# CNN-shaped pages: heavy <head> (inline JS, CSS, JSON-LD), nav, ads and related links around the
+# containers the scraper reads, plus the markup quirks that trip up extraction
+
+WORDS = ("stocks bonds yields investors earnings guidance rally selloff inflation treasury futures "
+         "nasdaq dow shares quarter revenue outlook analysts margins dividend buyback fed rates").split()
+
+
+def _sentence(rng: random.Random, n: int = 18) -> str:
+    words = [rng.choice(WORDS) for _ in range(n)]
+    return " ".join(words).capitalize() + "."
+
+
+def _head(rng: random.Random, kb: int) -> str:
+    script = "".join(f"window.__cfg_{i} = {{'key': '{rng.random()}', 'tpl': '<div class=\"article__content\">'}};\n"
+                     for i in range(kb * 10))
+    style = "".join(f".c{i} {{ margin: {i % 7}px; color: #{i % 999:03d}; }}\n" for i in range(kb * 10))
+    return (f"<head><meta charset=\"utf-8\"><title>CNN Business</title><script>{script}</script>"
+            f"<style>{style}</style><script type=\"application/ld+json\">{{\"@type\": \"NewsArticle\"}}</script></head>")
+
+
+def _nav(rng: random.Random) -> str:
+    links = "".join(f'<li><a href="/business/{w}">{w.title()}</a></li>' for w in rng.sample(WORDS, 10))
+    return f'<header class="header"><nav><ul class="nav">{links}</ul></nav></header>'
+
+
+def article_page(seed: int, paragraphs: int = 25, head_kb: int = 60) -> str:
+    rng = random.Random(seed)
+    body = []
+    for i in range(paragraphs):
+        text = _sentence(rng)
+        kind = i % 9
+        if kind == 1:
+            text = f'{text} <a href="/markets/{i}">Read&nbsp;more</a> about <em>{rng.choice(WORDS)}</em> &amp; more.'
+        elif kind == 2:
+            text = f"{text}<!-- ad slot {i} -->\n   {_sentence(rng, 6)}"
+        elif kind == 3:
+            text = f"{text} <span>{_sentence(rng, 5)}</span><script>track({i});</script> tail text."
+        body.append(f'<p class="paragraph inline-placeholder" data-component-name="paragraph">\n  {text}\n</p>')
+        if kind == 4:
+            body.append(f'<figure class="image"><img src="/i/{i}.jpg"><figcaption>Caption {i}</figcaption></figure>'
+                        "After the figure.")
+        if kind == 5:
+            body.append(f'<div class="ad-slot"><div class="ad"><ul><li>{_sentence(rng, 4)}</li></ul></div></div>')
+        if kind == 6:
+            body.append(f"<table><tr><td>{rng.random():.2f}</td></tr></table><h2>Subhead {i}</h2>")
+        if kind == 7:
+            body.append(f"<blockquote><template><p>hidden {i}</p></template>Quoted {_sentence(rng, 8)}</blockquote>")
+    related = "".join(f'<li><a href="/related/{i}">{_sentence(rng, 6)}</a></li>' for i in range(12))
+    return (
+        "<!DOCTYPE html><html lang=\"en\">" + _head(rng, head_kb) + "<body>" + _nav(rng)
+        + '<div class="layout__content"><div class="article__main">'
+        + '<h1 class="headline__text">' + _sentence(rng, 8) + "</h1>"
+        + '<div class="article__content-container"><div class="article__content" data-editable="content">'
+        + "\n".join(body) + "</div></div>"
+        + f'<div class="related"><ul>{related}</ul></div></div></div>'
+        + "<footer><p>Most stock quote data provided by BATS.</p></footer>"
+        + "<script>" + "var x = 1;\n" * 2000 + "</script></body></html>"
+    )
+
+
+def index_page(seed: int, lead_cards: int = 12, strips: int = 6, cards_per_strip: int = 8, head_kb: int = 120) -> str:
+    rng = random.Random(seed)
+
+    def card(i: int) -> str:
+        href = f"/2025/07/0{i % 9 + 1}/investing/story-{seed}-{i}/index.html"
+        return (f'<div class="card container__item container__item--type-media-image" data-uri="x/{i}">'
+                f'<a href="{href}" class="container__link"><div class="container__text">'
+                f'<div class="container__headline"><span class="container__headline-text" data-editable="headline">'
+                f"\n  {_sentence(rng, 7)}<!-- h --> &amp; co\n</span></div></div></a></div>")
+
+    lead = "".join(card(i) for i in range(lead_cards))
+    strip_html = "".join(
+        f'<div class="container container_vertical-strip"><div class="container__title">Strip {s}</div>'
+        f'<div class="container_vertical-strip__cards-wrapper">'
+        + "".join(card(100 * (s + 1) + i) for i in range(cards_per_strip)) + "</div></div>"
+        for s in range(strips)
+    )
+    return (
+        "<!DOCTYPE html><html lang=\"en\">" + _head(rng, head_kb) + "<body>" + _nav(rng)
+        + f'<section><div class="container container_lead-plus-headlines-with-images">{lead}</div></section>'
+        + f"<section>{strip_html}</section>"
+        + '<div class="card container__item"><a href="/orphan"><span class="container__headline-text">Orphan</span></a></div>'
+        + "</body></html>"
+    )
+
+
+# markup quirks the fast path must handle exactly like the BeautifulSoup extraction
+EDGE_CASES: Dict[str, str] = {
+    "empty": "",
+    "no_container": "<html><body><p>First <b>bold</b> para.</p><p>  </p><p>Second<script>x</script> para</p></body></html>",
+    "decoy_in_script": '<html><head><script>var t = "<div class=\'article__content\'>fake</div>";</script></head>'
+                       '<body><div class="article__content"><p>Real text.</p></div></body></html>',
+    "decoy_in_comment": '<html><body><!-- <div class="article__content">old</div> -->'
+                        '<div class="article__content"><p>Kept.</p></div></body></html>',
+    "data_class": '<html><body><div data-class="article__content"><p>Not this.</p></div>'
+                  '<div class="x article__content y"><p>This one.</p></div></body></html>',
+    "unquoted_upper": "<HTML><BODY><DIV CLASS=article__content><P>Upper case</P><UL><LI>gone</LI></UL>tail</DIV></BODY></HTML>",
+    "text_mention": '<html><body><p>see article__content docs</p><div class="article__content">Body</div></body></html>',
+    "nested_divs": '<html><body><div class="article__content"><div><div>deep</div> one</div> two</div>'
+                   '<div>outside</div></body></html>',
+    "ruby_template": '<html><body><div class="article__content"><ruby>Kan<rt>k</rt><rp>(</rp></ruby>'
+                     "<template><p>tpl</p></template> visible</div></body></html>",
+    "entities": '<html><body><div class="article__content">A&nbsp;B &lt;tag&gt; &eacute; &#8217;s\r\nnext</div></body></html>',
+    "stray_close": '<html><body><div class="article__content"><p>before</p></div></div><p>after</p></body></html>',
+    "close_in_attribute": '<html><body><div class="article__content"><a title="x</div>y">A</a><p>B</p></div>'
+                          '</body></html>',
+    "open_in_attribute": "<html><body><div class=\"article__content\"><img alt='<div>'><p>C</p></div><p>D</p>"
+                         "</body></html>",
+}
+
+
+def generate(n_articles: int = 40, n_index: int = 3) -> Dict[str, str]:
+    pages = {f"index_{i}.html": index_page(i) for i in range(n_index)}
+    pages.update({f"article_{i}.html": article_page(i) for i in range(n_articles)})
+    pages.update({f"edge_{name}.html": html for name, html in EDGE_CASES.items()})
+    return pages
+
+
+def load(directory: str) -> Dict[str, str]:
+    # saved pages (e.g. Browserless /content responses); names containing "index" are parsed as index pages
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
@@ -0,0 +1,122 @@
+import json
+import time
+import zlib
+import random
+import threading
+from typing import Callable, List
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INDEX_PATH = "/business/investing"
+
+
+def index_html(n_articles: int) -> str:
+    cards = "".join(
+        f'<div class="card container__item"><a href="/2025/01/01/investing/story-{i}/index.html">'
+        f'<span class="container__headline-text">Markets story {i}</span></a></div>'
+        for i in range(n_articles)
+    )
+    return (
+        "<html><body>"
+        f'<div class="container container_lead-plus-headlines-with-images">{cards}</div>'
+        "</body></html>"
+    )
+
+
+def article_html(path: str, n_paragraphs: int = 20) -> str:
+    paragraphs = "".join(
+        f"<p class=\"paragraph\">Stocks moved on {path} paragraph {i}. "
+        "The S&P 500 rose 0.4% while Treasury yields eased after the Fed meeting.</p>"
+        for i in range(n_paragraphs)
+    )
+    return (
+        "<html><head><script>var tracking = 1;</script></head><body>"
+        f'<div class="article__content">{paragraphs}<figure>chart</figure></div>'
+        "</body></html>"
+    )
+
+
+# stands in for Browserless /content: POST {"url": ...} -> rendered HTML after `latency` seconds;
+# article pages come from `pages` by url, then `render_article(path)`, then `fixtures` replayed by path hash
+class FakeBrowserless:
+    def __init__(self, n_articles: int = 40, latency: float = 0.5, error_rate: float = 0.0, pages: dict = None,
+                 index: str = None, fixtures: List[str] = None, render_article: Callable[[str], str] = None):
+        self.n_articles = n_articles
+        self.latency = latency
+        self.error_rate = error_rate
+        self.pages = pages or {}
+        self.index = index
+        self.fixtures = fixtures or []
+        self.render_article = render_article
+        self.requests = 0
+        self.head_requests = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/content?token=local"
+
+    @property
+    def index_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{INDEX_PATH}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def render(self, url: str) -> str:
+        if url in self.pages:
+            return self.pages[url]
+        path = urlparse(url).path
+        if path.rstrip("/") == INDEX_PATH:
+            return self.index or index_html(self.n_articles)
+        if self.render_article:
+            return self.render_article(path)
+        if self.fixtures:
+            return self.fixtures[zlib.crc32(path.encode()) % len(self.fixtures)]
+        return article_html(path)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_HEAD(self):
+                # the CNN origin itself, for conditional checks of the index page
+                fake.head_requests += 1
+                etag = f'"{zlib.crc32(fake.render(INDEX_PATH).encode()):08x}"'
+                self.send_response(304 if self.headers.get("If-None-Match") == etag else 200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                fake.requests += 1
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(fake.latency)
+                if random.random() < fake.error_rate:
+                    return self._reply(503, "unavailable")
+                url = json.loads(body or b"{}").get("url", "")
+                self._reply(200, fake.render(url))
+
+            def _reply(self, status: int, text: str):
+                data = text.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
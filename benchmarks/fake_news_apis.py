@@ -0,0 +1,127 @@
+import json
+import time
+import zlib
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def newsapi_payload(n_articles: int, prefix: str = "newsapi") -> dict:
+    return {
+        "status": "ok",
+        "totalResults": n_articles,
+        "articles": [
+            {
+                "source": {"id": None, "name": "Reuters"},
+                "title": f"Headline {i} from {prefix}",
+                "description": f"Stocks moved on story {i}.",
+                "url": f"https://example.com/{prefix}/{i}",
+                "publishedAt": "2025-07-01T12:30:00Z",
+                "content": f"Stocks moved on story {i}. The S&P 500 rose 0.4%... [+1200 chars]",
+            }
+            for i in range(n_articles)
+        ],
+    }
+
+
+def alphavantage_payload(n_articles: int, prefix: str = "alpha") -> dict:
+    return {
+        "items": str(n_articles),
+        "feed": [
+            {
+                "title": f"Headline {i} from {prefix}",
+                "url": f"https://example.com/{prefix}/{i}",
+                "time_published": "20250701T123000",
+                "summary": f"Apple shares rose on story {i}.",
+                "source_domain": "www.benzinga.com",
+                "topics": [{"topic": "Technology", "relevance_score": "0.9"}],
+                "overall_sentiment_score": 0.21,
+                "overall_sentiment_label": "Somewhat-Bullish",
+                "ticker_sentiment": [{"ticker": "AAPL", "relevance_score": "0.8",
+                                      "ticker_sentiment_score": "0.3", "ticker_sentiment_label": "Bullish"}],
+            }
+            for i in range(n_articles)
+        ],
+    }
+
+
+# stands in for NewsAPI top-headlines or Alpha Vantage NEWS_SENTIMENT: GET -> JSON after `latency` seconds;
+# setting `feed` serves those items instead, with an ETag and Alpha Vantage's time_from filter
+class FakeNewsAPI:
+    def __init__(self, kind: str = "newsapi", n_articles: int = 50, latency: float = 0.5, status: int = 200):
+        self.kind = kind
+        self.n_articles = n_articles
+        self.latency = latency
+        self.status = status
+        self.requests = 0
+        self.not_modified = 0
+        self.items_served = 0
+        self.feed = None
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        path = "/v2/top-headlines" if self.kind == "newsapi" else "/query"
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def payload(self, query: dict) -> dict:
+        if self.feed is not None:
+            if self.kind == "newsapi":
+                return {"status": "ok", "totalResults": len(self.feed), "articles": self.feed}
+            time_from = query.get("time_from", [""])[0]
+            return {"items": str(len(self.feed)),
+                    "feed": [item for item in self.feed if item["time_published"][:13] >= time_from]}
+        if self.kind == "newsapi":
+            page_size = int(query.get("pageSize", [self.n_articles])[0])
+            return newsapi_payload(min(self.n_articles, page_size))
+        return alphavantage_payload(self.n_articles)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake.requests += 1
+                time.sleep(fake.latency)
+                if fake.status != 200:
+                    return self._reply(fake.status, {"status": "error", "message": "unavailable"})
+                body = fake.payload(parse_qs(urlparse(self.path).query))
+                if fake.feed is None:
+                    return self._reply(200, body)
+                etag = f'"{zlib.crc32(json.dumps(body).encode()):08x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    fake.not_modified += 1
+                    return self._reply(304, None, etag)
+                fake.items_served += len(body.get("articles") or body.get("feed") or [])
+                self._reply(200, body, etag)
+
+            def _reply(self, status: int, body: dict, etag: str = ""):
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,194 @@
+import json
+import time
+import random
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def completion_body(model: str, content: str, prompt_tokens: int, completion_tokens: int) -> dict:
+    return {
+        "id": f"chatcmpl-{random.getrandbits(48):x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def fake_summary(messages: list[dict]) -> str:
+    user = next((m["content"] for m in messages if m["role"] == "user"), "")
+    title = user.split("### News Title:")[-1].split("###")[0].strip()
+    return f"**Market Summary:** {title}\n\n**Sentiment:** Neutral"
+
+
+def prompt_tokens(payload: dict) -> int:
+    return sum(len(m.get("content", "")) for m in payload.get("messages", [])) // 4
+
+
+# OpenAI-compatible /v1/chat/completions with configurable latency and 429/500 error rates;
+# prompt_latency adds seconds per 1k prompt tokens, as prefill time grows with the prompt.
+# Also /v1/files and /v1/batches: a batch completes batch_latency seconds after it is created, with the
+# same error rates applied per request (failures go to the error file)
+class FakeOpenAI:
+    def __init__(self, latency: float = 0.3, jitter: float = 0.1, rate_limit_rate: float = 0.0,
+                 server_error_rate: float = 0.0, prompt_latency: float = 0.0, batch_latency: float = 1.0):
+        self.latency = latency
+        self.batch_latency = batch_latency
+        self.files = {}
+        self.batches = {}
+        self.batch_requests = 0
+        self.batch_api_calls = 0  # files and batches endpoints
+        self.prompt_latency = prompt_latency
+        self.prompt_tokens = 0
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path: str, payload: dict) -> tuple[int, dict]:
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            return 429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+        if roll < self.rate_limit_rate + self.server_error_rate:
+            return 500, {"error": {"message": "The server had an error", "type": "server_error"}}
+        messages = payload.get("messages", [])
+        content = fake_summary(messages)
+        return 200, completion_body(payload.get("model", ""), content, prompt_tokens(payload), len(content) // 4)
+
+    def upload(self, filename: str, purpose: str, data: bytes) -> dict:
+        file = {"id": f"file-{random.getrandbits(48):x}", "object": "file", "bytes": len(data),
+                "created_at": int(time.time()), "filename": filename, "purpose": purpose, "status": "processed"}
+        with self._lock:
+            self.files[file["id"]] = (file, data)
+        return file
+
+    def create_batch(self, payload: dict) -> tuple[int, dict]:
+        if payload.get("input_file_id") not in self.files:
+            return 404, {"error": {"message": "No such file", "type": "invalid_request_error"}}
+        batch = {"id": f"batch_{random.getrandbits(48):x}", "object": "batch", "endpoint": payload.get("endpoint"),
+                 "input_file_id": payload["input_file_id"], "completion_window": payload.get("completion_window"),
+                 "status": "in_progress", "created_at": int(time.time()), "output_file_id": None,
+                 "error_file_id": None, "metadata": payload.get("metadata"),
+                 "request_counts": {"total": len(self.files[payload["input_file_id"]][1].splitlines()),
+                                    "completed": 0, "failed": 0}}
+        with self._lock:
+            self.batches[batch["id"]] = batch
+        timer = threading.Timer(self.batch_latency, self._run_batch, args=(batch["id"],))
+        timer.daemon = True
+        timer.start()
+        return 200, batch
+
+    def _run_batch(self, batch_id: str):
+        batch = self.batches[batch_id]
+        output, errors = [], []
+        for line in self.files[batch["input_file_id"]][1].splitlines():
+            request = json.loads(line)
+            status, body = self.respond(request["url"], request["body"])
+            result = {"id": f"batch_req_{random.getrandbits(48):x}", "custom_id": request["custom_id"],
+                      "response": {"status_code": status, "request_id": "", "body": body}, "error": None}
+            (output if status == 200 else errors).append(json.dumps(result))
+        with self._lock:
+            self.batch_requests += len(output) + len(errors)
+            self.prompt_tokens += sum(prompt_tokens(json.loads(line)["body"])
+                                      for line in self.files[batch["input_file_id"]][1].splitlines())
+        if output:
+            batch["output_file_id"] = self.upload("output.jsonl", "batch_output", "\n".join(output).encode())["id"]
+        if errors:
+            batch["error_file_id"] = self.upload("errors.jsonl", "batch_output", "\n".join(errors).encode())["id"]
+        batch["request_counts"] = {"total": len(output) + len(errors), "completed": len(output),
+                                   "failed": len(errors)}
+        batch["status"] = "completed"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.batch_api_calls += 1
+                parts = self.path.strip("/").split("/")  # v1/batches/{id} or v1/files/{id}/content
+                if parts[1:2] == ["batches"] and parts[2] in fake.batches:
+                    return self._reply(200, fake.batches[parts[2]])
+                if parts[1:2] == ["files"] and parts[2] in fake.files and parts[3:] == ["content"]:
+                    data = fake.files[parts[2]][1]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    return self.wfile.write(data)
+                self._reply(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.endswith(("/files", "/batches")):
+                    with fake._lock:
+                        fake.batch_api_calls += 1
+                if self.path.endswith("/files"):
+                    form = BytesParser().parsebytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body)
+                    fields = {part.get_param("name", header="content-disposition"): part for part in form.get_payload()}
+                    file = fields["file"]
+                    return self._reply(200, fake.upload(file.get_filename() or "upload.jsonl",
+                                                        fields["purpose"].get_payload(decode=True).decode(),
+                                                        file.get_payload(decode=True)))
+                payload = json.loads(body or b"{}")
+                if self.path.endswith("/batches"):
+                    return self._reply(*fake.create_batch(payload))
+                tokens = prompt_tokens(payload)
+                with fake._lock:
+                    fake.requests += 1
+                    fake.prompt_tokens += tokens
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    time.sleep(max(0.0, fake.latency + random.uniform(-fake.jitter, fake.jitter))
+                               + fake.prompt_latency * tokens / 1000)
+                    status, data = fake.respond(self.path, payload)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+                self._reply(status, data)
+
+            def _reply(self, status: int, data: dict):
+                raw = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,39 @@
+import os
+
+from benchmarks import cnn_fixtures
+
+# a 2-layer, 32-wide BERT with FinBERT's labels and random weights: same tokenize/chunk/batch/forward code
+# path as the real model at a fraction of the cost, and it never needs the Hugging Face hub.
+# size="base" builds FinBERT's own shape (12 layers, 768 wide) for timing and memory work
+SIZES = {
+    "tiny": dict(hidden_size=32, num_hidden_layers=2, num_attention_heads=2, intermediate_size=64),
+    "base": dict(hidden_size=768, num_hidden_layers=12, num_attention_heads=12, intermediate_size=3072),
+}
+
+EXTRA_WORDS = ("market summary sentiment neutral positive negative story markets the a of and on as rose fell "
+               "apple nvidia microsoft shares stock s p 500 read more about headline").split()
+
+
+def build(path: str, seed: int = 0, size: str = "tiny") -> str:
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    if os.path.exists(os.path.join(path, "config.json")):
+        return path
+    os.makedirs(path, exist_ok=True)
+
+    words = sorted(set(cnn_fixtures.WORDS) | set(EXTRA_WORDS))
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *list("0123456789.,:*%$&'-"), *words]
+    vocab_file = os.path.join(path, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab) + "\n")
+    BertTokenizerFast(vocab_file=vocab_file, do_lower_case=True).save_pretrained(path)
+
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=len(vocab), **SIZES[size], max_position_embeddings=512, num_labels=3,
+        id2label={0: "positive", 1: "negative", 2: "neutral"}, label2id={"positive": 0, "negative": 1, "neutral": 2},
+    )
+    BertForSequenceClassification(config).eval().save_pretrained(path)
+    return path
+
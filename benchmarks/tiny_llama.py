@@ -0,0 +1,45 @@
+import os
+
+from benchmarks import cnn_fixtures
+from benchmarks.tiny_finbert import EXTRA_WORDS
+
+# a 2-layer, 64-wide Llama with random weights and a word-level tokenizer: the same prefill/decode/KV-cache
+# code path as the real local summarizer, small enough to benchmark on CPU without the Hugging Face hub
+
+SPECIAL_TOKENS = ["<pad>", "<s>", "</s>", "<unk>"]
+PROMPT_WORDS = ("you are financial news analyst assistant given article your task is to extract structured "
+                "with following sections valuation metrics macro fx key drivers tickers be concise accurate "
+                "avoid repeating entire reply in markdown format do not add information summarise only written "
+                "title system user assistant").split()
+
+
+def build(path: str, seed: int = 0, eos_bias: float = 1.5) -> str:
+    # eos_bias scales the </s> row of the output layer so generations end at varied lengths, like real summaries
+    import torch
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+    if os.path.exists(os.path.join(path, "config.json")):
+        return path
+    os.makedirs(path, exist_ok=True)
+
+    words = sorted(set(cnn_fixtures.WORDS) | set(EXTRA_WORDS) | set(PROMPT_WORDS))
+    vocab = {token: i for i, token in enumerate(SPECIAL_TOKENS + list("0123456789.,:;*%$&'#|<>-!?()\"") + words)}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.normalizer = normalizers.Lowercase()
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(single="<s> $A", special_tokens=[("<s>", vocab["<s>"])])
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, bos_token="<s>", eos_token="</s>", pad_token="<pad>",
+                            unk_token="<unk>").save_pretrained(path)
+
+    torch.manual_seed(seed)
+    config = LlamaConfig(
+        vocab_size=len(vocab), hidden_size=64, intermediate_size=128, num_hidden_layers=2, num_attention_heads=4,
+        num_key_value_heads=2, max_position_embeddings=4096, bos_token_id=vocab["<s>"], eos_token_id=vocab["</s>"],
+        pad_token_id=vocab["<pad>"], tie_word_embeddings=False,
+    )
+    model = LlamaForCausalLM(config).eval()
+    with torch.no_grad():
+        model.lm_head.weight[vocab["</s>"]] *= eos_bias
+    model.save_pretrained(path)
+    return path
@@ -0,0 +1,173 @@
+import time
+import threading
+from typing import Dict, Iterator, List, Optional
+
+import streamlit as st
+
+from src.api_news import BaseNewsAPIClient, NewsAPIClient, AlphaVantageAPIClient, INCREMENTAL_FETCH
+from src.cnn import fetch_cnn_articles, iter_cnn_articles
+from src.schemas import ArticleDict, TickerSentimentDict, TopicDict
+from src.utils import metrics
+from src.utils.stream import merge_stage
+
+SOURCE_TIMEOUT = 120  # seconds before a slow source is abandoned for this run
+# Alpha Vantage's ticker sentiment labels -> FinBERT's
+ALPHA_VANTAGE_LABELS = {"bullish": "POSITIVE", "somewhat-bullish": "POSITIVE", "neutral": "NEUTRAL",
+                        "somewhat-bearish": "NEGATIVE", "bearish": "NEGATIVE"}
+
+
+def _float(value) -> float:
+    # Alpha Vantage sends its scores as strings
+    try:
+        return float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def normalize_topic(topic: dict) -> TopicDict:
+    # Alpha Vantage: {"topic": "Technology", "relevance_score": "0.9"}
+    if "topic" not in topic:
+        return topic
+    return {"label": topic.get("topic") or "", "score": _float(topic.get("relevance_score"))}
+
+def normalize_ticker_sentiment(entry: dict) -> TickerSentimentDict:
+    # Alpha Vantage: {"ticker", "relevance_score", "ticker_sentiment_score": "-0.31", "ticker_sentiment_label":
+    # "Somewhat-Bearish"}; the label carries the sign and the confidence is the score's magnitude
+    if "ticker_sentiment_label" not in entry and "ticker_sentiment_score" not in entry:
+        return entry
+    label = (entry.get("ticker_sentiment_label") or "").lower()
+    return {"ticker": entry.get("ticker") or "", "label": ALPHA_VANTAGE_LABELS.get(label, "NEUTRAL"),
+            "confidence": abs(_float(entry.get("ticker_sentiment_score"))), "sentence": ""}
+
+
+def normalize_article(item: dict, source: str = "") -> ArticleDict:
+    # every source ends up with the full ArticleDict shape; missing fields get empty defaults
+    return {
+        "title": (item.get("title") or "").strip(),
+        "description": item.get("description") or "",
+        "content": item.get("content") or item.get("description") or "",
+        "published_at": item.get("published_at") or "",
+        "url": item.get("url") or "",
+        "source": item.get("source") or source,
+        "overall_sentiment_label": item.get("overall_sentiment_label") or "",
+        "overall_sentiment_score": item.get("overall_sentiment_score") or 0.0,
+        "topics": [normalize_topic(topic) for topic in item.get("topics") or []],
+        "ticker_sentiment": [normalize_ticker_sentiment(entry) for entry in item.get("ticker_sentiment") or []],
+    }
+
+
+class CNNNewsClient(BaseNewsAPIClient):
+    # the CNN scraper behind the client interface; streams articles as their bodies arrive
+    NAME = "CNN"
+
+    def __init__(self, browserless_url: str = None, use_cache: bool = True, incremental: bool = INCREMENTAL_FETCH,
+                 probe_url: str = None):
+        super().__init__(api_key=None, base_url=browserless_url, use_cache=use_cache, incremental=incremental)
+        self.browserless_url = browserless_url
+        self.probe_url = probe_url
+
+    def fetch_latest_articles(self) -> List[ArticleDict]:
+        state = self.load_state()
+        articles = fetch_cnn_articles(self.browserless_url, use_cache=self.use_cache, state=state,
+                                      probe_url=self.probe_url)
+        self.save_state(state)
+        return [normalize_article(article, self.NAME) for article in articles]
+
+    def iter_latest_articles(self) -> Iterator[ArticleDict]:
+        state = self.load_state()
+        for article in iter_cnn_articles(self.browserless_url, use_cache=self.use_cache, state=state,
+                                         probe_url=self.probe_url):
+            yield normalize_article(article, self.NAME)
+        self.save_state(state)
+
+
+class SourceReport:
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "running"  # running, ok, failed, timeout
+        self.articles = 0
+        self.latency = 0.0  # seconds until the source finished, failed or was abandoned
+        self.first_article: Optional[float] = None  # seconds until its first article
+        self.error = ""
+
+    def __repr__(self) -> str:
+        first = f", first article {self.first_article:.2f}s" if self.first_article is not None else ""
+        error = f": {self.error}" if self.error else ""
+        return f"{self.name}: {self.status}, {self.articles} articles in {self.latency:.2f}s{first}{error}"
+
+
+class NewsAggregator(BaseNewsAPIClient):
+    # fans out to every source at once, so a run takes about as long as the slowest source;
+    # a failing or timed-out source only loses its own articles
+    NAME = "aggregator"
+
+    def __init__(self, sources: List[BaseNewsAPIClient], timeout: float = SOURCE_TIMEOUT,
+                 source_kwargs: Dict[str, dict] = None):
+        super().__init__(api_key=None)
+        self.sources = sources
+        self.timeout = timeout
+        self.source_kwargs = source_kwargs or {}
+        self.reports: Dict[str, SourceReport] = {}
+        self._lock = threading.Lock()
+
+    def fetch_latest_articles(self) -> List[ArticleDict]:
+        return list(self.iter_latest_articles())
+
+    def iter_latest_articles(self) -> Iterator[ArticleDict]:
+        # articles in arrival order, de-duplicated by url across sources
+        self.reports = {source.name: SourceReport(source.name) for source in self.sources}
+        start = time.perf_counter()
+        seen = set()
+        streams = [self._drain(source, start) for source in self.sources]
+        for article in merge_stage(streams, timeout=self.timeout, name="sources"):
+            if article["url"] and article["url"] in seen:
+                continue
+            seen.add(article["url"])
+            yield article
+
+        with self._lock:
+            for report in self.reports.values():
+                if report.status == "running":
+                    report.status = "timeout"
+                    report.latency = time.perf_counter() - start
+        for report in self.reports.values():
+            metrics.inc("source_runs_total", source=report.name, status=report.status)
+            metrics.inc("source_articles_total", report.articles, source=report.name)
+            metrics.observe("source_seconds", report.latency, source=report.name)
+            print(f"[INFO] {report}")
+
+    def _drain(self, source: BaseNewsAPIClient, start: float) -> Iterator[ArticleDict]:
+        report = self.reports[source.name]
+        try:
+            for item in source.iter_latest_articles(**self.source_kwargs.get(source.name, {})):
+                article = normalize_article(item, source.name)
+                with self._lock:
+                    if report.status != "running":
+                        return
+                    report.articles += 1
+                    if report.first_article is None:
+                        report.first_article = time.perf_counter() - start
+                yield article
+            status, error = ("failed", source.last_error) if source.last_error else ("ok", "")
+        except Exception as e:
+            print(f"[ERROR] Source {source.name} failed: {e}")
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        with self._lock:
+            if report.status == "running":
+                report.status, report.error = status, error
+                report.latency = time.perf_counter() - start
+
+
+def _secret(name: str) -> Optional[str]:
+    try:
+        return st.secrets.get(name)
+    except Exception:
+        return None
+
+def default_sources(use_cache: bool = True) -> List[BaseNewsAPIClient]:
+    # CNN always; the APIs only when their keys are configured in secrets.toml
+    sources: List[BaseNewsAPIClient] = [CNNNewsClient(use_cache=use_cache)]
+    if _secret("NEWSAPI_API_KEY"):
+        sources.append(NewsAPIClient(_secret("NEWSAPI_API_KEY"), use_cache=use_cache))
+    if _secret("ALPHAVANTAGE_API_KEY"):
+        sources.append(AlphaVantageAPIClient(_secret("ALPHAVANTAGE_API_KEY"), use_cache=use_cache))
+    return sources
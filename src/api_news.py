@@ -1,32 +1,97 @@
+import os
 import requests
-from typing import List
+from typing import List, Iterator, Optional
 from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
 
+from src.utils import metrics
 from src.utils.cache import save_to_cache, load_from_cache
+from src.utils.http import make_session, request_with_retry, conditional_headers, update_validators
 from src.schemas import ArticleDict
 
+SOURCE_STATE_DIR = os.getenv("SOURCE_STATE_DIR", "data/cache")
+INCREMENTAL_FETCH = os.getenv("INCREMENTAL_FETCH", "1") == "1"  # 0 refetches everything on every refresh
+MAX_STORED_ARTICLES = 500  # per source, newest first
+
+
+def merge_articles(stored: List[ArticleDict], fresh: List[ArticleDict], cutoff: str = "") -> List[ArticleDict]:
+    # fresh copies win over stored ones with the same url; newest first, nothing published before `cutoff`
+    # (compared as strings, so it must be in the source's own published_at format)
+    by_url = {article["url"]: article for article in stored}
+    by_url.update((article["url"], article) for article in fresh)
+    merged = [article for article in by_url.values() if article.get("published_at", "") >= cutoff]
+    merged.sort(key=lambda article: article.get("published_at", ""), reverse=True)
+    return merged[:MAX_STORED_ARTICLES]
+
 
 class BaseNewsAPIClient(ABC):
-    def __init__(self, api_key: str):
+    NAME = "base"
+    TIMEOUT = 15  # seconds per HTTP request
+    RETRIES = 2
+
+    def __init__(self, api_key: str, base_url: str = None, session: requests.Session = None,
+                 use_cache: bool = True, incremental: bool = INCREMENTAL_FETCH):
         self.api_key = api_key
+        self.base_url = base_url or getattr(self, "BASE_URL", "")
+        self.session = session or make_session()
+        self.use_cache = use_cache
+        self.incremental = incremental
+        self.last_error = ""  # why the last fetch came back empty, if it failed
+
+    @property
+    def name(self) -> str:
+        return self.NAME
 
     @abstractmethod
     def fetch_latest_articles(self, **kwargs) -> List[ArticleDict]:
         pass
 
+    def iter_latest_articles(self, **kwargs) -> Iterator[ArticleDict]:
+        # sources that can produce articles one by one override this
+        yield from self.fetch_latest_articles(**kwargs)
+
+    def load_state(self, key: str = "") -> Optional[dict]:
+        # what the last fetch saw (high-water mark, HTTP validators, articles); None when not incremental
+        if not self.incremental:
+            return None
+        return load_from_cache(f"source_state_{self.name}_{key}", cache_dir=SOURCE_STATE_DIR, ttl=None) or {}
+
+    def save_state(self, state: Optional[dict], key: str = ""):
+        if state is not None:
+            save_to_cache(f"source_state_{self.name}_{key}", state, cache_dir=SOURCE_STATE_DIR, ttl=None)
+
+    def _get_json(self, params: dict, headers: dict = None, validators: dict = None) -> Optional[dict]:
+        # with `validators` the request is conditional and they are updated in place; None means not modified
+        if validators is not None:
+            headers = {**(headers or {}), **conditional_headers(validators)}
+        metrics.inc("api_calls_total", source=self.name)
+        with metrics.span("api_request", source=self.name):
+            response = request_with_retry(self.session, "GET", self.base_url, retries=self.RETRIES,
+                                          params=params, headers=headers, timeout=self.TIMEOUT)
+            if validators is not None:
+                update_validators(validators, response)
+                if response.status_code == 304:
+                    metrics.inc("source_not_modified_total", source=self.name)
+                    return None
+            return response.json()
+
 
 class NewsAPIClient(BaseNewsAPIClient):
+    NAME = "newsapi"
     BASE_URL = "https://newsapi.org/v2/top-headlines"
 
     def fetch_latest_articles(self, country: str="us", category: str = None, page_size: int = 50) -> List[ArticleDict]:
         cache_key = f"newsapi_{country}_{category}_{page_size}"
-        cached = load_from_cache(cache_key)
+        cached = load_from_cache(cache_key) if self.use_cache else None
         if cached:
             print("[CACHE] Using cached NewsAPI data")
             return cached
-        
+
+        # top-headlines takes no time filter, so the saving here comes from conditional requests
+        state_key = f"{country}_{category}_{page_size}"
+        state = self.load_state(state_key)
         headers = {"X-Api-Key":self.api_key}
+        self.last_error = ""
         params = {
             "apiKey": self.api_key,
             "country": country,
@@ -37,12 +102,15 @@ class NewsAPIClient(BaseNewsAPIClient):
             params["category"] = category
 
         try:
-            response = requests.get(self.BASE_URL, params=params, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_json(params, headers=headers,
+                                  validators=state.setdefault("validators", {}) if state is not None else None)
         except requests.RequestException as e:
             print(f"[ERROR] Failed to fetch articles: {e}")
+            self.last_error = f"{type(e).__name__}: {e}"
             return []
+        if data is None:
+            print("[INFO] NewsAPI headlines not modified")
+            return state.get("articles", [])
 
         articles = []
         for item in data.get("articles", []):
@@ -61,22 +129,30 @@ class NewsAPIClient(BaseNewsAPIClient):
 
             articles.append(article)
 
-        save_to_cache(cache_key, articles)
+        if state is not None:
+            seen = {article["url"] for article in state.get("articles", [])}
+            metrics.inc("source_new_articles_total", sum(a["url"] not in seen for a in articles), source=self.name)
+            state["articles"] = articles
+            self.save_state(state, state_key)
+        if self.use_cache:
+            save_to_cache(cache_key, articles)
         return articles
 
 
 class AlphaVantageAPIClient(BaseNewsAPIClient):
+    NAME = "alphavantage"
     BASE_URL = "https://www.alphavantage.co/query"
 
     def fetch_latest_articles(self, tickers: str = "", topics: str = "") -> List[ArticleDict]:
         cache_key = f"alpha_{tickers}_{topics}"
-        cached = load_from_cache(cache_key)
+        cached = load_from_cache(cache_key) if self.use_cache else None
         if cached:
             print("[CACHE] Using cached Alpha Vantage data")
             return cached
-        
-        print("API CALLED")
-        
+
+        state_key = f"{tickers}_{topics}"
+        state = self.load_state(state_key)
+        self.last_error = ""
         params = {
             "function": "NEWS_SENTIMENT",
             "apikey": self.api_key,
@@ -90,14 +166,21 @@ class AlphaVantageAPIClient(BaseNewsAPIClient):
         two_weeks_ago = today - timedelta(days=14)
         params["time_from"] = two_weeks_ago.strftime("%Y%m%dT%H%M")
         params["time_to"] = today.strftime("%Y%m%dT%H%M")
+        # only what was published since the newest article already seen (minute resolution, so it overlaps)
+        watermark = (state or {}).get("watermark", "")
+        if watermark[:13] > params["time_from"]:
+            params["time_from"] = watermark[:13]
 
         try:
-            response = requests.get(self.BASE_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_json(params,
+                                  validators=state.setdefault("validators", {}) if state is not None else None)
         except requests.RequestException as e:
             print(f"[ERROR] Failed to fetch Alpha Vantage articles: {e}")
+            self.last_error = f"{type(e).__name__}: {e}"
             return []
+        if data is None:
+            print("[INFO] Alpha Vantage feed not modified")
+            return state.get("articles", [])
 
         articles = []
         for item in data.get("feed", []):
@@ -116,5 +199,14 @@ class AlphaVantageAPIClient(BaseNewsAPIClient):
 
             articles.append(article)
 
-        save_to_cache(cache_key, articles)
+        if state is not None:
+            new = [article for article in articles if article["published_at"] > watermark]
+            metrics.inc("source_new_articles_total", len(new), source=self.name)
+            articles = merge_articles(state.get("articles", []), articles,
+                                      cutoff=two_weeks_ago.strftime("%Y%m%dT%H%M%S"))
+            state["articles"] = articles
+            state["watermark"] = max([watermark] + [article["published_at"] for article in articles])
+            self.save_state(state, state_key)
+        if self.use_cache:
+            save_to_cache(cache_key, articles)
         return articles
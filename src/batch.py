@@ -0,0 +1,215 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+from typing import Callable, Dict, List, Optional
+
+from src import records
+from src.schemas import ArticleDict, SummaryDict
+from src.summarizer import FinNewsSummarizer
+from src.utils import metrics
+from src.utils.files import atomic_write
+
+BATCH_DIR = os.getenv("BATCH_DIR", "data/batches")
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "60"))  # seconds between status checks
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+MAX_BATCH_REQUESTS = 50_000  # OpenAI's per-batch limit; the rest waits for the next run
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def custom_id(article: ArticleDict) -> str:
+    return hashlib.sha1(article["url"].encode()).hexdigest()
+
+
+class BatchSummaryJob:
+    # summarises articles through the OpenAI Batch API: the requests go up as one JSONL file and come back within
+    # the completion window at half the per-token price, outside the live rate limits. The uploaded file's id, the
+    # batch id and the run's articles are checkpointed as soon as each call returns, so a restarted process resumes
+    # from the last step instead of uploading again or paying for a second batch.
+    def __init__(self, summarizer: FinNewsSummarizer = None, directory: str = BATCH_DIR, name: str = "backfill"):
+        os.makedirs(directory, exist_ok=True)
+        self.summarizer = summarizer or FinNewsSummarizer()
+        self.name = name
+        self.checkpoint_path = os.path.join(directory, f"{name}.json")
+        self.requests_path = os.path.join(directory, f"{name}.jsonl")
+
+    @property
+    def client(self):
+        return self.summarizer.client
+
+    def load(self) -> Optional[dict]:
+        try:
+            with open(self.checkpoint_path, "rb") as f:
+                return records.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def _save(self, state: dict):
+        payload = records.dumps(state)
+        atomic_write(self.checkpoint_path, lambda f: f.write(payload))
+
+    def clear(self):
+        for path in (self.checkpoint_path, self.requests_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def write_requests(self, articles: List[ArticleDict]) -> int:
+        # one chat completion request per article, keyed by a hash of its url
+        def write(f):
+            for article in articles:
+                body = self.summarizer.request_body(self.summarizer._build_messages(article))
+                f.write(records.dumps({"custom_id": custom_id(article), "method": "POST", "url": BATCH_ENDPOINT,
+                                       "body": body}) + b"\n")
+
+        atomic_write(self.requests_path, write)
+        return len(articles)
+
+    def submit(self, pending: List[ArticleDict], articles: List[ArticleDict] = None) -> dict:
+        # `articles` is the whole run, unchanged and near-duplicate stories included, for collect time
+        if len(pending) > MAX_BATCH_REQUESTS:
+            print(f"[WARN] {len(pending)} articles to summarise, submitting the first {MAX_BATCH_REQUESTS}")
+            pending = pending[:MAX_BATCH_REQUESTS]
+        with metrics.span("batch_submit", requests=len(pending)):
+            self.write_requests(pending)
+            with open(self.requests_path, "rb") as f:
+                uploaded = self.client.files.create(file=f, purpose="batch")
+        state = {"input_file_id": uploaded.id, "status": "uploaded", "requests": len(pending),
+                 "articles": articles if articles is not None else pending}
+        self._save(state)
+        return self.create(state)
+
+    def create(self, state: dict) -> dict:
+        # starts the batch for the checkpointed upload; also how a run that stopped after the upload resumes
+        with metrics.span("batch_submit", requests=state["requests"]):
+            batch = self.client.batches.create(input_file_id=state["input_file_id"], endpoint=BATCH_ENDPOINT,
+                                               completion_window=COMPLETION_WINDOW, metadata={"job": self.name})
+        state.update(batch_id=batch.id, status=batch.status, submitted_at=time.time())
+        self._save(state)
+        metrics.inc("batch_jobs_total", status="submitted")
+        print(f"[INFO] Submitted batch {batch.id} with {state['requests']} requests")
+        return state
+
+    def poll(self, state: dict) -> dict:
+        batch = self.client.batches.retrieve(state["batch_id"])
+        counts = batch.request_counts
+        state.update(status=batch.status, output_file_id=batch.output_file_id, error_file_id=batch.error_file_id)
+        self._save(state)
+        done = f", {counts.completed + counts.failed}/{counts.total} done" if counts else ""
+        print(f"[INFO] Batch {batch.id} is {batch.status}{done}")
+        return state
+
+    def wait(self, state: dict, interval: float = BATCH_POLL_INTERVAL, timeout: float = None) -> dict:
+        # polls until the batch finishes; TimeoutError leaves the checkpoint for the next run to resume
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            state = self.poll(state)
+            if state["status"] in TERMINAL_STATUSES:
+                metrics.inc("batch_jobs_total", status=state["status"])
+                metrics.observe("batch_job_seconds", time.time() - state["submitted_at"])
+                return state
+            if deadline is not None and time.time() + interval > deadline:
+                raise TimeoutError(f"batch {state['batch_id']} is still {state['status']}")
+            time.sleep(interval)
+
+    def collect(self, state: dict) -> Dict[str, str]:
+        # custom id -> summary; failed requests are left out, and expired or cancelled batches still return
+        # whatever completed before they stopped
+        model = self.summarizer.model
+        summaries = {}
+        for file_id in (state.get("output_file_id"), state.get("error_file_id")):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                result = records.loads(line)
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code") != 200:
+                    continue
+                body = response["body"]
+                summaries[result["custom_id"]] = self.summarizer.clean_summary(body["choices"][0]["message"]["content"])
+                usage = body.get("usage")
+                if usage:
+                    metrics.inc("llm_tokens_total", usage["prompt_tokens"], model=model, kind="prompt")
+                    metrics.inc("llm_tokens_total", usage["completion_tokens"], model=model, kind="completion")
+        failed = state["requests"] - len(summaries)
+        metrics.inc("batch_requests_total", len(summaries), result="succeeded")
+        metrics.inc("batch_requests_total", failed, result="failed")
+        print(f"[INFO] Batch {state['batch_id']} returned {len(summaries)} summaries, {failed} failed")
+        return summaries
+
+    def run(self, processor, fetch: Callable[[], List[ArticleDict]], interval: float = BATCH_POLL_INTERVAL,
+            timeout: float = None) -> List[SummaryDict]:
+        # one backfill: submit fetch()'s new articles (or resume the checkpointed batch), wait for it, then
+        # finish the run in the ArticleProcessor; failed articles are picked up again by the next run
+        state = self.load()
+        if state is None:
+            articles = [article for article in fetch() if article.get("url")]
+            pending = processor.pending_articles(articles)
+            if not pending:
+                print("[INFO] Nothing new to summarise")
+                return processor.process_summarised(articles, {})
+            state = self.submit(pending, articles)
+        elif not state.get("batch_id"):
+            print(f"[INFO] Resuming the submission of {state['input_file_id']}")
+            state = self.create(state)
+        else:
+            print(f"[INFO] Resuming batch {state['batch_id']} ({state['status']})")
+        state = self.wait(state, interval, timeout)
+        by_id = self.collect(state)
+        summaries_by_url = {article["url"]: by_id[custom_id(article)] for article in state["articles"]
+                            if custom_id(article) in by_id}
+        processed = processor.process_summarised(state["articles"], summaries_by_url)
+        self.clear()
+        return processed
+
+
+def _load_articles(path: str) -> List[ArticleDict]:
+    # a JSON list of articles or one article per line
+    with open(path, "rb") as f:
+        payload = f.read()
+    try:
+        return records.loads(payload)
+    except ValueError:
+        return [records.loads(line) for line in payload.splitlines() if line.strip()]
+
+def main():
+    from src.aggregator import default_sources
+    from src.ingest import RefreshLock
+    from src.pipeline import ArticleProcessor
+    from src.store import add_articles
+
+    parser = argparse.ArgumentParser(description="Backfill summaries through the OpenAI Batch API")
+    parser.add_argument("--articles", help="JSON or JSONL file of articles (default: fetch from the sources)")
+    parser.add_argument("--poll-interval", type=float, default=BATCH_POLL_INTERVAL)
+    parser.add_argument("--timeout", type=float, help="seconds to wait before exiting; rerun to resume "
+                        "(0 checks once, for cron)")
+    args = parser.parse_args()
+
+    processor = ArticleProcessor(sources=default_sources(use_cache=False))
+    fetch = (lambda: _load_articles(args.articles)) if args.articles else processor.aggregator.fetch_latest_articles
+    try:
+        summaries = BatchSummaryJob(processor.summarizer).run(processor, fetch, args.poll_interval, args.timeout)
+    except TimeoutError as e:
+        print(f"[INFO] {e}; run again to resume")
+        sys.exit(2)
+    if summaries:
+        # the article history has one writer at a time; wait out a refresh that is running
+        lock = RefreshLock()
+        while not lock.acquire():
+            time.sleep(5)
+        try:
+            add_articles(summaries)
+            processor.trends.save()
+        finally:
+            lock.release()
+    print(f"[INFO] Backfilled {len(summaries)} summaries")
+
+
+if __name__ == "__main__":
+    # python -m src.batch [--articles FILE] [--poll-interval 60] [--timeout SECONDS]
+    main()
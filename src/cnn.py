@@ -1,65 +1,197 @@
+import os
+import hashlib
 import streamlit as st
-import requests
 from datetime import date
-from typing import List, Dict
+from typing import List, Dict, Iterator
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
 
+from src.utils import metrics
 from src.utils.cache import load_from_cache, save_to_cache
+from src.utils.http import make_session, request_with_retry, HostLimiter, conditional_headers, update_validators
+from src.utils.extract import extract_content, extract_headlines, get_parse_pool, PARSE_PROCESSES
+from src.utils.stream import map_stage
 
 TTL = 24 * 60 * 60  # 24 hours
+HTML_PARSER = os.getenv("HTML_PARSER", "lxml")  # "lxml" or "bs4", the original BeautifulSoup extraction
 
 @st.cache_data(ttl=TTL)
 def get_cnn_articles() -> List[Dict]:
+    return fetch_cnn_articles()
+
+def fetch_cnn_articles(browserless_url: str = None, use_cache: bool = True, state: dict = None,
+                       probe_url: str = None) -> List[Dict]:
+    # same as get_cnn_articles without Streamlit's cache, safe to call from worker threads;
+    # `state` (updated in place) makes the scrape incremental, see CNNInvestingScraper
     cache_key = f"cnn_{date.today()}"
-    cached = load_from_cache(cache_key)
+    cached = load_from_cache(cache_key) if use_cache else None
     if cached:
         print("[CACHE] Using cached CNN news")
         return cached
 
-    articles = _scrape_cnn_investing()
+    articles = _scrape_cnn_investing(browserless_url, use_cache, state, probe_url)
     return articles
 
-def _scrape_cnn_investing() -> List[Dict]:
+def iter_cnn_articles(browserless_url: str = None, use_cache: bool = True, state: dict = None,
+                      probe_url: str = None) -> Iterator[Dict]:
+    # yields each article as soon as its body is fetched; caches the full list once done
     cache_key = f"cnn_{date.today()}"
+    cached = load_from_cache(cache_key) if use_cache else None
+    if cached:
+        print("[CACHE] Using cached CNN news")
+        yield from cached
+        return
+
     print("Scraping fresh data from CNN...")
-    scraper = CNNInvestingScraper()
+    scraper = CNNInvestingScraper(browserless_url=browserless_url, state=state, probe_url=probe_url)
+    yield from scraper.iter_articles()
+    if use_cache:
+        save_to_cache(cache_key, scraper.articles_data)
+
+def _scrape_cnn_investing(browserless_url: str = None, use_cache: bool = True, state: dict = None,
+                          probe_url: str = None) -> List[Dict]:
+    cache_key = f"cnn_{date.today()}"
+    print("Scraping fresh data from CNN...")
+    scraper = CNNInvestingScraper(browserless_url=browserless_url, state=state, probe_url=probe_url)
     articles = scraper.run()
-    save_to_cache(cache_key, articles)
+    if use_cache:
+        save_to_cache(cache_key, articles)
     return articles
 
 class CNNInvestingScraper:
-    def __init__(self):
+    MAX_WORKERS = 8
+    MAX_PER_HOST = 4
+    MIN_INTERVAL = 0.0  # seconds between requests to the same host
+    RETRIES = 3
+    PROBE_TIMEOUT = 10
+
+    # With `state` (the dict from the last run, updated in place) the scrape is incremental: a conditional
+    # HEAD straight to `probe_url` (the index page by default) skips the Browserless render when CNN answers
+    # 304, an index with the same headlines as last time reuses the stored articles, and bodies already
+    # stored by url are not fetched again.
+    def __init__(self, max_workers: int = MAX_WORKERS, browserless_url: str = None,
+                 parser: str = HTML_PARSER, parse_processes: int = PARSE_PROCESSES, state: dict = None,
+                 probe_url: str = None):
         self.url = "https://edition.cnn.com/business/investing"
+        self.state = state
+        self.probe_url = probe_url or self.url
+        self._validators = None  # from the probe, kept in the state once the scrape has succeeded
         self.articles_data = []
-        self.browserless_api_key = st.secrets["BROWSERLESS_API_KEY"]
-        self.browserless_url = f"https://chrome.browserless.io/content?token={self.browserless_api_key}&stealth"
+        if browserless_url is None:
+            self.browserless_api_key = st.secrets["BROWSERLESS_API_KEY"]
+            browserless_url = f"https://chrome.browserless.io/content?token={self.browserless_api_key}&stealth"
+        self.browserless_url = browserless_url
+        self.max_workers = max_workers
+        self.parser = parser
+        self.parse_processes = parse_processes
+        self.session = make_session(pool_size=max_workers)
+        self.limiter = HostLimiter(max_concurrency=self.MAX_PER_HOST, min_interval=self.MIN_INTERVAL)
 
     def run(self) -> List[dict]:
+        if self._index_not_modified():
+            return self.articles_data
         html = self._get_html(self.url)
         if not html:
             return []
-        soup = BeautifulSoup(html, "html.parser")
-        self._get_lead_plus_headlines(soup)
-        self._get_vertical_strip_headlines(soup)
+        self._get_headlines(html)
+        self._reuse_stored()
         self._get_text_news()
+        self._update_state()
         return self.articles_data
 
+    def iter_articles(self) -> Iterator[dict]:
+        if self._index_not_modified():
+            yield from self.articles_data
+            return
+        html = self._get_html(self.url)
+        if not html:
+            return
+        self._get_headlines(html)
+        self._reuse_stored()
+        pending = [news for news in self.articles_data if "content" not in news]
+        yield from [news for news in self.articles_data if "content" in news]
+        print("Fetching full article content...")
+        yield from map_stage(pending, self._fill_content, workers=max(self.max_workers, 1), name="cnn-fetch")
+        self._update_state()
+
+    def _index_not_modified(self) -> bool:
+        # True (with articles_data filled from the state) when CNN says the index page hasn't changed
+        if self.state is None:
+            return False
+        validators = dict(self.state.get("validators", {}))
+        try:
+            response = request_with_retry(self.session, "HEAD", self.probe_url, retries=0,
+                                          headers=conditional_headers(validators), timeout=self.PROBE_TIMEOUT,
+                                          allow_redirects=True)
+        except Exception as e:
+            print(f"[WARN] Could not check {self.probe_url} for changes: {e}")
+            return False
+        update_validators(validators, response)
+        self._validators = validators
+        if response.status_code != 304 or not self.state.get("articles"):
+            return False
+        print("[INFO] CNN index not modified, reusing stored articles")
+        metrics.inc("source_not_modified_total", source="CNN")
+        self.articles_data = [dict(news) for news in self.state["articles"]]
+        return True
+
+    def _reuse_stored(self):
+        # bodies already stored by url; an index with the same headlines as last time needs no fetches at all
+        if self.state is None:
+            return
+        index_hash = hashlib.sha1("\n".join(f"{news['url']} {news['title']}"
+                                            for news in self.articles_data).encode()).hexdigest()
+        if index_hash == self.state.get("index_hash"):
+            print("[INFO] CNN headlines unchanged")
+            metrics.inc("source_unchanged_index_total", source="CNN")
+        self.state["index_hash"] = index_hash
+        stored = {news["url"]: news["content"] for news in self.state.get("articles", [])}
+        reused = 0
+        for news in self.articles_data:
+            if stored.get(news["url"]):
+                news["content"] = stored[news["url"]]
+                reused += 1
+        metrics.inc("cnn_bodies_total", reused, result="stored")
+        metrics.inc("cnn_bodies_total", len(self.articles_data) - reused, result="fetched")
+        print(f"[INFO] {reused} CNN articles already stored, {len(self.articles_data) - reused} to fetch")
+
+    def _update_state(self):
+        # only the current index is kept; failed bodies are left out so the next run retries them
+        if self.state is not None:
+            if self._validators is not None:
+                self.state["validators"] = self._validators
+            self.state["articles"] = [{"title": news["title"], "url": news["url"], "content": news["content"]}
+                                      for news in self.articles_data if news.get("content")]
+
     def _get_html(self, url: str) -> str:
-        print(f"Fetching {url} via Browserless")
         payload = {
             "url": url,
             "gotoOptions": {"waitUntil": "domcontentloaded"},
             "elements": ["body"]
         }
         try:
-            response = requests.post(self.browserless_url, json=payload, timeout=30)
-            response.raise_for_status()
+            with metrics.span("cnn_fetch", url=url) as span:
+                response = request_with_retry(
+                    self.session, "POST", self.browserless_url,
+                    retries=self.RETRIES, limiter=self.limiter, limit_key=url,
+                    json=payload, timeout=30,
+                )
+                span.set("bytes", len(response.content))
             return response.text
         except Exception as e:
             print(f"[ERROR] Could not fetch {url} via Browserless: {e}")
             return ""
 
+    def _get_headlines(self, html: str):
+        if self.parser == "lxml":
+            print("Parsing headlines...")
+            self.articles_data.extend(extract_headlines(html, self.url))
+            return
+        soup = BeautifulSoup(html, "html.parser")
+        self._get_lead_plus_headlines(soup)
+        self._get_vertical_strip_headlines(soup)
+
     def _get_lead_plus_headlines(self, soup):
         print("Parsing lead-plus headlines...")
         try:
@@ -107,23 +239,46 @@ class CNNInvestingScraper:
 
     def _get_text_news(self):
         print("Fetching full article content...")
-        for news in self.articles_data:
-            url = news["url"]
-            html = self._get_html(url)
-            if not html:
-                news["content"] = ""
-                continue
-            try:
-                soup = BeautifulSoup(html, "html.parser")
-                content_div = soup.select_one("div.article__content")
-                if not content_div:
-                    paragraphs = soup.find_all("p")
-                    text_parts = [p.get_text(strip=True) for p in paragraphs]
-                else:
-                    for tag in content_div(["script", "style", "img", "figure", "table", "ul", "ol"]):
-                        tag.decompose()
-                    text_parts = [line.strip() for line in content_div.get_text(separator="\n").splitlines()]
-                news["content"] = "\n\n".join([line for line in text_parts if line])
-            except Exception as e:
-                print(f"[WARN] Failed to extract content from {url}: {e}")
-                news["content"] = ""
\ No newline at end of file
+        pending = [news for news in self.articles_data if "content" not in news]
+        if self.max_workers <= 1:
+            for news in pending:
+                self._fill_content(news)
+            return
+
+        # each worker writes into its own dict, so articles_data keeps its order
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(self._fill_content, pending))
+
+    def _fill_content(self, news: dict) -> dict:
+        url = news["url"]
+        html = self._get_html(url)
+        if not html:
+            news["content"] = ""
+            return news
+        try:
+            news["content"] = self._extract_content(html)
+        except Exception as e:
+            print(f"[WARN] Failed to extract content from {url}: {e}")
+            news["content"] = ""
+        return news
+
+    def _extract_content(self, html: str) -> str:
+        with metrics.span("cnn_extract", parser=self.parser):
+            if self.parser != "lxml":
+                return self._extract_content_bs4(html)
+            if self.parse_processes > 0:
+                # parsing is CPU-bound; fetch threads hand pages to worker processes
+                return get_parse_pool(self.parse_processes).submit(extract_content, html).result()
+            return extract_content(html)
+
+    def _extract_content_bs4(self, html: str) -> str:
+        soup = BeautifulSoup(html, "html.parser")
+        content_div = soup.select_one("div.article__content")
+        if not content_div:
+            paragraphs = soup.find_all("p")
+            text_parts = [p.get_text(strip=True) for p in paragraphs]
+        else:
+            for tag in content_div(["script", "style", "img", "figure", "table", "ul", "ol"]):
+                tag.decompose()
+            text_parts = [line.strip() for line in content_div.get_text(separator="\n").splitlines()]
+        return "\n\n".join([line for line in text_parts if line])
@@ -0,0 +1,172 @@
+import os
+import re
+import functools
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+CONTENT_TOKEN_BUDGET = int(os.getenv("CONTENT_TOKEN_BUDGET", "1500"))  # per article; 0 sends content untouched
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+RANK_BLOCK = 400  # sentences ranked together; longer texts are ranked block by block
+CHARS_PER_TOKEN = 4  # estimate when the model's tokenizer isn't available
+
+# whole lines that carry no article content
+BOILERPLATE = re.compile(
+    r"^\s*(?:read more|related(?: article| video|:)|see more|watch:|click here|sign up|subscribe|"
+    r"get our free|follow (?:us|cnn)|most stock quote data provided by|market indices are shown in real time|"
+    r"this (?:story|article) has been updated|copyright|©|advertisement\b|ad feedback|video ad feedback)",
+    re.IGNORECASE,
+)
+DATELINE = re.compile(r"^[A-Z][\w .,'-]{0,40}?\(?CNN(?: Business)?\)?\s*[—–-]+\s*")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have he her his in into is it its of on or our she "
+    "that the their them they this to was we were which who will with would you said says also after "
+    "than more about over".split()
+)
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9$\"'(])")
+_WORD = re.compile(r"[a-z0-9$%]+")
+
+
+class CompressedContent(NamedTuple):
+    text: str
+    original_tokens: int
+    tokens: int
+    method: str  # "none", "cleaned" or "textrank"
+
+
+@functools.lru_cache(maxsize=8)
+def get_encoder(model: str):
+    # tiktoken encoding for the OpenAI model, None when tiktoken or its encoding files are unavailable
+    try:
+        import tiktoken
+    except ImportError:
+        print("[WARN] tiktoken is not installed, estimating token counts from length")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"[WARN] Could not load the tokenizer for {model}, estimating token counts: {e}")
+        return None
+
+def count_tokens(text: str, model: str) -> int:
+    encoder = get_encoder(model)
+    if encoder is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoder.encode(text, disallowed_special=()))
+
+def truncate_tokens(text: str, tokens: int, model: str) -> str:
+    encoder = get_encoder(model)
+    if encoder is None:
+        return text[:tokens * CHARS_PER_TOKEN].rstrip()
+    return encoder.decode(encoder.encode(text, disallowed_special=())[:tokens]).rstrip()
+
+
+def clean(text: str) -> List[List[str]]:
+    # -> paragraphs of sentences, without boilerplate lines, datelines or repeated sentences
+    paragraphs, seen = [], set()
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or BOILERPLATE.match(line):
+            continue
+        if not paragraphs:
+            line = DATELINE.sub("", line, count=1)
+        sentences = []
+        for sentence in _SENTENCE.split(line):
+            key = " ".join(_WORD.findall(sentence.lower()))
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            sentences.append(sentence.strip())
+        if sentences:
+            paragraphs.append(sentences)
+    return paragraphs
+
+def textrank(sentences: List[str], damping: float = DAMPING) -> np.ndarray:
+    # PageRank over the tf-idf cosine similarity graph of the sentences; scores sum to 1
+    n = len(sentences)
+    if n <= 2:
+        return np.full(n, 1.0 / max(n, 1))
+    vocabulary, rows, cols = {}, [], []
+    for i, sentence in enumerate(sentences):
+        for word in set(_WORD.findall(sentence.lower())) - STOPWORDS:
+            rows.append(i)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    if not vocabulary:
+        return np.full(n, 1.0 / n)
+
+    vectors = np.zeros((n, len(vocabulary)), dtype=np.float32)
+    vectors[rows, cols] = 1.0
+    vectors *= np.log((1 + n) / (1 + vectors.sum(axis=0))) + 1.0
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+
+    # sentences that share nothing with the rest jump uniformly, like PageRank's dangling nodes
+    totals = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, totals, out=np.full_like(similarity, 1.0 / n), where=totals > 0)
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < 1e-6
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+class ContentCompressor:
+    # fits article content into a token budget: boilerplate and repeated sentences go first, then the
+    # lowest-ranked sentences; what is kept stays in its original order and paragraphs
+    def __init__(self, budget: int = CONTENT_TOKEN_BUDGET, model: str = "gpt-4.1-nano"):
+        self.budget = budget
+        self.model = model
+
+    def compress(self, text: str) -> CompressedContent:
+        original_tokens = count_tokens(text, self.model)
+        if not self.budget:
+            return CompressedContent(text, original_tokens, original_tokens, "none")
+
+        paragraphs = clean(text)
+        if not paragraphs and text.strip():
+            paragraphs = [[text.strip()]]  # nothing but boilerplate: better sent than an empty article
+        cleaned = self._join(paragraphs)
+        tokens = count_tokens(cleaned, self.model)
+        if tokens <= self.budget:
+            return CompressedContent(cleaned, original_tokens, tokens, "cleaned")
+
+        sentences = [(p, sentence) for p, paragraph in enumerate(paragraphs) for sentence in paragraph]
+        keep = self._select([sentence for _, sentence in sentences])
+        kept = [[] for _ in paragraphs]
+        for i, sentence in keep:
+            kept[sentences[i][0]].append(sentence)
+        compressed = self._join(kept)
+        return CompressedContent(compressed, original_tokens, count_tokens(compressed, self.model), "textrank")
+
+    def _select(self, sentences: List[str]) -> List[Tuple[int, str]]:
+        # -> (index, sentence) kept, in order; a sentence longer than the whole budget (the lede, or text
+        # without sentence breaks) is cut to the room left rather than dropped, so something is always kept.
+        # Scores are scaled by block size so blocks of a very long article compare on the same footing
+        scores = np.empty(len(sentences), dtype=np.float32)
+        for start in range(0, len(sentences), RANK_BLOCK):
+            block = sentences[start:start + RANK_BLOCK]
+            scores[start:start + len(block)] = textrank(block) * len(block)
+        scores[0] = np.inf  # the lede always goes first
+
+        lengths = [count_tokens(sentence, self.model) + 1 for sentence in sentences]
+        keep, used = [], 0
+        for i in np.argsort(-scores, kind="stable"):
+            room = self.budget - used
+            if lengths[i] <= room:
+                keep.append((int(i), sentences[i]))
+                used += lengths[i]
+            elif lengths[i] > self.budget and (room > 1 or not keep):
+                keep.append((int(i), truncate_tokens(sentences[i], max(room - 1, 1), self.model)))
+                used = self.budget
+        return sorted(keep)
+
+    def _join(self, paragraphs: List[List[str]]) -> str:
+        return "\n\n".join(" ".join(paragraph) for paragraph in paragraphs if paragraph)
@@ -0,0 +1,138 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+DEDUP_DB = "data/dedup.sqlite3"
+SHINGLE_SIZE = 5  # words
+MIN_SHINGLES = 10  # shorter texts (e.g. a bare headline) are never clustered
+NUM_PERM = 128
+BANDS, ROWS = 16, 8  # NUM_PERM = BANDS * ROWS; candidate pairs from Jaccard ~0.7 upwards
+THRESHOLD = 0.7
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    words = _WORD.findall(text.lower())
+    grams = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 0))}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        # a, b < 2**32 and shingle hashes < 2**32, so a * x + b never overflows uint64
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        if not len(hashes):
+            return np.full(len(self.a), _MAX_HASH, dtype=np.uint32)
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray, bands: int = BANDS, rows: int = ROWS) -> List[int]:
+    # one signed 64-bit bucket id per band, as SQLite stores it
+    keys = []
+    for band in range(bands):
+        digest = zlib.crc32(signature[band * rows:(band + 1) * rows].tobytes())
+        keys.append((band << 32) | digest)
+    return keys
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    # estimated Jaccard similarity of the underlying shingle sets
+    return float(np.mean(a == b))
+
+
+class DuplicateIndex:
+    # persistent MinHash/LSH index; the first article seen in a cluster is its representative
+    def __init__(self, path: str = DEDUP_DB, threshold: float = THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.hasher = MinHasher()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                key TEXT PRIMARY KEY,
+                representative TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                bucket INTEGER NOT NULL,
+                key TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS buckets_bucket ON buckets(bucket);
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def representative(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT representative FROM signatures WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def assign(self, key: str, text: str) -> str:
+        # returns the representative key for `text`, registering it; unseen stories represent themselves
+        existing = self.representative(key)
+        if existing:
+            return existing
+
+        hashes = shingles(text)
+        if len(hashes) < MIN_SHINGLES:
+            return key
+        signature = self.hasher.signature(hashes)
+        buckets = band_keys(signature)
+
+        # lookup + insert under one lock and one write transaction so concurrent runs can't both
+        # become representatives of the same new story
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                representative = self._best_match(conn, signature, buckets) or key
+                conn.execute(
+                    "INSERT OR IGNORE INTO signatures (key, representative, signature, created_at) VALUES (?, ?, ?, ?)",
+                    (key, representative, signature.tobytes(), time.time()),
+                )
+                conn.executemany("INSERT INTO buckets (bucket, key) VALUES (?, ?)",
+                                 [(bucket, key) for bucket in buckets])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return representative
+
+    def _best_match(self, conn: sqlite3.Connection, signature: np.ndarray, buckets: List[int]) -> Optional[str]:
+        placeholders = ", ".join("?" * len(buckets))
+        rows = conn.execute(
+            f"""SELECT s.representative, s.signature FROM signatures s
+                WHERE s.key IN (SELECT DISTINCT key FROM buckets WHERE bucket IN ({placeholders}))""",
+            buckets,
+        ).fetchall()
+        best, best_score = None, self.threshold
+        for representative, blob in rows:
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= best_score:
+                best, best_score = representative, score
+        return best
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from typing import Callable, List, Optional
+
+from src import records
+from src.schemas import SummaryDict
+from src.store import ARTICLE_STORE, add_articles
+from src.utils import metrics
+from src.utils.files import atomic_write, file_version
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL", str(30 * 60)))  # seconds before a snapshot counts as stale
+SNAPSHOT_FILE = "latest.json"
+LOCK_FILE = "refresh.lock"
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+class RefreshLock:
+    # advisory lock on a file, so one refresh runs at a time across every process on the host (or hosts
+    # sharing the directory, where the filesystem supports it); the OS drops it if the holder dies
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, LOCK_FILE)
+        self._file = None
+
+    def acquire(self) -> bool:
+        # non-blocking; False when another process or thread holds the lock
+        f = open(self.path, "a+")
+        try:
+            if sys.platform == "win32":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()} {time.time():.0f}\n")  # who holds it, for debugging
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            self._file.seek(0)
+            self._file.truncate()  # before unlocking, so a cleared record always means nobody holds it
+            self._file.flush()
+            if sys.platform == "win32":
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def held_elsewhere(self) -> bool:
+        # a probe that never takes the lock from a refresh starting at the same moment: the holder's record is
+        # read first, and only a record left behind by a holder that died is checked against the lock itself,
+        # with a shared lock on a separate descriptor (Windows has none, so it briefly takes the lock there)
+        if self._file is not None:
+            return False
+        try:
+            with open(self.path) as f:
+                if not f.read().strip():
+                    return False
+                try:
+                    if sys.platform == "win32":
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                    else:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                except OSError:
+                    return True
+                return False
+        except FileNotFoundError:
+            return False
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SnapshotStore:
+    # the last good set of summaries as one JSON file, replaced atomically, so readers see either the
+    # previous snapshot or the new one in full
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, SNAPSHOT_FILE)
+
+    def publish(self, summaries: List[SummaryDict], sources: dict = None) -> dict:
+        snapshot = {"created_at": time.time(), "sources": sources or {}, "articles": summaries}
+        payload = records.dumps(snapshot)
+        atomic_write(self.path, lambda f: f.write(payload))
+        return snapshot
+
+    def load(self) -> Optional[dict]:
+        try:
+            with open(self.path, "rb") as f:
+                return records.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def version(self) -> Optional[tuple]:
+        # changes whenever a new snapshot is published
+        return file_version(self.path)
+
+    def age(self) -> Optional[float]:
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return None
+
+
+def _default_processor():
+    from src.aggregator import default_sources
+    from src.pipeline import ArticleProcessor
+
+    # the sources' own day-long caches would hand back the morning's articles on every refresh
+    return ArticleProcessor(sources=default_sources(use_cache=False))
+
+def refresh_snapshot(store: SnapshotStore = None, lock: RefreshLock = None,
+                     processor_factory: Callable = _default_processor,
+                     article_store: str = ARTICLE_STORE) -> Optional[dict]:
+    # runs the pipeline once under the refresh lock, adds the result to the article history and publishes it;
+    # None when another refresh is running or this one produced nothing worth replacing the last snapshot with
+    store = store or SnapshotStore()
+    lock = lock or RefreshLock(os.path.dirname(store.path))
+    if not lock.acquire():
+        print("[INFO] A refresh is already running, skipping")
+        metrics.inc("snapshot_refreshes_total", result="skipped")
+        return None
+    try:
+        processor = processor_factory()
+        with metrics.span("ingest"):
+            summaries = processor.refresh()
+        if not summaries:
+            print("[WARN] Refresh produced no articles, keeping the last snapshot")
+            metrics.inc("snapshot_refreshes_total", result="empty")
+            return None
+        with metrics.span("store_write", articles=len(summaries)):
+            add_articles(summaries, article_store)
+        reports = getattr(getattr(processor, "aggregator", None), "reports", {})
+        snapshot = store.publish(summaries, sources={name: repr(report) for name, report in reports.items()})
+        metrics.inc("snapshot_refreshes_total", result="published")
+        print(f"[INFO] Published snapshot with {len(summaries)} articles")
+        return snapshot
+    except Exception as e:
+        print(f"[ERROR] Refresh failed, keeping the last snapshot: {e}")
+        metrics.inc("snapshot_refreshes_total", result="failed")
+        return None
+    finally:
+        lock.release()
+        metrics.flush()
+
+
+_background = None
+_background_lock = threading.Lock()
+
+def refresh_in_background(store: SnapshotStore = None,
+                          processor_factory: Callable = _default_processor) -> threading.Thread:
+    # at most one refresh thread per process; the file lock keeps other processes out
+    global _background
+    with _background_lock:
+        if _background is None or not _background.is_alive():
+            _background = threading.Thread(target=refresh_snapshot, kwargs={
+                "store": store, "processor_factory": processor_factory}, name="snapshot-refresh", daemon=True)
+            _background.start()
+        return _background
+
+
+class IngestionWorker:
+    # refreshes whenever the published snapshot is older than `interval`, so several workers (or a worker
+    # and app instances refreshing in the background) don't refresh right after one another
+    def __init__(self, interval: int = REFRESH_INTERVAL, store: SnapshotStore = None,
+                 processor_factory: Callable = _default_processor):
+        self.interval = interval
+        self.store = store or SnapshotStore()
+        self.processor_factory = processor_factory
+        self._stop = threading.Event()
+
+    def run_once(self) -> Optional[dict]:
+        return refresh_snapshot(self.store, processor_factory=self.processor_factory)
+
+    def run_forever(self):
+        print(f"[INFO] Ingestion worker refreshing every {self.interval}s into {self.store.path}")
+        while not self._stop.is_set():
+            age = self.store.age()
+            if age is None or age >= self.interval:
+                self.run_once()
+                age = self.store.age()
+            wait = self.interval - age if age is not None else self.interval
+            self._stop.wait(max(wait, 1.0))
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduled news ingestion: refreshes and publishes snapshots")
+    parser.add_argument("--interval", type=int, default=REFRESH_INTERVAL, help="seconds between refreshes")
+    parser.add_argument("--once", action="store_true", help="refresh once and exit")
+    args = parser.parse_args()
+
+    worker = IngestionWorker(interval=args.interval)
+    if args.once:
+        sys.exit(0 if worker.run_once() else 1)
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    # python -m src.ingest [--interval 1800] [--once]
+    main()
@@ -0,0 +1,199 @@
+import os
+from typing import List, Tuple
+
+import streamlit as st
+
+from src.utils import metrics
+
+LOCAL_SUMMARIZER_MODEL = os.getenv("LOCAL_SUMMARIZER_MODEL", "us4/fin-llama3.1-8b")  # hub name or local directory
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_BATCH_SIZE", "8"))
+
+
+# torch/transformers are imported on first use, like the sentiment model
+@st.cache_resource(show_spinner=False)
+def load_local_model(model_id: str = LOCAL_SUMMARIZER_MODEL):
+    # 4-bit on CUDA when bitsandbytes is available, full precision on CPU
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    if torch.cuda.is_available():
+        from transformers import BitsAndBytesConfig
+
+        quantization = BitsAndBytesConfig(load_in_4bit=True, bnb_4bit_use_double_quant=True,
+                                          bnb_4bit_quant_type="nf4", bnb_4bit_compute_dtype=torch.float16)
+        model = AutoModelForCausalLM.from_pretrained(model_id, quantization_config=quantization, device_map="cuda")
+    else:
+        model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float32)
+    model.eval()
+    return model, tokenizer
+
+
+def _make_cache(layers: List[Tuple]):
+    from transformers import DynamicCache
+
+    cache = DynamicCache()
+    for i, (keys, values) in enumerate(layers):
+        cache.update(keys, values, i)
+    return cache
+
+def _cache_layers(cache) -> List[Tuple]:
+    # transformers 5 keeps the tensors on cache.layers, 4.x on key_cache/value_cache
+    if hasattr(cache, "layers"):
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    return list(zip(cache.key_cache, cache.value_cache))
+
+
+class LocalGenerationEngine:
+    # continuous batching for a local causal LM: prompts are admitted shortest first into free batch slots,
+    # every row shares one precomputed KV cache for the common prompt prefix, finished rows leave the batch
+    # at once and only newly generated tokens are decoded.
+    #
+    # Rows of the batch KV cache may hold masked padding anywhere; keys already carry their rotary positions,
+    # so rows of different lengths line up by padding the shorter side and position ids are tracked per row.
+    def __init__(self, model, tokenizer, prefix: str = "", max_batch_size: int = LOCAL_BATCH_SIZE,
+                 max_new_tokens: int = 1000, temperature: float = 0.0):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prefix = prefix
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.eos_token_id = tokenizer.eos_token_id
+        self.pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else self.eos_token_id
+        self.max_positions = getattr(model.config, "max_position_embeddings", 4096)
+        self._prefix_ids = tokenizer(prefix)["input_ids"]  # with BOS, as the full prompt would be
+        self._prefix_layers = None
+        self.generated_tokens = 0
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        import torch
+
+        for prompt in prompts:
+            if not prompt.startswith(self.prefix):
+                raise ValueError("every prompt must start with the engine's prefix")
+        budget = self.max_positions - len(self._prefix_ids) - self.max_new_tokens
+        suffixes = [ids[:max(budget, 1)] for ids in self.tokenizer(
+            [prompt[len(self.prefix):] for prompt in prompts], add_special_tokens=False)["input_ids"]]
+
+        queue = sorted(range(len(prompts)), key=lambda i: len(suffixes[i]), reverse=True)
+        outputs = [[] for _ in prompts]
+        batch = None  # (layers, mask, positions, last_tokens, rows)
+        with torch.inference_mode():
+            if self._prefix_layers is None and self._prefix_ids:
+                prefix = self.model(torch.tensor([self._prefix_ids], device=self.model.device), use_cache=True)
+                self._prefix_layers = _cache_layers(prefix.past_key_values)
+
+            while queue or batch:
+                free = self.max_batch_size - (len(batch[4]) if batch else 0)
+                if queue and free:
+                    admitted = [queue.pop() for _ in range(min(free, len(queue)))]
+                    batch = self._merge(batch, self._prefill(admitted, suffixes, outputs))
+                    batch = self._drop_finished(batch, outputs)
+                if batch:
+                    batch = self._drop_finished(self._decode(batch, outputs), outputs)
+
+        return [self.tokenizer.decode(ids, skip_special_tokens=True) for ids in outputs]
+
+    def _prefill(self, rows: List[int], suffixes: List[List[int]], outputs: List[list]):
+        import torch
+
+        device = self.model.device
+        lengths = [len(suffixes[i]) for i in rows]
+        width, start = max(lengths), len(self._prefix_ids)
+        input_ids = torch.full((len(rows), width), self.pad_token_id, dtype=torch.long)
+        mask = torch.zeros((len(rows), start + width), dtype=torch.long)
+        mask[:, :start] = 1
+        positions = torch.full((len(rows), width), start, dtype=torch.long)
+        for r, (i, length) in enumerate(zip(rows, lengths)):
+            if length:
+                input_ids[r, width - length:] = torch.tensor(suffixes[i])
+                mask[r, start + width - length:] = 1
+                positions[r, width - length:] = torch.arange(start, start + length)
+
+        cache = None
+        if self._prefix_layers:
+            cache = _make_cache([(k.expand(len(rows), -1, -1, -1), v.expand(len(rows), -1, -1, -1))
+                                 for k, v in self._prefix_layers])
+        metrics.observe("local_llm_prefill_tokens", sum(lengths), buckets=metrics.SIZE_BUCKETS)
+        out = self.model(input_ids=input_ids.to(device), attention_mask=mask.to(device),
+                         position_ids=positions.to(device), past_key_values=cache, use_cache=True)
+        tokens = self._next_tokens(out.logits[:, -1])
+        self._record(tokens, rows, outputs)
+        next_positions = torch.tensor([start + length for length in lengths])
+        return _cache_layers(out.past_key_values), mask, next_positions, tokens, rows
+
+    def _decode(self, batch, outputs: List[list]):
+        import torch
+
+        layers, mask, positions, tokens, rows = batch
+        device = self.model.device
+        mask = torch.cat([mask, torch.ones((len(rows), 1), dtype=mask.dtype)], dim=1)
+        metrics.observe("local_llm_batch_size", len(rows), buckets=metrics.SIZE_BUCKETS)
+        out = self.model(input_ids=tokens[:, None].to(device), attention_mask=mask.to(device),
+                         position_ids=positions[:, None].to(device), past_key_values=_make_cache(layers),
+                         use_cache=True)
+        tokens = self._next_tokens(out.logits[:, -1])
+        self._record(tokens, rows, outputs)
+        return _cache_layers(out.past_key_values), mask, positions + 1, tokens, rows
+
+    def _next_tokens(self, logits):
+        import torch
+
+        if self.temperature <= 0:
+            return logits.argmax(dim=-1).cpu()
+        probs = torch.softmax(logits.float() / self.temperature, dim=-1)
+        return torch.multinomial(probs, 1)[:, 0].cpu()
+
+    def _record(self, tokens, rows: List[int], outputs: List[list]):
+        for token, i in zip(tokens.tolist(), rows):
+            outputs[i].append(token)
+        self.generated_tokens += len(rows)
+
+    def _drop_finished(self, batch, outputs: List[list]):
+        import torch
+
+        layers, mask, positions, tokens, rows = batch
+        keep = []
+        for r, i in enumerate(rows):
+            if outputs[i][-1] == self.eos_token_id:
+                outputs[i].pop()
+            elif len(outputs[i]) < self.max_new_tokens and positions[r] < self.max_positions:
+                keep.append(r)
+        if len(keep) == len(rows):
+            return batch
+        if not keep:
+            return None
+
+        index = torch.tensor(keep)
+        mask = mask[index]
+        columns = mask.any(dim=0)  # padding columns no remaining row attends to
+        device_index, device_columns = index.to(layers[0][0].device), columns.to(layers[0][0].device)
+        layers = [(k[device_index][:, :, device_columns], v[device_index][:, :, device_columns]) for k, v in layers]
+        return layers, mask[:, columns], positions[index], tokens[index], [rows[r] for r in keep]
+
+    def _merge(self, batch, admitted):
+        # pads the shorter cache on the left with masked slots so both have the same length
+        import torch
+
+        if batch is None:
+            return admitted
+        old_layers, old_mask, old_positions, old_tokens, old_rows = batch
+        new_layers, new_mask, new_positions, new_tokens, new_rows = admitted
+        width = max(old_mask.shape[1], new_mask.shape[1])
+
+        def pad(layers, mask):
+            missing = width - mask.shape[1]
+            if not missing:
+                return layers, mask
+            padded = []
+            for k, v in layers:
+                zeros = k.new_zeros((k.shape[0], k.shape[1], missing, k.shape[3]))
+                padded.append((torch.cat([zeros, k], dim=2), torch.cat([zeros.clone(), v], dim=2)))
+            return padded, torch.cat([mask.new_zeros((mask.shape[0], missing)), mask], dim=1)
+
+        old_layers, old_mask = pad(old_layers, old_mask)
+        new_layers, new_mask = pad(new_layers, new_mask)
+        layers = [(torch.cat([ok, nk]), torch.cat([ov, nv])) for (ok, ov), (nk, nv) in zip(old_layers, new_layers)]
+        return (layers, torch.cat([old_mask, new_mask]), torch.cat([old_positions, new_positions]),
+                torch.cat([old_tokens, new_tokens]), old_rows + new_rows)
@@ -1,24 +1,40 @@
 import os
+import time
 import hashlib
-from datasets import Dataset
+import threading
 from datetime import date
-from typing import List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
-from src.schemas import ArticleDict, SummaryDict
-from src.summarizer import FinNewsSummarizer
-from src.sentiment import classify_sentiment
+from src.aggregator import NewsAggregator, default_sources
+from src.api_news import BaseNewsAPIClient
+from src.schemas import ArticleDict, SummaryDict, TickerSentimentDict
+from src.summarizer import FinNewsSummarizer, get_openai_client
+from src.sentiment import classify_sentiment_batch, load_sentiment_model, BATCH_SIZE
+from src.dedup import DuplicateIndex
+from src.search import SearchIndex
+from src.tickers import tag_ticker_sentiment
+from src.trends import TrendStore
+from src.utils import metrics
 from src.utils.cache import load_from_cache, save_to_cache
+from src.utils.stream import map_stage, batch_stage
 
-from src.cnn import get_cnn_articles
+
+def fetched_at() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
 class ArticleProcessor:
     CACHE_DIR = "data/summaries"
-    def __init__(self):
+    def __init__(self, incremental: bool = True, dedup: bool = True, sources: List[BaseNewsAPIClient] = None):
         os.makedirs(self.CACHE_DIR, exist_ok=True)
         self.summarizer = FinNewsSummarizer()
+        self.incremental = incremental
+        self.search_index = SearchIndex()
+        self.duplicates = DuplicateIndex() if dedup else None
+        self.trends = TrendStore()
+        self.aggregator = NewsAggregator(sources if sources is not None else default_sources())
 
-        self.cnn_articles = []
+        self.articles = []
         self.processed_articles = []
 
     def get_processed_articles(self) -> List[SummaryDict]:
@@ -27,42 +43,317 @@ class ArticleProcessor:
         if cached:
             print("[CACHE] Using cached processed data")
             return cached
-        
-        self._process_cnn()
+        return self.refresh()
 
-        save_to_cache(key=cache_key, data=self.processed_articles, cache_dir=self.CACHE_DIR)
+    def refresh(self) -> List[SummaryDict]:
+        # always goes back to the sources; unchanged articles still reuse their stored summaries
+        self.processed_articles = []
+        with metrics.span("refresh", mode="batch") as span:
+            self._process_sources()
+            span.set("articles", len(self.processed_articles))
+
+        save_to_cache(key=f"processed_{date.today()}", data=self.processed_articles, cache_dir=self.CACHE_DIR)
+        self.trends.save()
+        metrics.flush()
         return self.processed_articles
-    
-    def _batch_process_articles(self, articles: List[ArticleDict]):
-        dataset = Dataset.from_list(articles)
-        summaries = self.summarizer.summarize_openai(dataset)
-
-        for article, summary_text in zip(articles, summaries):
-            article_id = self._hash(article["url"])
-            cache_path = f"{article_id}.json"
-
-            sentiment_label, sentiment_score = classify_sentiment(summary_text)
-
-            summarised = {
-                "title": article.get("title", ""),
-                "summary": summary_text,
-                "description": article.get("description", ""),
-                "published_at": article.get("published_at", ""),
-                "url": article.get("url", ""),
-                "source": article.get("source", ""),
-                "sentiment": sentiment_label,
-                "sentiment_score": sentiment_score,
-                "topics": article.get("topics", []),
-                "ticker_sentiment": article.get("ticker_sentiment", []),
-            }
-
-            save_to_cache(key=cache_path, data=summarised, cache_dir=self.CACHE_DIR)
-            self.processed_articles.append(summarised) 
-
-    def _process_cnn(self):
-        print("[INFO] Processing CNN articles")
-        self.cnn_articles = get_cnn_articles()
-        self._batch_process_articles(self.cnn_articles)
+
+    def pending_articles(self, articles: List[ArticleDict]) -> List[ArticleDict]:
+        # what a run would send to the LLM: new or changed articles that aren't near-duplicates of another story
+        pending = []
+        for article in articles:
+            if self.incremental and self._load_stored_summary(article):
+                continue
+            if not self._representative(article):
+                pending.append(article)
+        return pending
+
+    def process_summarised(self, articles: List[ArticleDict], summaries_by_url: Dict[str, str]) -> List[SummaryDict]:
+        # finishes a run whose summaries were produced elsewhere (a batch job), with the same reuse and
+        # near-duplicate handling as refresh(); pending articles missing from summaries_by_url are skipped.
+        # The new summaries are in self.trends but not saved, so the caller can save them under the refresh lock
+        self.processed_articles = []
+        with metrics.span("refresh", mode="batch_job") as span:
+            self._batch_process_articles(articles, summarise=lambda pending: [
+                summaries_by_url.get(article.get("url", ""), "") for article in pending])
+            span.set("articles", len(self.processed_articles))
+        metrics.flush()
+        return self.processed_articles
+
+    def has_cached_articles(self) -> bool:
+        return load_from_cache(key=f"processed_{date.today()}", cache_dir=self.CACHE_DIR) is not None
+
+    def stream_processed_articles(self) -> Iterator[SummaryDict]:
+        # scrape -> summarise -> classify with bounded queues in between; yields in completion order
+        cache_key = f"processed_{date.today()}"
+        cached = load_from_cache(key=cache_key, cache_dir=self.CACHE_DIR)
+        if cached:
+            print("[CACHE] Using cached processed data")
+            yield from cached
+            return
+
+        print(f"[INFO] Streaming articles from {', '.join(s.name for s in self.aggregator.sources)}")
+        start = time.perf_counter()
+        for summary in self._stream_articles(self.aggregator.iter_latest_articles()):
+            self.processed_articles.append(summary)
+            yield summary
+
+        save_to_cache(key=cache_key, data=self.processed_articles, cache_dir=self.CACHE_DIR)
+        self.trends.save()
+        # a span can't stay open across yields to the page, so the stream only feeds the histogram
+        metrics.observe("stage_seconds", time.perf_counter() - start, stage="refresh")
+        metrics.flush()
+
+    def _stream_articles(self, articles: Iterable[ArticleDict]) -> Iterator[SummaryDict]:
+        # near-duplicates whose representative is still in flight wait here until it is emitted
+        self._emitted, self._waiting = {}, {}
+        summarised = map_stage(articles, self._summarise_one, workers=max(self.summarizer.max_in_flight, 1),
+                               name="summarise")
+        yield from batch_stage(summarised, self._classify_batch, batch_size=BATCH_SIZE, name="classify")
+
+        for representative, members in self._waiting.items():
+            print(f"[WARN] No summary for {representative}, skipping {len(members)} near-duplicates")
+
+    def _summarise_one(self, article: ArticleDict) -> Optional[tuple]:
+        # -> (article, summary_text, stored_summary, duplicate_of); None drops the article from the stream
+        with metrics.span("article", url=article.get("url", "")) as span:
+            stored = self._load_stored_summary(article) if self.incremental else None
+            if stored:
+                span.set("outcome", "unchanged")
+                metrics.inc("articles_total", outcome="unchanged")
+                return article, None, stored, None
+
+            representative = self._representative(article)
+            if representative:
+                span.set("outcome", "duplicate")
+                metrics.inc("articles_total", outcome="duplicate")
+                stored = self._stored_summary_by_url(representative)
+                if stored:
+                    return article, None, self._link_duplicate(article, representative, stored), None
+                return article, None, None, representative
+
+            try:
+                summary_text = self.summarizer.summarize_one(article)
+            except Exception as e:
+                span.set("outcome", "failed")
+                metrics.inc("articles_total", outcome="failed")
+                print(f"[ERROR] Failed to summarize {article.get('url', '')}: {e}")
+                return None
+            span.set("outcome", "summarised")
+            metrics.inc("articles_total", outcome="summarised")
+            return article, summary_text, None, None
+
+    def _classify_batch(self, batch: List[tuple]) -> List[SummaryDict]:
+        fresh = [(article, summary_text) for article, summary_text, stored, duplicate_of in batch
+                 if stored is None and duplicate_of is None]
+        with metrics.span("sentiment", texts=len(fresh)):
+            sentiments = iter(classify_sentiment_batch([summary_text for _, summary_text in fresh]))
+        ticker_sentiments = iter(self._ticker_sentiment([article for article, _ in fresh]))
+
+        results = []
+        for article, summary_text, stored, duplicate_of in batch:
+            if duplicate_of:
+                if duplicate_of not in self._emitted:
+                    self._waiting.setdefault(duplicate_of, []).append(article)
+                    continue
+                stored = self._link_duplicate(article, duplicate_of, self._emitted[duplicate_of])
+            elif stored is None:
+                sentiment_label, sentiment_score = next(sentiments)
+                stored = self._build_summary(article, summary_text, sentiment_label, sentiment_score,
+                                             next(ticker_sentiments))
+                self._store_summary(article, stored)
+            results.append(stored)
+
+            self._emitted[stored["url"]] = stored
+            for member in self._waiting.pop(stored["url"], []):
+                results.append(self._link_duplicate(member, stored["url"], stored))
+        return results
+
+    def _batch_process_articles(self, articles: List[ArticleDict], summarise: Callable = None):
+        # reuse stored summaries for unchanged articles, keep input order when merging
+        results: List[Optional[SummaryDict]] = [None] * len(articles)
+        pending = []
+        for i, article in enumerate(articles):
+            stored = self._load_stored_summary(article) if self.incremental else None
+            if stored:
+                results[i] = stored
+            else:
+                pending.append(i)
+
+        # only one story per near-duplicate cluster goes to the LLM
+        originals, duplicates = [], []
+        for i in pending:
+            representative = self._representative(articles[i])
+            if representative:
+                duplicates.append((i, representative))
+            else:
+                originals.append(i)
+
+        metrics.inc("articles_total", len(articles) - len(pending), outcome="unchanged")
+        metrics.inc("articles_total", len(duplicates), outcome="duplicate")
+        print(f"[INFO] {len(articles) - len(pending)} articles unchanged, {len(duplicates)} near-duplicates, "
+              f"{len(originals)} to summarise")
+        summarised_by_url = {}
+        if originals:
+            summarised = self._summarise_articles([articles[i] for i in originals], summarise)
+            for i, summary in zip(originals, summarised):
+                results[i] = summary
+                if summary:
+                    summarised_by_url[summary["url"]] = summary
+
+        for i, representative in duplicates:
+            summary = summarised_by_url.get(representative) or self._stored_summary_by_url(representative)
+            if not summary:
+                print(f"[WARN] No summary for {representative}, skipping near-duplicate {articles[i].get('url', '')}")
+                continue
+            results[i] = self._link_duplicate(articles[i], representative, summary)
+
+        self.processed_articles.extend(summary for summary in results if summary)
+
+    def _summarise_articles(self, articles: List[ArticleDict],
+                            summarise: Callable = None) -> List[Optional[SummaryDict]]:
+        # summarise(articles) -> one summary per article, "" when it failed; live OpenAI requests by default
+        if summarise is None:
+            from datasets import Dataset
+
+            summaries = self.summarizer.summarize_openai(Dataset.from_list(articles))
+        else:
+            summaries = summarise(articles)
+
+        summarised_pairs = []
+        for i, (article, summary_text) in enumerate(zip(articles, summaries)):
+            if not summary_text:
+                print(f"[WARN] No summary for {article.get('url', '')}, skipping")
+                continue
+            summarised_pairs.append((i, summary_text))
+        metrics.inc("articles_total", len(summarised_pairs), outcome="summarised")
+        metrics.inc("articles_total", len(articles) - len(summarised_pairs), outcome="failed")
+
+        with metrics.span("sentiment", texts=len(summarised_pairs)):
+            sentiments = classify_sentiment_batch([summary_text for _, summary_text in summarised_pairs])
+        ticker_sentiments = self._ticker_sentiment([articles[i] for i, _ in summarised_pairs])
+
+        results: List[Optional[SummaryDict]] = [None] * len(articles)
+        for (i, summary_text), (sentiment_label, sentiment_score), tickers in zip(
+                summarised_pairs, sentiments, ticker_sentiments):
+            article = articles[i]
+            summarised = self._build_summary(article, summary_text, sentiment_label, sentiment_score, tickers)
+            self._store_summary(article, summarised)
+            results[i] = summarised
+
+        return results
+
+    def _ticker_sentiment(self, articles: List[ArticleDict]) -> List[List[TickerSentimentDict]]:
+        # Alpha Vantage ships its own ticker sentiment; everything else is tagged locally
+        results = [article.get("ticker_sentiment") or [] for article in articles]
+        missing = [i for i, tickers in enumerate(results) if not tickers]
+        try:
+            with metrics.span("tickers", texts=len(missing)):
+                tagged = tag_ticker_sentiment(
+                    [f"{articles[i].get('title', '')}\n{articles[i].get('content', '')}" for i in missing]
+                )
+        except Exception as e:
+            print(f"[WARN] Ticker extraction failed: {e}")
+            return results
+        for i, tickers in zip(missing, tagged):
+            results[i] = tickers
+        return results
+
+    def _build_summary(self, article: ArticleDict, summary_text: str, sentiment_label: str,
+                       sentiment_score: float, ticker_sentiment: List[TickerSentimentDict]) -> SummaryDict:
+        return {
+            "title": article.get("title", ""),
+            "summary": summary_text,
+            "description": article.get("description", ""),
+            "published_at": article.get("published_at", ""),
+            "url": article.get("url", ""),
+            "source": article.get("source", ""),
+            "sentiment": sentiment_label,
+            "sentiment_score": sentiment_score,
+            "topics": article.get("topics", []),
+            "ticker_sentiment": ticker_sentiment,
+            "fetched_at": fetched_at(),
+        }
+
+    def _representative(self, article: ArticleDict) -> Optional[str]:
+        # url of the earlier story this article near-duplicates, None when it is new
+        if self.duplicates is None or not article.get("url"):
+            return None
+        url = article["url"]
+        try:
+            representative = self.duplicates.assign(url, f"{article.get('title', '')}\n{article.get('content', '')}")
+        except Exception as e:
+            print(f"[WARN] Duplicate lookup failed for {url}: {e}")
+            return None
+        return representative if representative != url else None
+
+    def _link_duplicate(self, article: ArticleDict, representative: str, summary: SummaryDict) -> SummaryDict:
+        linked = dict(summary)
+        linked.update({
+            "title": article.get("title", ""),
+            "description": article.get("description", ""),
+            "published_at": article.get("published_at", ""),
+            "url": article.get("url", ""),
+            "source": article.get("source", ""),
+            "topics": article.get("topics") or summary.get("topics", []),
+            "duplicate_of": representative,
+            "fetched_at": fetched_at(),
+        })
+        self._store_summary(article, linked)
+        return linked
+
+    def _stored_summary_by_url(self, url: str) -> Optional[SummaryDict]:
+        # records imported from the legacy per-article files are the summary itself, whose "summary" is the text
+        record = load_from_cache(key=f"{self._hash(url)}.json", cache_dir=self.CACHE_DIR, ttl=None)
+        if not record or "content_hash" not in record:
+            return None
+        return record["summary"]
+
+    def _load_stored_summary(self, article: ArticleDict) -> Optional[SummaryDict]:
+        record = load_from_cache(key=self._record_key(article), cache_dir=self.CACHE_DIR, ttl=None)
+        if not record or record.get("content_hash") != self._content_hash(article):
+            return None
+        return record["summary"]
+
+    def _store_summary(self, article: ArticleDict, summary: SummaryDict):
+        record = {"content_hash": self._content_hash(article), "summary": summary}
+        save_to_cache(key=self._record_key(article), data=record, cache_dir=self.CACHE_DIR, ttl=None)
+        try:
+            self.search_index.add(summary, content=article.get("content", ""))
+        except Exception as e:
+            print(f"[WARN] Failed to index {article.get('url', '')}: {e}")
+        # new summaries and near-duplicates; a changed article's url is already counted, so it isn't counted twice
+        self.trends.add(summary)
+
+    def _record_key(self, article: ArticleDict) -> str:
+        return f"{self._hash(article['url'])}.json"
+
+    def _content_hash(self, article: ArticleDict) -> str:
+        return self._hash(f"{article.get('title', '')}\n{article.get('content', '')}")
+
+    def _process_sources(self):
+        print(f"[INFO] Processing articles from {', '.join(s.name for s in self.aggregator.sources)}")
+        with metrics.span("sources") as span:
+            self.articles = self.aggregator.fetch_latest_articles()
+            span.set("articles", len(self.articles))
+        self._batch_process_articles(self.articles)
 
     def _hash(self, text: str) -> str:
-        return hashlib.sha1(text.encode()).hexdigest()
\ No newline at end of file
+        return hashlib.sha1(text.encode()).hexdigest()
+
+
+def warm_up(background: bool = True) -> Optional[threading.Thread]:
+    # loads FinBERT and the OpenAI client ahead of the first cache miss
+    def _load():
+        try:
+            load_sentiment_model()
+            get_openai_client()
+            print("[INFO] Models warmed up")
+        except Exception as e:
+            print(f"[WARN] Model warm-up failed: {e}")
+
+    if not background:
+        _load()
+        return None
+    thread = threading.Thread(target=_load, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
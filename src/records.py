@@ -0,0 +1,242 @@
+import gc
+import sys
+import json
+import struct
+from operator import attrgetter
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # same bytes, just slower
+    orjson = None
+
+# Compact in-memory and on-disk forms of the dicts in src/schemas.py. The dicts stay the interchange format;
+# records are for holding many summaries at once and for the cache and store payloads.
+#
+# Records round-trip dicts exactly: keys a record has no slot for, or whose value is None, are kept in `extra`.
+
+MAGIC = b"\xffREC2"  # prefix of packed records; never the start of JSON text
+LEGACY_MAGIC = b"\xffREC1"  # before Alpha Vantage's topic and ticker entries were normalized, they had slots
+FRAME = struct.Struct("<I")  # packed records are length-prefixed frames of up to FRAME_ROWS rows
+FRAME_ROWS = 1024
+
+
+class Record:
+    __slots__ = ()
+    NESTED: ClassVar[Dict[str, type]] = {}  # field -> record type of its list items
+    INTERNED: ClassVar[Tuple[str, ...]] = ()  # low-cardinality string fields shared between records
+
+    @classmethod
+    def _plan(cls) -> tuple:
+        plan = cls.__dict__.get("_plan_cache")
+        if plan is None:
+            names = tuple(f.name for f in fields(cls) if f.name != "extra")
+            nested = tuple((i, cls.NESTED[name]) for i, name in enumerate(names) if name in cls.NESTED)
+            interned = tuple(i for i, name in enumerate(names) if name in cls.INTERNED)
+            plan = names, frozenset(names), nested, interned, attrgetter(*names)
+            setattr(cls, "_plan_cache", plan)
+        return plan
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Record":
+        if isinstance(data, cls):
+            return data
+        names, name_set, nested, interned, _ = cls._plan()
+        values = [data.get(name) for name in names]
+        for i, item_cls in nested:
+            if values[i] is not None:
+                values[i] = tuple(item_cls.from_dict(item) for item in values[i])
+        for i in interned:
+            if isinstance(values[i], str):
+                values[i] = sys.intern(values[i])
+        extra = {key: value for key, value in data.items() if key not in name_set or value is None}
+        return cls(*values, extra or None)
+
+    def to_dict(self) -> dict:
+        names, _, nested, _, getter = self._plan()
+        values = getter(self)
+        data = {name: value for name, value in zip(names, values) if value is not None}
+        for i, _ in nested:
+            if values[i] is not None:
+                data[names[i]] = [item.to_dict() for item in values[i]]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def pack(self) -> list:
+        # positional: field values in declaration order, then extra; new slots only go after the last one
+        _, _, nested, _, getter = self._plan()
+        row = [*getter(self), self.extra]
+        for i, _ in nested:
+            if row[i] is not None:
+                row[i] = [item.pack() for item in row[i]]
+        return row
+
+    @classmethod
+    def unpack(cls, row: list) -> "Record":
+        names, _, nested, interned, _ = cls._plan()
+        if len(row) <= len(names):
+            row[-1:-1] = [None] * (len(names) + 1 - len(row))  # packed before the last slots were added
+        for i, item_cls in nested:
+            if row[i] is not None:
+                row[i] = tuple(map(item_cls.unpack, row[i]))
+        for i in interned:
+            if isinstance(row[i], str):
+                row[i] = sys.intern(row[i])
+        return cls(*row)
+
+    # read access like the dicts they replace, so rendering code takes either
+    def __getitem__(self, key: str):
+        if key in self._plan()[1]:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+@dataclass(slots=True)
+class Topic(Record):
+    label: Optional[str] = None
+    score: Optional[float] = None
+    extra: Optional[dict] = None
+
+    INTERNED = ("label",)
+
+
+@dataclass(slots=True)
+class TickerSentiment(Record):
+    ticker: Optional[str] = None
+    label: Optional[str] = None
+    confidence: Optional[float] = None
+    sentence: Optional[str] = None
+    extra: Optional[dict] = None
+
+    INTERNED = ("ticker", "label")
+
+
+# field order of the nested rows in LEGACY_MAGIC payloads
+_LEGACY_FIELDS = {
+    Topic: ("label", "score", "topic", "relevance_score"),
+    TickerSentiment: ("ticker", "label", "confidence", "sentence", "relevance_score", "ticker_sentiment_score",
+                      "ticker_sentiment_label"),
+}
+
+
+@dataclass(slots=True)
+class Article(Record):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    content: Optional[str] = None
+    published_at: Optional[str] = None
+    url: Optional[str] = None
+    source: Optional[str] = None
+    overall_sentiment_label: Optional[str] = None
+    overall_sentiment_score: Optional[float] = None
+    topics: Optional[Tuple[Topic, ...]] = None
+    ticker_sentiment: Optional[Tuple[TickerSentiment, ...]] = None
+    extra: Optional[dict] = None
+
+    NESTED = {"topics": Topic, "ticker_sentiment": TickerSentiment}
+    INTERNED = ("source", "overall_sentiment_label")
+
+
+@dataclass(slots=True)
+class Summary(Record):
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    description: Optional[str] = None
+    published_at: Optional[str] = None
+    url: Optional[str] = None
+    source: Optional[str] = None
+    sentiment: Optional[str] = None
+    sentiment_score: Optional[float] = None
+    topics: Optional[Tuple[Topic, ...]] = None
+    ticker_sentiment: Optional[Tuple[TickerSentiment, ...]] = None
+    duplicate_of: Optional[str] = None
+    fetched_at: Optional[str] = None
+    extra: Optional[dict] = None
+
+    NESTED = {"topics": Topic, "ticker_sentiment": TickerSentiment}
+    INTERNED = ("source", "sentiment")
+
+
+def _default(obj):
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+def dumps(data: Any) -> bytes:
+    # compact JSON bytes; records are written as the dicts they stand for
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+def loads(payload: bytes) -> Any:
+    # any JSON, including files written with json.dump(..., indent=2)
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+@contextmanager
+def _gc_paused():
+    # records are acyclic, but building hundreds of thousands of them sets off full collections that walk
+    # every object already built
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def from_dicts(items: List[dict], cls: type) -> List[Record]:
+    with _gc_paused():
+        return [cls.from_dict(item) for item in items]
+
+def pack_records(records: List[Record]) -> bytes:
+    parts = [MAGIC]
+    for start in range(0, len(records), FRAME_ROWS):
+        frame = dumps([record.pack() for record in records[start:start + FRAME_ROWS]])
+        parts += [FRAME.pack(len(frame)), frame]
+    return b"".join(parts)
+
+def _upgrade_legacy(cls: type, row: list) -> list:
+    # Alpha Vantage's entries get the mapping ingestion now applies; other keys without a slot move to extra
+    from src.aggregator import normalize_ticker_sentiment, normalize_topic
+
+    normalize = {Topic: normalize_topic, TickerSentiment: normalize_ticker_sentiment}
+    for i, item_cls in cls._plan()[2]:
+        if row[i] is not None:
+            names = _LEGACY_FIELDS[item_cls]
+            row[i] = [item_cls.from_dict(normalize[item_cls]({**(old[-1] or {}), **{
+                name: value for name, value in zip(names, old) if value is not None}})).pack() for old in row[i]]
+    return row
+
+def unpack_records(payload: bytes, cls: type) -> List[Record]:
+    # packed records, or the JSON dict / list of dicts they replaced; frames are decoded one at a time so
+    # the intermediate rows never exist for the whole payload at once
+    magic = payload[:len(MAGIC)]
+    if magic != MAGIC and magic != LEGACY_MAGIC:
+        data = loads(payload)
+        return from_dicts(data if isinstance(data, list) else [data], cls)
+    offset, unpacked = len(MAGIC), []
+    with _gc_paused():
+        while offset < len(payload):
+            (size,) = FRAME.unpack_from(payload, offset)
+            offset += FRAME.size
+            rows = loads(payload[offset:offset + size])
+            if magic == LEGACY_MAGIC:
+                rows = [_upgrade_legacy(cls, row) for row in rows]
+            unpacked += [cls.unpack(row) for row in rows]
+            offset += size
+    return unpacked
@@ -1,4 +1,4 @@
-from typing import TypedDict, List
+from typing import TypedDict, List, NotRequired
 
 
 class TopicDict(TypedDict):
@@ -34,3 +34,5 @@ class SummaryDict(TypedDict):
     sentiment_score: float
     topics: List[TopicDict]
     ticker_sentiment: List[TickerSentimentDict]
+    duplicate_of: NotRequired[str]  # url of the story whose summary this near-duplicate reuses
+    fetched_at: NotRequired[str]  # when the pipeline summarised it; dates articles their source left undated
@@ -0,0 +1,189 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from src.schemas import SummaryDict
+
+SEARCH_DB = "data/search.sqlite3"
+# bm25 column weights: title, summary, content
+TITLE_WEIGHT, SUMMARY_WEIGHT, CONTENT_WEIGHT = 10.0, 4.0, 1.0
+RANK = f"bm25({TITLE_WEIGHT}, {SUMMARY_WEIGHT}, {CONTENT_WEIGHT})"
+ALL_SENTIMENTS = {"POSITIVE", "NEUTRAL", "NEGATIVE"}
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_published_at(published_at: str) -> str:
+    # NewsAPI: 2025-07-01T12:30:00Z, Alpha Vantage: 20250701T123000 -> 2025-07-01T12:30:00
+    if not published_at:
+        return ""
+    for fmt in ("%Y-%m-%dT%H:%M:%SZ", "%Y%m%dT%H%M%S", "%Y%m%dT%H%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(published_at, fmt).strftime("%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(published_at).strftime("%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return ""
+
+def build_match_query(query: str) -> str:
+    # "exact phrase", prefix* and plain words, all required; user input never reaches FTS5 syntax raw
+    terms = []
+    for phrase, word in _QUERY_TOKEN.findall(query):
+        if phrase:
+            words = _WORD.findall(phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+            continue
+        words = _WORD.findall(word)
+        terms.extend(f'"{w}"' for w in words)
+        if words and word.endswith("*"):
+            terms[-1] += "*"
+    return " AND ".join(terms)
+
+
+class SearchIndex:
+    def __init__(self, path: str = SEARCH_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript("""
+            -- filter columns first so they are read without walking overflow pages
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                published_at TEXT NOT NULL,
+                sentiment TEXT NOT NULL,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                content TEXT NOT NULL,
+                record TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS articles_published_at ON articles(published_at);
+            CREATE INDEX IF NOT EXISTS articles_sentiment ON articles(sentiment, published_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, summary, content,
+                content='articles', content_rowid='id', tokenize='porter unicode61', prefix='2 3 4'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, summary, content)
+                VALUES (new.id, new.title, new.summary, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, summary, content)
+                VALUES ('delete', old.id, old.title, old.summary, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, summary, content)
+                VALUES ('delete', old.id, old.title, old.summary, old.content);
+                INSERT INTO articles_fts(rowid, title, summary, content)
+                VALUES (new.id, new.title, new.summary, new.content);
+            END;
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, summary: SummaryDict, content: str = ""):
+        self.add_many([summary], [content])
+
+    def add_many(self, summaries: Iterable[SummaryDict], contents: Optional[Iterable[str]] = None):
+        # upsert by url; an empty content never overwrites previously indexed article text
+        summaries = list(summaries)
+        contents = list(contents) if contents is not None else [""] * len(summaries)
+        rows = [
+            (
+                s.get("url", ""), s.get("title", ""), s.get("summary", ""), content or "", s.get("source", ""),
+                normalize_published_at(s.get("published_at", "")), s.get("sentiment", "").upper(),
+                json.dumps(s, ensure_ascii=False, separators=(",", ":")),
+            )
+            for s, content in zip(summaries, contents) if s.get("url")
+        ]
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("""
+                INSERT INTO articles (url, title, summary, content, source, published_at, sentiment, record)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    title = excluded.title, summary = excluded.summary,
+                    content = COALESCE(NULLIF(excluded.content, ''), articles.content),
+                    source = excluded.source, published_at = excluded.published_at,
+                    sentiment = excluded.sentiment, record = excluded.record
+                WHERE articles.record != excluded.record OR excluded.content != ''
+            """, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def search(self, query: str, sentiments: Optional[List[str]] = None, date_from: str = "",
+               date_to: str = "", limit: int = 20, offset: int = 0,
+               candidates: Optional[int] = None) -> List[SummaryDict]:
+        # date_from/date_to are ISO dates or datetimes, compared against the normalized published_at.
+        # Every match is ranked; candidates=N ranks only the newest N matches, trading recall for speed
+        match = build_match_query(query)
+        if not match:
+            return []
+        if date_to and "T" not in date_to:
+            date_to = f"{date_to}T23:59:59"
+        conn = self._connect()
+
+        # FTS5 keeps the top `limit + offset` by rank while it scans, and only that page joins back for records
+        sql = ["SELECT articles_fts.rowid AS id, rank FROM articles_fts"]
+        where = ["articles_fts MATCH ?", "rank MATCH ?"]
+        params: list = [match, RANK]
+        filtered = False
+        if sentiments and not ALL_SENTIMENTS.issubset(s.upper() for s in sentiments):
+            where.append(f"a.sentiment IN ({', '.join('?' * len(sentiments))})")
+            params.extend(s.upper() for s in sentiments)
+            filtered = True
+        if date_from or date_to:
+            # the published_at index bounds the rowids, so FTS5 skips postings outside the date range;
+            # articles are indexed roughly as they are published, so the bound is usually tight
+            first, last = conn.execute("SELECT min(id), max(id) FROM articles WHERE published_at >= ? AND "
+                                       "published_at <= ?", [date_from, date_to or "\uffff"]).fetchone()
+            if first is None:
+                return []
+            where.append("articles_fts.rowid BETWEEN ? AND ?")
+            params.extend([first, last])
+            if date_from:
+                where.append("a.published_at >= ?")
+                params.append(date_from)
+            if date_to:
+                where.append("a.published_at <= ?")
+                params.append(date_to)
+            filtered = True
+        if filtered:
+            sql.append("JOIN articles a ON a.id = articles_fts.rowid")
+        if candidates:
+            where.append("articles_fts.rowid >= (SELECT min(rowid) FROM (SELECT rowid FROM articles_fts "
+                         "WHERE articles_fts MATCH ? ORDER BY rowid DESC LIMIT ?))")
+            params.extend([match, candidates])
+        sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY rank, articles_fts.rowid DESC LIMIT ? OFFSET ?")
+        params.extend([limit, offset])
+        ranked = f"SELECT a.record FROM ({' '.join(sql)}) m JOIN articles a ON a.id = m.id ORDER BY m.rank, m.id DESC"
+
+        rows = conn.execute(ranked, params).fetchall()
+        return [json.loads(record) for (record,) in rows]
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def optimize(self):
+        # merges FTS segments after large bulk loads
+        self._connect().execute("INSERT INTO articles_fts(articles_fts) VALUES ('optimize')")
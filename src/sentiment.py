@@ -1,17 +1,296 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import threading
+import numpy as np
 import streamlit as st
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 
+from src.utils import metrics
 
-@st.cache_resource
+FINBERT_MODEL = os.getenv("FINBERT_MODEL", "ProsusAI/finbert")  # hub name or local directory
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")  # "torch", or "onnx" for int8 ONNX Runtime
+SENTIMENT_THREADS = int(os.getenv("SENTIMENT_THREADS", "0"))  # intra-op threads per process; 0 = library default
+SENTIMENT_SERVER = os.getenv("SENTIMENT_SERVER", "")  # url of a shared `python -m src.sentiment --serve`
+FINBERT_ONNX_DIR = os.getenv("FINBERT_ONNX_DIR", "data/models/finbert-onnx")
+ONNX_FILE = "model.onnx"
+MAX_TOKENS = 512
+BATCH_SIZE = 16
+SERVER_PORT = 8765
+
+
+# torch/transformers are imported on first use so cache-hit page loads never pay for them
+@st.cache_resource(show_spinner=False)
 def load_sentiment_pipeline():
-    model_name = "ProsusAI/finbert"
+    import torch
+    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+
+    if SENTIMENT_THREADS:
+        torch.set_num_threads(SENTIMENT_THREADS)
+    model_name = FINBERT_MODEL
     tokenizer = AutoTokenizer.from_pretrained(model_name)
     model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
 
     return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
 
-_sentiment_pipeline = load_sentiment_pipeline()
+
+def export_onnx(model_name: str = FINBERT_MODEL, directory: str = FINBERT_ONNX_DIR, quantize: bool = True) -> str:
+    # FinBERT as an ONNX graph with dynamic batch and sequence axes, weights quantized to int8 (dynamic
+    # quantization: activations stay float), next to its tokenizer and config. Built in a temporary
+    # directory and renamed into place, so concurrent exports can't leave a half-written model.
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)  # saved as tokenizer.json
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, attn_implementation="eager").eval()
+    tmp_dir = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    sample = tokenizer(["Stocks rose after earnings beat estimates."], return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    fp32_path = os.path.join(tmp_dir, "model-fp32.onnx")
+    torch.onnx.export(model, tuple(sample[name] for name in names), fp32_path, input_names=names,
+                      output_names=["logits"], opset_version=17, dynamo=False,
+                      dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in names}, "logits": {0: "batch"}})
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, os.path.join(tmp_dir, ONNX_FILE), weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+    else:
+        os.replace(fp32_path, os.path.join(tmp_dir, ONNX_FILE))
+    tokenizer.save_pretrained(tmp_dir)
+    model.config.save_pretrained(tmp_dir)
+
+    os.makedirs(os.path.dirname(directory) or ".", exist_ok=True)
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)  # another process exported it first
+    print(f"[INFO] Exported {model_name} to {directory} ({'int8' if quantize else 'fp32'})")
+    return directory
+
+
+class _FastTokenizer:
+    # the exported tokenizer.json through `tokenizers` alone: transformers' AutoTokenizer imports torch,
+    # which would cost an ONNX worker more memory than the model itself
+    def __init__(self, directory: str):
+        from tokenizers import Tokenizer
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        self._tokenizer.no_padding()
+        self._tokenizer.no_truncation()
+        with open(os.path.join(directory, "tokenizer_config.json"), encoding="utf-8") as f:
+            special = json.load(f)
+        token_id = lambda name: self._tokenizer.token_to_id(
+            special[name]["content"] if isinstance(special[name], dict) else special[name])
+        self.cls_token_id, self.sep_token_id, self.pad_token_id = (
+            token_id("cls_token"), token_id("sep_token"), token_id("pad_token"))
+
+    def __call__(self, texts: list[str], add_special_tokens: bool = True) -> dict:
+        encodings = self._tokenizer.encode_batch(texts, add_special_tokens=add_special_tokens)
+        return {"input_ids": [encoding.ids for encoding in encodings]}
+
+    def pad(self, encoded: dict, return_tensors: str = "np") -> dict:
+        rows = encoded["input_ids"]
+        input_ids = np.full((len(rows), max(len(row) for row in rows)), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros_like(input_ids)
+        for i, row in enumerate(rows):
+            input_ids[i, :len(row)] = row
+            attention_mask[i, :len(row)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+class OnnxSentimentModel:
+    # the exported model on ONNX Runtime's CPU provider; one session is safe to share between threads
+    def __init__(self, directory: str = FINBERT_ONNX_DIR, threads: int = SENTIMENT_THREADS):
+        import onnxruntime as ort
+        from types import SimpleNamespace
+
+        self.tokenizer = _FastTokenizer(directory)
+        with open(os.path.join(directory, "config.json"), encoding="utf-8") as f:
+            id2label = {int(i): label for i, label in json.load(f)["id2label"].items()}
+        self.config = SimpleNamespace(id2label=id2label, num_labels=len(id2label))
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # the arena keeps the largest padded batch's activations allocated for the life of the process (~1 GB
+        # for BERT-base at 512 tokens); plain allocations give them back for ~15% less throughput
+        options.enable_cpu_mem_arena = False
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(os.path.join(directory, ONNX_FILE), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def probabilities(self, encoded: dict) -> np.ndarray:
+        zeros = np.zeros_like(encoded["input_ids"])  # token_type_ids, which pad() leaves out
+        logits = self.session.run(["logits"], {name: encoded.get(name, zeros).astype(np.int64)
+                                               for name in self.input_names})[0]
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+
+@st.cache_resource(show_spinner=False)
+def load_onnx_model() -> OnnxSentimentModel:
+    if not os.path.exists(os.path.join(FINBERT_ONNX_DIR, ONNX_FILE)):
+        export_onnx()
+    return OnnxSentimentModel()
+
+
+def load_sentiment_model():
+    # whichever model classify_sentiment_batch will use; a sentiment server leaves nothing to load here
+    if SENTIMENT_SERVER:
+        return None
+    return load_onnx_model() if SENTIMENT_BACKEND == "onnx" else load_sentiment_pipeline()
+
 
 def classify_sentiment(text: str) -> tuple[str, float]:
-    result = _sentiment_pipeline(text[:512])[0]  # truncate to avoid max token errors
-    return result["label"], float(result["score"])
+    return classify_sentiment_batch([text])[0]
+
+def classify_sentiment_batch(texts: list[str], batch_size: int = BATCH_SIZE) -> list[tuple[str, float]]:
+    if not texts:
+        return []
+    if SENTIMENT_SERVER:
+        return _classify_remote(list(texts))
+
+    if SENTIMENT_BACKEND == "onnx":
+        model = load_onnx_model()
+        tokenizer, config, probabilities = model.tokenizer, model.config, model.probabilities
+    else:
+        import torch
+
+        sentiment_pipeline = load_sentiment_pipeline()
+        tokenizer, torch_model = sentiment_pipeline.tokenizer, sentiment_pipeline.model
+        config = torch_model.config
+
+        def probabilities(encoded: dict) -> np.ndarray:
+            inputs = {name: torch.from_numpy(value).to(torch_model.device) for name, value in encoded.items()}
+            with torch.inference_mode():
+                logits = torch_model(**inputs).logits
+            return torch.softmax(logits, dim=-1).cpu().numpy()
+
+    # split every text into windows that fit the model once [CLS]/[SEP] are added
+    window = MAX_TOKENS - 2
+    chunk_owner, chunk_ids = [], []
+    for i, ids in enumerate(tokenizer(list(texts), add_special_tokens=False)["input_ids"]):
+        for start in range(0, max(len(ids), 1), window):
+            chunk_owner.append(i)
+            chunk_ids.append(ids[start:start + window])
+
+    # length-sorted batches keep padding to a minimum
+    order = sorted(range(len(chunk_ids)), key=lambda c: len(chunk_ids[c]))
+    probs = np.zeros((len(chunk_ids), config.num_labels), dtype=np.float32)
+    metrics.inc("finbert_texts_total", len(texts))
+    for b in range(0, len(order), batch_size):
+        batch = order[b:b + batch_size]
+        encoded = tokenizer.pad(
+            {"input_ids": [[tokenizer.cls_token_id, *chunk_ids[c], tokenizer.sep_token_id] for c in batch]},
+            return_tensors="np",
+        )
+        seq_len = int(encoded["input_ids"].shape[1])
+        metrics.observe("finbert_batch_size", len(batch), buckets=metrics.SIZE_BUCKETS)
+        metrics.observe("finbert_batch_tokens", len(batch) * seq_len, buckets=metrics.SIZE_BUCKETS)
+        with metrics.span("finbert_batch", size=len(batch), seq_len=seq_len, backend=SENTIMENT_BACKEND):
+            probs[batch] = probabilities(dict(encoded))
+
+    return _aggregate(probs, chunk_owner, chunk_ids, len(texts), config.id2label)
+
+def _aggregate(probs, chunk_owner, chunk_ids, n_texts, id2label) -> list[tuple[str, float]]:
+    # long texts: token-weighted mean of their chunk probabilities
+    weights = np.array([max(len(ids), 1) for ids in chunk_ids], dtype=np.float32)
+    totals = np.zeros((n_texts, probs.shape[1]), dtype=np.float32)
+    np.add.at(totals, np.array(chunk_owner), probs * weights[:, None])
+    totals /= np.bincount(chunk_owner, weights=weights, minlength=n_texts)[:, None]
+
+    labels = totals.argmax(axis=1)
+    return [(id2label[int(l)], float(totals[i, l])) for i, l in enumerate(labels)]
+
+
+# model-sharing mode: one process holds the model and every app worker sends it texts, instead of each
+# worker loading its own copy
+
+_session = None
+
+def _classify_remote(texts: list[str]) -> list[tuple[str, float]]:
+    global _session
+    from src.utils.http import make_session, request_with_retry
+
+    if _session is None:
+        _session = make_session()
+    response = request_with_retry(_session, "POST", f"{SENTIMENT_SERVER.rstrip('/')}/classify",
+                                  json={"texts": texts}, timeout=300)
+    return [(label, score) for label, score in response.json()["results"]]
+
+def serve(host: str = "127.0.0.1", port: int = SERVER_PORT):
+    # requests are classified one at a time; each is already a batch and the model uses every thread it has
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.path != "/classify":
+                return self._reply(404, {"error": "not found"})
+            try:
+                texts = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))["texts"]
+                with lock:
+                    results = classify_sentiment_batch(texts)
+            except Exception as e:
+                print(f"[ERROR] Sentiment request failed: {e}")
+                return self._reply(500, {"error": str(e)})
+            self._reply(200, {"results": results})
+
+        def _reply(self, status: int, data: dict):
+            raw = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    global SENTIMENT_SERVER
+
+    parser = argparse.ArgumentParser(description="FinBERT sentiment: export the ONNX model or serve it to app workers")
+    parser.add_argument("--export", action="store_true",
+                        help=f"export and quantize {FINBERT_MODEL} to {FINBERT_ONNX_DIR}")
+    parser.add_argument("--fp32", action="store_true", help="export without quantizing")
+    parser.add_argument("--serve", action="store_true", help="classify texts for processes with SENTIMENT_SERVER set")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+
+    if args.export:
+        if os.path.exists(FINBERT_ONNX_DIR):
+            shutil.rmtree(FINBERT_ONNX_DIR)
+        export_onnx(quantize=not args.fp32)
+    if args.serve:
+        SENTIMENT_SERVER = ""  # this process is the server
+        classify_sentiment_batch(["Stocks rose."])  # load the model before accepting requests
+        server = serve(args.host, args.port)
+        print(f"[INFO] Serving {SENTIMENT_BACKEND} sentiment on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    if not (args.export or args.serve):
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # python -m src.sentiment --export | --serve [--port 8765]
+    main()
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from src.records import Summary, pack_records, unpack_records
+from src.schemas import SummaryDict
+from src.search import SEARCH_DB, normalize_published_at
+from src.utils import metrics
+from src.utils.files import atomic_write, file_version
+
+ARTICLE_STORE = os.getenv("ARTICLE_STORE", "data/articles.arrow")
+PAGE_SIZE = 20
+DAY = 24 * 60 * 60
+
+
+class Page(NamedTuple):
+    rows: List[SummaryDict]
+    total: int  # rows matching the filters
+    page: int  # zero-based, clamped to the last page
+    pages: int
+
+
+def _epoch(published_at: str) -> int:
+    normalized = normalize_published_at(published_at)
+    if not normalized:
+        return 0
+    return int(datetime.fromisoformat(normalized).replace(tzinfo=timezone.utc).timestamp())
+
+def _published(summary: SummaryDict, now: int) -> int:
+    # sources that leave articles undated (CNN) are dated by when they were summarised, or else stored, so they
+    # sort with the rest and date filters find them
+    return _epoch(summary.get("published_at") or "") or _epoch(summary.get("fetched_at") or "") or now
+
+def _tickers(summary: SummaryDict) -> List[str]:
+    return sorted({t["ticker"] for t in summary.get("ticker_sentiment") or [] if t.get("ticker")})
+
+def _to_table(summaries: List[SummaryDict]):
+    import pyarrow as pa
+
+    now = int(time.time())
+    return pa.table({
+        "published": pa.array([_published(s, now) for s in summaries], pa.int64()),
+        "source": pa.array([s.get("source") or "" for s in summaries], pa.string()),
+        "sentiment": pa.array([(s.get("sentiment") or "").upper() for s in summaries], pa.string()),
+        "tickers": pa.array([_tickers(s) for s in summaries], pa.list_(pa.string())),
+        "url": pa.array([s.get("url") or "" for s in summaries], pa.string()),
+        "record": pa.array([pack_records([Summary.from_dict(s)]) for s in summaries], pa.binary()),
+    })
+
+def _read(path: str):
+    # memory-mapped, so opening a large store costs next to nothing until columns are touched
+    import pyarrow as pa
+
+    if not os.path.exists(path):
+        return _to_table([])
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if table.schema.field("record").type == pa.string():
+        # stores written before packed records held JSON text; the bytes still decode
+        table = table.set_column(table.schema.get_field_index("record"), "record",
+                                 table.column("record").cast(pa.binary()))
+    return table
+
+def store_version(path: str = ARTICLE_STORE) -> Optional[tuple]:
+    return file_version(path)
+
+
+def add_articles(summaries: List[SummaryDict], path: str = ARTICLE_STORE) -> int:
+    # merges by url (the new copy wins), keeps rows newest first and replaces the file atomically;
+    # callers serialise writes with the refresh lock. Returns the number of rows stored.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    new = _to_table(list({summary.get("url") or "": summary for summary in summaries}.values()))
+    table = _read(path)
+    if table.num_rows:
+        kept = pc.invert(pc.is_in(table.column("url"), value_set=new.column("url").combine_chunks()))
+        table = pa.concat_tables([table.filter(kept), new])
+    else:
+        table = new
+    table = table.take(pc.sort_indices(table, sort_keys=[("published", "descending")]))
+
+    def write(f):
+        with pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table, max_chunksize=64 * 1024)
+
+    atomic_write(path, write)
+    return table.num_rows
+
+
+def _postings(values, rows: np.ndarray) -> Dict[str, np.ndarray]:
+    # value -> ascending row positions holding it
+    import pyarrow.compute as pc
+
+    encoded = pc.dictionary_encode(values).combine_chunks()
+    codes = encoded.indices.to_numpy(zero_copy_only=False)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(encoded.dictionary) + 1))
+    ordered_rows = rows[order]
+    return {label: ordered_rows[bounds[i]:bounds[i + 1]] for i, label in enumerate(encoded.dictionary.to_pylist())}
+
+
+class ArticleStore:
+    # read side of the store: rows are newest first, so a date range is one contiguous slice, and sentiment,
+    # source and ticker each have posting lists; only the records on the requested page are decoded
+    def __init__(self, path: str = ARTICLE_STORE):
+        import pyarrow.compute as pc
+
+        self.path = path
+        self.table = _read(path)
+        n = self.table.num_rows
+        self._newest_first = -self.table.column("published").to_numpy()  # ascending, for searchsorted
+        # records are looked up chunk by chunk: take() on the whole column would concatenate it first
+        self._records = self.table.column("record").chunks
+        self._chunk_starts = np.cumsum([0] + [len(chunk) for chunk in self._records])
+        rows = np.arange(n)
+        self.by_sentiment = _postings(self.table.column("sentiment"), rows)
+        self.by_source = _postings(self.table.column("source"), rows)
+        tickers = self.table.column("tickers")
+        lengths = pc.list_value_length(tickers).fill_null(0).to_numpy()
+        self.by_ticker = _postings(pc.list_flatten(tickers), np.repeat(rows, lengths))
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def sources(self) -> List[str]:
+        return sorted(source for source in self.by_source if source)
+
+    @property
+    def tickers(self) -> List[str]:
+        return sorted(self.by_ticker, key=lambda ticker: -len(self.by_ticker[ticker]))
+
+    def query(self, sentiments: List[str] = None, sources: List[str] = None, tickers: List[str] = None,
+              date_from: str = "", date_to: str = "", page: int = 0, page_size: int = PAGE_SIZE) -> Page:
+        # None means no filter on that column; dates are inclusive YYYY-MM-DD
+        with metrics.span("store_query", rows=len(self)):
+            rows = self._match(sentiments, sources, tickers, date_from, date_to)
+            pages = max(1, -(-len(rows) // page_size))
+            page = min(max(page, 0), pages - 1)
+            selected = rows[page * page_size:(page + 1) * page_size]
+            records = [unpack_records(self._record(row), Summary)[0].to_dict() for row in selected]
+        return Page(records, len(rows), page, pages)
+
+    def _record(self, row: int) -> bytes:
+        chunk = int(np.searchsorted(self._chunk_starts, row, side="right")) - 1
+        return self._records[chunk][row - self._chunk_starts[chunk]].as_py()
+
+    def _match(self, sentiments, sources, tickers, date_from: str, date_to: str) -> np.ndarray:
+        start, end = 0, len(self)
+        if date_to:
+            start = int(np.searchsorted(self._newest_first, -(_epoch(date_to) + DAY - 1), side="left"))
+        if date_from:
+            end = int(np.searchsorted(self._newest_first, -_epoch(date_from), side="right"))
+        if start >= end:
+            return np.arange(0)
+
+        mask = None
+        for postings, wanted, one_per_row in ((self.by_sentiment, sentiments, True), (self.by_source, sources, True),
+                                              (self.by_ticker, tickers, False)):
+            if wanted is None:
+                continue
+            if one_per_row and postings.keys() <= set(wanted):
+                continue  # every value selected
+            hit = np.zeros(end - start, dtype=bool)
+            for value in wanted:
+                if value in postings:
+                    rows = postings[value]
+                    rows = rows[np.searchsorted(rows, start):np.searchsorted(rows, end)]
+                    hit[rows - start] = True
+            mask = hit if mask is None else mask & hit
+        if mask is None:
+            return np.arange(start, end)
+        return start + np.flatnonzero(mask)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the article store from the search index's history")
+    parser.add_argument("--search-db", default=SEARCH_DB)
+    parser.add_argument("--store", default=ARTICLE_STORE)
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.search_db) as conn:
+        summaries = [json.loads(record) for (record,) in conn.execute("SELECT record FROM articles")]
+    print(f"[INFO] Stored {add_articles(summaries, args.store)} articles in {args.store}")
+
+
+if __name__ == "__main__":
+    # python -m src.store [--search-db data/search.sqlite3] [--store data/articles.arrow]
+    main()
@@ -1,32 +1,32 @@
-# import torch
-# from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
 import os
-from openai import OpenAI
+import time
+import contextvars
 import streamlit as st
 from tqdm import tqdm
-from datasets import Dataset
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from src.compress import CONTENT_TOKEN_BUDGET, ContentCompressor, count_tokens
+from src.local_llm import LOCAL_BATCH_SIZE, LocalGenerationEngine, load_local_model
+from src.utils import metrics
+from src.utils.http import backoff_delay
+from src.utils.ratelimit import RateLimiter
 
-OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
-client = OpenAI(api_key=OPENAI_API_KEY)
+if TYPE_CHECKING:
+    from datasets import Dataset
 
-# NO GPU SUPPORT, COMMENTED OUT FOR STREAMLIT CLOUD
-# @st.cache_resource
-# def load_summarizer_model():
-#     model_id = "us4/fin-llama3.1-8b"
-#     bnb_config = BitsAndBytesConfig(
-#         load_in_4bit=True,
-#         bnb_4bit_use_double_quant=True,
-#         bnb_4bit_quant_type="nf4",
-#         bnb_4bit_compute_dtype=torch.float16
-#     )
 
-#     tokenizer = AutoTokenizer.from_pretrained(model_id)
-#     model = AutoModelForCausalLM.from_pretrained(model_id, quantization_config=bnb_config).to("cuda" if torch.cuda.is_available() else "cpu")
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
+    from openai import OpenAI
 
-#     return model, tokenizer
+    # retries are handled by FinNewsSummarizer so they go through its rate limiter
+    return OpenAI(api_key=st.secrets["OPENAI_API_KEY"], max_retries=0)
 
-# _model, _tokenizer = load_summarizer_model()
+def _retryable_errors() -> tuple:
+    from openai import RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+
+    return (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
 
 class FinNewsSummarizer:
     OPENAI_MODEL = "gpt-4.1-nano"
@@ -42,54 +42,109 @@ class FinNewsSummarizer:
     Do not add information. Summarise only the written information in the given article.
     """
 
-    def __init__(self, model=OPENAI_MODEL, tokenizer=None):
+    MAX_TOKENS = 1000
+    MAX_IN_FLIGHT = 8
+    REQUESTS_PER_MINUTE = 500
+    TOKENS_PER_MINUTE = 200_000
+    MAX_RETRIES = 5
+
+    def __init__(self, model=OPENAI_MODEL, tokenizer=None, openai_client=None, max_in_flight: int = MAX_IN_FLIGHT,
+                 requests_per_minute: int = REQUESTS_PER_MINUTE, tokens_per_minute: int = TOKENS_PER_MINUTE,
+                 content_budget: int = CONTENT_TOKEN_BUDGET):
         self.model = model
         self.tokenizer = tokenizer
+        self._client = openai_client.with_options(max_retries=0) if openai_client else None
+        self.max_in_flight = max_in_flight
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        # content_budget=0 sends article content as scraped
+        compress_model = model if isinstance(model, str) else self.OPENAI_MODEL
+        self.compressor = ContentCompressor(content_budget, model=compress_model) if content_budget else None
+        self._engine = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_openai_client()
+        return self._client
+
+    def summarize_openai(self, articles: "Dataset")-> list[str]:
+        # failed articles come back as "" so one bad request doesn't sink the batch
+        articles = list(articles)
+        summaries = [""] * len(articles)
+
+        with ThreadPoolExecutor(max_workers=max(self.max_in_flight, 1)) as pool:
+            # each task gets a copy of the caller's context so its spans nest under the current one
+            futures = {pool.submit(contextvars.copy_context().run, self.summarize_one, article): i
+                       for i, article in enumerate(articles)}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Summarizing: "):
+                i = futures[future]
+                try:
+                    summaries[i] = future.result()
+                except Exception as e:
+                    print(f"[ERROR] Failed to summarize article {i}: {e}")
 
-    def summarize_openai(self, articles: Dataset)-> list[str]:
-        summaries = []
-
-        for article in tqdm(articles, desc="Summarizing: "):
-            messages = self._build_messages(article)
-
-            completion = client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                stream=False,
-                temperature=0.7,
-                max_tokens=1000
-            )
-
-            summary = completion.choices[0].message.content.strip()
-            summary = summary.replace("$", "\\$") #streamlit markdown LaTeX escape
-            summaries.append(summary)
-          
         return summaries
 
-    # NOT USED IN STREAMLIT CLOUD DUE TO LACK OF GPU SUPPORT
-    def batch_summarize(self, articles: Dataset, batch_size: int = 2) -> list[str]:
-        prompts = [self._build_prompt(article) for article in articles]
-        summaries = []
-
-        for i in tqdm(range(0, len(prompts), batch_size), desc="Summarizing"):
-            batch_prompts = prompts[i:i+batch_size]
-            tokenized = self.tokenizer(batch_prompts, return_tensors="pt", padding=True, truncation=True).to(self.model.device)
+    def summarize_one(self, article) -> str:
+        with metrics.span("summarize", url=article.get("url", "")):
+            return self._complete(self._build_messages(article))
+
+    def _complete(self, messages: list[dict]) -> str:
+        reserved = self._estimate_tokens(messages) + self.MAX_TOKENS
+        retryable_errors = _retryable_errors()
+        for attempt in range(self.MAX_RETRIES + 1):
+            waited = time.perf_counter()
+            self.limiter.acquire(reserved)
+            started = time.perf_counter()
+            metrics.observe("llm_rate_limit_wait_seconds", started - waited, model=self.model)
+            try:
+                completion = self.client.chat.completions.create(**self.request_body(messages), stream=False)
+            except retryable_errors as e:
+                metrics.observe("llm_request_seconds", time.perf_counter() - started, model=self.model,
+                                status=type(e).__name__)
+                if attempt == self.MAX_RETRIES:
+                    raise
+                metrics.inc("llm_retries_total", model=self.model, reason=type(e).__name__)
+                print(f"[WARN] {type(e).__name__} from OpenAI, retrying ({attempt + 1}/{self.MAX_RETRIES})")
+                time.sleep(backoff_delay(attempt, base=1.0))
+                continue
+            metrics.observe("llm_request_seconds", time.perf_counter() - started, model=self.model, status="ok")
+
+            if completion.usage:
+                self.limiter.settle(reserved, completion.usage.total_tokens)
+                metrics.inc("llm_tokens_total", completion.usage.prompt_tokens, model=self.model, kind="prompt")
+                metrics.inc("llm_tokens_total", completion.usage.completion_tokens, model=self.model,
+                            kind="completion")
+            return self.clean_summary(completion.choices[0].message.content)
+
+    def request_body(self, messages: list[dict]) -> dict:
+        # chat completion parameters, shared by live requests and batch job files
+        return {"model": self.model, "messages": messages, "temperature": 0.7, "max_tokens": self.MAX_TOKENS}
+
+    @staticmethod
+    def clean_summary(summary: str) -> str:
+        return summary.strip().replace("$", "\\$") #streamlit markdown LaTeX escape
+
+    def _estimate_tokens(self, messages: list[dict]) -> int:
+        return sum(count_tokens(m["content"], self.model) for m in messages)
+
+    def batch_summarize(self, articles: "Dataset", batch_size: int = LOCAL_BATCH_SIZE) -> list[str]:
+        # local model instead of OpenAI: the model and tokenizer passed in, else LOCAL_SUMMARIZER_MODEL
+        if self.tokenizer is None:
+            model, tokenizer = load_local_model()
+        else:
+            model, tokenizer = self.model, self.tokenizer
+        engine = self._engine
+        if engine is None or engine.model is not model or engine.max_batch_size != batch_size:
+            engine = self._engine = LocalGenerationEngine(model, tokenizer, prefix=self._prompt_prefix(),
+                                                          max_batch_size=batch_size, max_new_tokens=self.MAX_TOKENS)
+        with metrics.span("local_summarize", articles=len(articles)):
+            summaries = engine.generate([self._build_prompt(article) for article in articles])
+        return [self.clean_summary(summary) for summary in summaries]
 
-            outputs = self.model.generate(
-                **tokenized,
-                max_new_tokens=1000,
-                do_sample=False,
-            )
-
-            decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
-            batch_summaries = [res[len(prompt):].strip() for res, prompt in zip(decoded, batch_prompts)]
-            summaries.extend(batch_summaries)
-
-        return summaries
-    
     def _build_messages(self, article) -> list[dict]:
         user_prompt = f"### News Title:\n{article['title']}\n \
-                        ### Article:\n{article['content']}\n"
+                        ### Article:\n{self._prepare_content(article['content'])}\n"
         
         return [ 
           {"role": "system", "content": self.SYSTEM_PROMPT},
@@ -97,12 +152,26 @@ class FinNewsSummarizer:
           {"role": "assistant", "content": "### The summary:\n"}
         ]
     
+    def _prepare_content(self, content: str) -> str:
+        # strips boilerplate and repeats, then cuts the content down to the token budget
+        if not self.compressor or not content:
+            return content
+        compressed = self.compressor.compress(content)
+        metrics.inc("llm_content_tokens_total", compressed.original_tokens, model=self.model, kind="scraped")
+        metrics.inc("llm_content_tokens_total", compressed.tokens, model=self.model, kind="sent")
+        metrics.observe("llm_content_tokens_saved", compressed.original_tokens - compressed.tokens,
+                        buckets=metrics.SIZE_BUCKETS, method=compressed.method)
+        return compressed.text
+
+    def _prompt_prefix(self) -> str:
+        # identical for every article, so the local engine computes its KV cache once
+        return f"<|system|>\n{self.SYSTEM_PROMPT}\n<|user|>\n"
+
     def _build_prompt(self, article) -> str:
         return (
-            f"<|system|>\n{self.SYSTEM_PROMPT}\n"
-            f"<|user|>\n"
+            self._prompt_prefix() +
             f"### News Title:\n{article['title']}\n\n"
-            f"### Article:\n{article['content']}\n\n"
+            f"### Article:\n{self._prepare_content(article['content'])}\n\n"
             f"### The summary:\n"
             f"<|assistant|>\n"
         )
\ No newline at end of file
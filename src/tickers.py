@@ -0,0 +1,245 @@
+import os
+import re
+import csv
+import json
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple
+
+import streamlit as st
+
+from src.schemas import TickerSentimentDict
+
+TICKER_DICTIONARY = os.getenv(
+    "TICKER_DICTIONARY", os.path.join(os.path.dirname(__file__), "resources", "tickers.csv")
+)
+MAX_SENTENCES_PER_TICKER = 3
+
+# symbols that are also everyday words or too short to trust without context
+AMBIGUOUS_WORDS = {
+    "A", "I", "AI", "ALL", "AN", "ARE", "AS", "AT", "BE", "BIG", "CAN", "CAR", "CAT", "DO", "DOG", "EAT",
+    "FOR", "FUN", "GO", "HAS", "HE", "IT", "KEY", "LOW", "MAN", "NOW", "O", "ON", "ONE", "OR", "OUT", "PM",
+    "RUN", "SEE", "SO", "TWO", "UP", "US", "WELL", "CEO", "CFO", "IPO", "ETF", "GDP", "CPI", "USA", "EU", "UK",
+}
+# company names that are also everyday words: on their own they only count away from the start of a sentence,
+# followed by a company suffix ("Target Corp") or when the ticker is confirmed elsewhere in the text
+AMBIGUOUS_NAMES = {
+    "target", "delta", "meta", "square", "ford", "block", "gap", "ball", "shell", "snap", "key", "progressive",
+    "southern", "booking", "match",
+}
+EXCHANGES = {"NYSE", "NASDAQ", "Nasdaq", "AMEX", "NYSEARCA", "OTC", "LSE", "TSX"}
+CORPORATE_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc", "llc", "lp",
+    "holdings", "holding", "group", "the", "class", "a", "b", "c", "n.v", "s.a", "a/s", "&",
+}
+
+_NAME_SUFFIXES = CORPORATE_SUFFIXES - {"the", "class", "a", "b", "c", "&"}
+
+_TOKEN = re.compile(r"\$?[A-Za-z0-9](?:[A-Za-z0-9&.'’/-]*[A-Za-z0-9])?")
+_POSSESSIVE = ("'s", "’s", "'S", "’S")
+
+
+class TickerEntry(NamedTuple):
+    ticker: str
+    name: str
+    aliases: List[str]
+
+
+class TickerMention(NamedTuple):
+    ticker: str
+    sentence: int
+    start: int  # character offsets within the sentence
+    end: int
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for block in text.splitlines():
+        for sentence in re.split(r"(?<=[.!?])\s+(?=[A-Z0-9$\"'(])", block):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+def _strip_possessive(token: str) -> str:
+    # "Nvidia's chips" names Nvidia; dictionary names like "McDonald's" are stripped the same way
+    return token[:-2] if token.endswith(_POSSESSIVE) else token
+
+def _alias_tokens(alias: str) -> List[str]:
+    return [_strip_possessive(t).lower() for t in _TOKEN.findall(alias)]
+
+def _short_name(name: str) -> List[str]:
+    # "Apple Inc." -> ["apple"], "JPMorgan Chase & Co." -> ["jpmorgan", "chase"]
+    tokens = _alias_tokens(name)
+    while tokens and tokens[-1] in CORPORATE_SUFFIXES:
+        tokens.pop()
+    while tokens and tokens[0] == "the":
+        tokens.pop(0)
+    return tokens
+
+
+class TickerExtractor:
+    # Aho-Corasick over lowercase word tokens for company names, hash lookup for symbols,
+    # so every text is scanned once regardless of dictionary size
+    def __init__(self, entries: Iterable[TickerEntry]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+        self.symbols = set()
+
+        for entry in entries:
+            self.symbols.add(entry.ticker)
+            for alias in entry.aliases:
+                self._add(tuple(_alias_tokens(alias)), entry.ticker)
+            # derived names don't override an earlier share class, e.g. GOOGL before GOOG for "Alphabet"
+            for tokens in {tuple(_alias_tokens(entry.name)), tuple(_short_name(entry.name))}:
+                self._add(tokens, entry.ticker, exclusive=True)
+        self._build()
+
+    def _add(self, tokens: tuple, ticker: str, exclusive: bool = False):
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if exclusive and self._out[state]:
+            return
+        if (ticker, len(tokens)) not in self._out[state]:
+            self._out[state].append((ticker, len(tokens)))
+
+    def _build(self):
+        # breadth-first failure links; root children fail to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(token, 0)
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def extract(self, sentences: List[str]) -> List[TickerMention]:
+        mentions = []
+        ambiguous = []  # hits that need the ticker confirmed elsewhere in the text
+        confirmed = set()
+        goto, fail, out = self._goto, self._fail, self._out
+
+        for s_idx, sentence in enumerate(sentences):
+            tokens = list(_TOKEN.finditer(sentence))
+            state = 0
+            shouting = sentence.isupper()
+            for t_idx, match in enumerate(tokens):
+                raw = _strip_possessive(match.group())
+                word = raw.lower().lstrip("$")
+
+                # company names: capitalised token sequences
+                while state and word not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(word, 0)
+                for ticker, length in out[state]:
+                    first = tokens[t_idx - length + 1]
+                    if not (first.group()[0].isupper() or first.group()[0].isdigit()):
+                        continue
+                    mention = TickerMention(ticker, s_idx, first.start(), match.end())
+                    if length == 1 and word in AMBIGUOUS_NAMES and not self._named_in_context(tokens, t_idx):
+                        ambiguous.append(mention)
+                        continue
+                    mentions.append(mention)
+                    confirmed.add(ticker)
+
+                # symbols: exact upper-case tokens
+                cashtag = raw.startswith("$")
+                symbol = raw[1:] if cashtag else raw
+                if symbol not in self.symbols or not symbol.isupper():
+                    continue
+                mention = TickerMention(symbol, s_idx, match.start(), match.end())
+                if cashtag or self._has_listing_context(sentence, tokens, t_idx):
+                    mentions.append(mention)
+                    confirmed.add(symbol)
+                elif symbol in AMBIGUOUS_WORDS or len(symbol) <= 2 or shouting:
+                    ambiguous.append(mention)
+                else:
+                    mentions.append(mention)
+                    confirmed.add(symbol)
+
+        mentions.extend(m for m in ambiguous if m.ticker in confirmed)
+        return mentions
+
+    def _named_in_context(self, tokens: list, t_idx: int) -> bool:
+        # "the Target store", "Target Corp", "Target's stores"; not "Target prices were cut", where any word is
+        # capitalised
+        if tokens[t_idx].group().endswith(_POSSESSIVE):
+            return True
+        if t_idx > 0 and not tokens[t_idx - 1].group().endswith(":"):
+            return True
+        return t_idx + 1 < len(tokens) and tokens[t_idx + 1].group().lower().rstrip(".") in _NAME_SUFFIXES
+
+    def _has_listing_context(self, sentence: str, tokens: list, t_idx: int) -> bool:
+        # "(NYSE: IT)", "Nasdaq:ON", "Gartner (IT)"
+        match = tokens[t_idx]
+        if t_idx > 0 and tokens[t_idx - 1].group() in EXCHANGES:
+            between = sentence[tokens[t_idx - 1].end():match.start()]
+            if between.strip() in (":", ""):
+                return True
+        before = sentence[:match.start()].rstrip()
+        after = sentence[match.end():].lstrip()
+        return before.endswith("(") and after.startswith(")")
+
+    def ticker_sentences(self, text: str) -> Dict[str, List[str]]:
+        # ticker -> sentences mentioning it, in order of first mention
+        sentences = split_sentences(text)
+        by_ticker: Dict[str, List[str]] = {}
+        for mention in self.extract(sentences):
+            picked = by_ticker.setdefault(mention.ticker, [])
+            sentence = sentences[mention.sentence]
+            if sentence not in picked:
+                picked.append(sentence)
+        return by_ticker
+
+
+def load_ticker_dictionary(path: str = TICKER_DICTIONARY) -> List[TickerEntry]:
+    # CSV (ticker,name,aliases with "|" separators) or SEC company_tickers.json
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows = data.values() if isinstance(data, dict) else data
+        return [TickerEntry(row["ticker"].upper(), row.get("title", ""), []) for row in rows]
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [
+            TickerEntry(row["ticker"].strip().upper(), row.get("name", "").strip(),
+                        [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()])
+            for row in csv.DictReader(f)
+        ]
+
+@st.cache_resource(show_spinner=False)
+def get_ticker_extractor(path: str = TICKER_DICTIONARY) -> TickerExtractor:
+    return TickerExtractor(load_ticker_dictionary(path))
+
+def tag_ticker_sentiment(texts: List[str], extractor: TickerExtractor = None) -> List[List[TickerSentimentDict]]:
+    # one FinBERT input per (text, ticker): the first few sentences mentioning it, classified in one batch
+    from src.sentiment import classify_sentiment_batch
+
+    extractor = extractor or get_ticker_extractor()
+    jobs = []
+    for i, text in enumerate(texts):
+        for ticker, sentences in extractor.ticker_sentences(text).items():
+            jobs.append((i, ticker, sentences[:MAX_SENTENCES_PER_TICKER]))
+
+    sentiments = classify_sentiment_batch([" ".join(sentences) for _, _, sentences in jobs])
+
+    results: List[List[TickerSentimentDict]] = [[] for _ in texts]
+    for (i, ticker, sentences), (label, score) in zip(jobs, sentiments):
+        results[i].append({"ticker": ticker, "label": label, "confidence": score, "sentence": sentences[0]})
+    return results
@@ -0,0 +1,312 @@
+import os
+import math
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.schemas import SummaryDict
+from src.store import ARTICLE_STORE, _epoch
+from src.utils.files import atomic_write, file_version
+
+TRENDS_FILE = os.getenv("TRENDS_FILE", "data/trends.npz")
+HOUR = 60 * 60
+HORIZON = 7 * 24  # hourly buckets kept per series
+WINDOWS = {"1h": 1, "1d": 24, "7d": 7 * 24}  # window -> hours; each also sets an EWMA half-life
+HALF_LIVES = [hours * HOUR for hours in WINDOWS.values()]
+DIMENSIONS = ("ticker", "source", "topic")
+LABELS = ("POSITIVE", "NEUTRAL", "NEGATIVE")
+SEEN_PRUNE = 1 << 16  # remembered urls before the ones past the horizon are first dropped
+
+
+class Window(NamedTuple):
+    names: List[str]
+    count: np.ndarray
+    mean: np.ndarray  # signed score: +confidence for positive, -confidence for negative, NaN without articles
+    ewma: np.ndarray  # exponentially weighted mean with the window's half-life, as of each series' latest article
+    mix: np.ndarray  # (series, LABELS) share of each label
+
+
+def trends_version(path: str = TRENDS_FILE) -> Optional[tuple]:
+    return file_version(path)
+
+def _timestamp(published_at: str) -> int:
+    # fromisoformat reads NewsAPI's and Alpha Vantage's formats directly; the store's parser covers the rest
+    try:
+        published = datetime.fromisoformat(published_at)
+    except ValueError:
+        return _epoch(published_at)
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return int(published.timestamp())
+
+def _url_key(url: str) -> Optional[int]:
+    # 64 bits of the url's digest: stable across processes, unlike hash(), and small enough to keep a week of
+    if not url:
+        return None
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "little")
+
+def _label(label: str) -> int:
+    label = (label or "").upper()
+    return {"POSITIVE": 0, "NEGATIVE": 2}.get(label, 1)
+
+def _signed(label: int, score) -> float:
+    return (1.0, 0.0, -1.0)[label] * float(score or 0.0)
+
+def observations(summary: SummaryDict) -> List[Tuple[str, str, float, int]]:
+    # (dimension, name, signed score, label) for every series the summary counts towards; tickers use their
+    # own sentiment when they have one (Alpha Vantage's, or the local tagger's), topics the article's
+    label = _label(summary.get("sentiment", ""))
+    value = _signed(label, summary.get("sentiment_score"))
+    found = []
+    if summary.get("source"):
+        found.append(("source", summary["source"], value, label))
+    for entry in summary.get("ticker_sentiment") or []:
+        if not entry.get("ticker"):
+            continue
+        if entry.get("label"):
+            ticker_label = _label(entry["label"])
+            found.append(("ticker", entry["ticker"], _signed(ticker_label, entry.get("confidence")), ticker_label))
+        else:
+            found.append(("ticker", entry["ticker"], value, label))
+    for topic in summary.get("topics") or []:
+        if topic.get("label"):
+            found.append(("topic", topic["label"], value, label))
+    return found
+
+
+class TrendStore:
+    # rolling sentiment per ticker, source and topic. Every series has a ring of HORIZON hourly buckets (label
+    # counts and score sums; a bucket is cleared when its slot comes round again) and a time-decayed EWMA per
+    # window, so adding an article touches a fixed number of cells and a window query sums at most HORIZON
+    # buckets per series. Rows are NumPy arrays that double when full; the file is those arrays, compressed.
+    # Each url counts once, so a changed article that is summarised again isn't counted twice; the urls are
+    # remembered for HORIZON hours past the newest one.
+    def __init__(self, path: str = TRENDS_FILE, merge_on_save: bool = True):
+        self.path = path
+        self.merge_on_save = merge_on_save  # off for bulk loads, which would otherwise log every observation
+        self.rows: Dict[str, Dict[str, int]] = {dimension: {} for dimension in DIMENSIONS}
+        self.keys: List[Tuple[str, str]] = []
+        self._allocate(64)
+        self.seen: Dict[int, int] = {}  # url key -> hour it was counted at
+        self._prune_at = SEEN_PRUNE
+        self._pending = []  # observations added since the last load/save, replayed if another process saved
+        self._lock = threading.Lock()
+        self._version = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _allocate(self, capacity: int):
+        self.hours = np.zeros((capacity, HORIZON), np.int32)  # hour (since the epoch) each slot holds
+        self.counts = np.zeros((capacity, HORIZON, len(LABELS)), np.uint32)
+        self.sums = np.zeros((capacity, HORIZON), np.float32)
+        self.ewma_sums = np.zeros((capacity, len(HALF_LIVES)), np.float64)
+        self.ewma_weights = np.zeros((capacity, len(HALF_LIVES)), np.float64)
+        self.ewma_times = np.zeros(capacity, np.float64)  # the EWMA columns are decayed to this time
+
+    def _grow(self):
+        n = len(self.hours)
+        old = (self.hours, self.counts, self.sums, self.ewma_sums, self.ewma_weights, self.ewma_times)
+        self._allocate(2 * n)
+        for new, array in zip((self.hours, self.counts, self.sums, self.ewma_sums, self.ewma_weights,
+                               self.ewma_times), old):
+            new[:n] = array
+
+    def _row(self, dimension: str, name: str) -> int:
+        row = self.rows[dimension].get(name)
+        if row is None:
+            row = len(self.keys)
+            if row == len(self.hours):
+                self._grow()
+            self.rows[dimension][name] = row
+            self.keys.append((dimension, name))
+        return row
+
+    def add(self, summary: SummaryDict) -> int:
+        # O(1) in the number of articles already held; returns the number of series updated. Articles their
+        # source left undated (CNN) count at the time the pipeline summarised them, like the store dates them
+        published = (_timestamp(summary.get("published_at") or "") or _timestamp(summary.get("fetched_at") or "")
+                     or int(time.time()))
+        key = _url_key(summary.get("url") or "")
+        found = observations(summary)
+        with self._lock:
+            if not self._first(key, published):
+                return 0
+            for dimension, name, value, label in found:
+                self._observe(self._row(dimension, name), published, value, label)
+            if self.merge_on_save:
+                self._pending.append((key, published, found))
+        return len(found)
+
+    def add_many(self, summaries: Iterable[SummaryDict]) -> int:
+        return sum(self.add(summary) for summary in summaries)
+
+    def _first(self, key: Optional[int], published: int) -> bool:
+        if key is None:
+            return True
+        if key in self.seen:
+            return False
+        self.seen[key] = published // HOUR
+        if len(self.seen) > self._prune_at:
+            self._prune()
+        return True
+
+    def _prune(self):
+        # amortised: the dict is walked again only once it has doubled
+        oldest = max(self.seen.values()) - HORIZON
+        self.seen = {key: hour for key, hour in self.seen.items() if hour > oldest}
+        self._prune_at = max(2 * len(self.seen), SEEN_PRUNE)
+
+    def _observe(self, row: int, published: int, value: float, label: int):
+        # scalar reads go through item() and rows are written whole: NumPy's per-element indexing is the cost here
+        hour = published // HOUR
+        slot = hour % HORIZON
+        held = self.hours.item(row, slot)
+        if held != hour and held < hour:
+            self.hours[row, slot] = hour
+            self.counts[row, slot] = 0
+            self.sums[row, slot] = 0.0
+            held = hour
+        if held == hour:  # otherwise a newer hour has the slot and the article is older than the ring
+            self.counts[row, slot, label] = self.counts.item(row, slot, label) + 1
+            self.sums[row, slot] = self.sums.item(row, slot) + value
+
+        # the EWMA is kept as decayed sums relative to the latest article's time; older articles enter decayed
+        age = published - self.ewma_times.item(row)
+        if age >= 0:
+            scale, weight = [math.exp2(-age / half_life) for half_life in HALF_LIVES], [1.0] * len(HALF_LIVES)
+            self.ewma_times[row] = published
+        else:
+            scale, weight = [1.0] * len(HALF_LIVES), [math.exp2(age / half_life) for half_life in HALF_LIVES]
+        self.ewma_sums[row] = [s * d + value * w for s, d, w in zip(self.ewma_sums[row].tolist(), scale, weight)]
+        self.ewma_weights[row] = [s * d + w for s, d, w in zip(self.ewma_weights[row].tolist(), scale, weight)]
+
+    def names(self, dimension: str) -> List[str]:
+        return list(self.rows[dimension])
+
+    def window(self, dimension: str, window: str = "1d", now: float = None) -> Window:
+        # every series of a dimension over the hours ending at `now` (default: the current hour)
+        names = self.names(dimension)
+        rows = np.fromiter(self.rows[dimension].values(), np.int64, len(names))
+        current = int((time.time() if now is None else now) // HOUR)
+        timeline = np.arange(current - WINDOWS[window] + 1, current + 1)
+        cells = rows[:, None], timeline % HORIZON  # only the window's slots are read
+        inside = self.hours[cells] == timeline
+        labels = (self.counts[cells] * inside[..., None]).sum(axis=1)
+        count = labels.sum(axis=1)
+        total = (self.sums[cells] * inside).sum(axis=1, dtype=np.float64)
+        column = list(WINDOWS).index(window)
+        weights = self.ewma_weights[rows, column]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / count, np.nan)
+            ewma = np.where(weights > 0, self.ewma_sums[rows, column] / weights, np.nan)
+            mix = labels / np.maximum(count, 1)[:, None]
+        return Window(names, count, mean, ewma, mix)
+
+    def hourly(self, dimension: str, names: List[str], hours: int = HORIZON,
+               now: float = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # -> (hour start epochs, counts, mean signed scores) for the last `hours` hours, oldest first; the
+        # mean is NaN for hours without articles, and unknown names come back empty
+        current = int((time.time() if now is None else now) // HOUR)
+        timeline = np.arange(current - min(hours, HORIZON) + 1, current + 1)
+        counts = np.zeros((len(names), len(timeline)), np.int64)
+        sums = np.zeros((len(names), len(timeline)), np.float64)
+        slots = timeline % HORIZON
+        for i, name in enumerate(names):
+            row = self.rows[dimension].get(name)
+            if row is None:
+                continue
+            held = self.hours[row, slots] == timeline
+            counts[i] = np.where(held, self.counts[row, slots].sum(axis=1), 0)
+            sums[i] = np.where(held, self.sums[row, slots], 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(counts > 0, sums / counts, np.nan)
+        return timeline * HOUR, counts, mean
+
+    def _load(self):
+        version = trends_version(self.path)
+        if version is None:
+            return
+        with np.load(self.path) as data:
+            keys = data["keys"]
+            self.rows = {dimension: {} for dimension in DIMENSIONS}
+            self.keys = []
+            for key in keys.tolist():
+                dimension, name = key.split("\t", 1)
+                self.rows[dimension][name] = len(self.keys)
+                self.keys.append((dimension, name))
+            self._allocate(max(64, len(keys)))
+            n = len(keys)
+            self.hours[:n], self.counts[:n], self.sums[:n] = data["hours"], data["counts"], data["sums"]
+            self.ewma_sums[:n], self.ewma_weights[:n] = data["ewma_sums"], data["ewma_weights"]
+            self.ewma_times[:n] = data["ewma_times"]
+            self.seen = {}
+            if "seen_urls" in data.files:  # files saved before urls were remembered have none
+                self.seen = dict(zip(data["seen_urls"].tolist(), data["seen_hours"].tolist()))
+            self._prune_at = max(2 * len(self.seen), SEEN_PRUNE)
+        self._version = version
+
+    def save(self):
+        # replaces the file atomically; when another process saved since this one loaded, its file is read
+        # back and this process's new observations are applied on top, so neither loses articles.
+        # Callers serialise saves with the refresh lock.
+        with self._lock:
+            if trends_version(self.path) != self._version:
+                pending, self._pending = self._pending, []
+                self._load()
+                for key, published, found in pending:
+                    if self._first(key, published):
+                        for dimension, name, value, label in found:
+                            self._observe(self._row(dimension, name), published, value, label)
+            if self.seen:
+                self._prune()
+            n = len(self.keys)
+
+            def write(f):
+                np.savez_compressed(f, keys=np.array([f"{d}\t{name}" for d, name in self.keys], dtype=str),
+                                    hours=self.hours[:n], counts=self.counts[:n], sums=self.sums[:n],
+                                    ewma_sums=self.ewma_sums[:n], ewma_weights=self.ewma_weights[:n],
+                                    ewma_times=self.ewma_times[:n],
+                                    seen_urls=np.fromiter(self.seen.keys(), np.uint64, len(self.seen)),
+                                    seen_hours=np.fromiter(self.seen.values(), np.int32, len(self.seen)))
+
+            atomic_write(self.path, write)
+            self._pending = []
+            self._version = trends_version(self.path)
+
+
+def rebuild(article_store: str = ARTICLE_STORE, path: str = TRENDS_FILE) -> TrendStore:
+    # recomputes the aggregates from the whole article history, oldest first
+    from src.records import Summary, unpack_records
+    from src.store import ArticleStore
+
+    if os.path.exists(path):
+        os.remove(path)
+    trends = TrendStore(path, merge_on_save=False)
+    records = ArticleStore(article_store).table.column("record")
+    for chunk in reversed(records.chunks):
+        for payload in reversed(chunk.to_pylist()):
+            trends.add(unpack_records(payload, Summary)[0].to_dict())
+    trends.save()
+    return trends
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the sentiment trends from the article history")
+    parser.add_argument("--store", default=ARTICLE_STORE)
+    parser.add_argument("--trends", default=TRENDS_FILE)
+    args = parser.parse_args()
+
+    trends = rebuild(args.store, args.trends)
+    print(f"[INFO] Stored {len(trends)} sentiment series in {args.trends}")
+
+
+if __name__ == "__main__":
+    # python -m src.trends [--store data/articles.arrow] [--trends data/trends.npz]
+    main()
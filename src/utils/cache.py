@@ -1,12 +1,29 @@
 import os
+import sys
 import json
+import glob
 import hashlib
+import sqlite3
+import itertools
+import threading
 import time
-from typing import Any
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from src import records
+from src.utils import metrics
+from src.utils.files import atomic_write
 
 CACHE_DIR = "data/cache"
 CACHE_EXPIRATION_SECONDS = 24 * 60 * 60  # 24 hours
 
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")  # "sqlite" or "file"
+CACHE_DB_NAME = "cache.sqlite3"
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # per cache_dir, least recently used entries go first
+MEMORY_TIER_BYTES = 64 * 1024 * 1024
+MEMORY_TIER_TTL = 60  # seconds; bounds staleness against writes from other processes
+
 os.makedirs(CACHE_DIR, exist_ok=True)
 
 def _hash_key(key: str) -> str:
@@ -15,32 +32,268 @@ def _hash_key(key: str) -> str:
 def _get_cache_file_path(key: str, cache_dir=CACHE_DIR) -> str:
     return os.path.join(cache_dir, _hash_key(key) + ".json")
 
-def save_to_cache(key: str, data: Any, cache_dir=CACHE_DIR):
-    filepath = _get_cache_file_path(key=key, cache_dir=cache_dir)
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def _encode(data: Any) -> bytes:
+    return records.dumps(data)
 
-def load_from_cache(key: str, cache_dir=CACHE_DIR):
-    filepath = _get_cache_file_path(key, cache_dir)
-    if not os.path.exists(filepath):
-        return None
+def _decode(payload: bytes) -> Any:
+    return records.loads(payload)
 
-    modified_time = os.path.getmtime(filepath)
-    current_time = time.time()
-    age = current_time - modified_time
 
-    if age > CACHE_EXPIRATION_SECONDS:
-        print(f"[CACHE] Cache expired for key: {key}")
+class MemoryTier:
+    # bounded LRU of encoded payloads, so callers never share mutable objects
+    def __init__(self, max_bytes: int = MEMORY_TIER_BYTES, ttl: float = MEMORY_TIER_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            loaded_at, created_at, expires_at, payload = entry
+            now = time.time()
+            if now - loaded_at > self.ttl or (expires_at is not None and expires_at <= now):
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return created_at, expires_at, payload
+
+    def put(self, key, created_at: float, expires_at: Optional[float], payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.time(), created_at, expires_at, payload)
+            self._size += len(payload)
+            while self._size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def discard(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[3])
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, hashed_key: str) -> Optional[tuple]:
+        # -> (created_at, expires_at, payload) or None
+        pass
+
+    @abstractmethod
+    def set(self, hashed_key: str, payload: bytes, created_at: float, expires_at: Optional[float]):
+        pass
+
+    @abstractmethod
+    def delete(self, hashed_key: str):
+        pass
+
+    def purge_expired(self) -> int:
+        return 0
+
+
+class FileBackend(CacheBackend):
+    # legacy layout: one JSON file per key, age taken from the file's mtime
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def _path(self, hashed_key: str) -> str:
+        return os.path.join(self.cache_dir, hashed_key + ".json")
+
+    def get(self, hashed_key):
+        path = self._path(hashed_key)
         try:
-            os.remove(filepath)
+            created_at = os.path.getmtime(path)
+            with open(path, "rb") as f:
+                return created_at, None, f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, hashed_key, payload, created_at, expires_at):
+        atomic_write(self._path(hashed_key), lambda f: f.write(payload), durable=False)
+
+    def delete(self, hashed_key):
+        try:
+            os.remove(self._path(hashed_key))
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteBackend(CacheBackend):
+    EVICT_EVERY = 64  # writes between expiry purges and size-cap checks
+
+    def __init__(self, cache_dir: str, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = os.path.join(cache_dir, CACHE_DB_NAME)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = itertools.count(1)  # next() is atomic, so worker threads writing at once don't lose counts
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS cache_expires_at ON cache(expires_at) WHERE expires_at IS NOT NULL;
+                CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache(accessed_at);
+            """)
+        self.purge_expired()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, hashed_key):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT created_at, expires_at, value, accessed_at FROM cache WHERE key = ?", (hashed_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[3] > 60:  # coarse LRU clock, avoids a write on every read
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, hashed_key))
+        return row[0], row[1], row[2]
+
+    def set(self, hashed_key, payload, created_at, expires_at):
+        conn = self._connect()
+        conn.execute(
+            """INSERT INTO cache (key, value, size, created_at, expires_at, accessed_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(key) DO UPDATE SET
+                   value = excluded.value, size = excluded.size, created_at = excluded.created_at,
+                   expires_at = excluded.expires_at, accessed_at = excluded.accessed_at""",
+            (hashed_key, payload, len(payload), created_at, expires_at, created_at),
+        )
+        if next(self._writes) % self.EVICT_EVERY == 1:
+            self.purge_expired()
+            self.evict()
+
+    def delete(self, hashed_key):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (hashed_key,))
+
+    def purge_expired(self) -> int:
+        cursor = self._connect().execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def evict(self) -> int:
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        metrics.inc("cache_evictions_total", evicted, cache=os.path.basename(os.path.dirname(self.path)))
+        print(f"[CACHE] Evicted {evicted} least recently used entries from {self.path}")
+        return evicted
+
+    def import_entry(self, hashed_key, payload, created_at):
+        # keeps the original write time so migrated entries age exactly as before
+        self._connect().execute(
+            "INSERT OR IGNORE INTO cache (key, value, size, created_at, expires_at, accessed_at) VALUES (?, ?, ?, ?, NULL, ?)",
+            (hashed_key, payload, len(payload), created_at, created_at),
+        )
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+_memory = MemoryTier()
+
+def get_backend(cache_dir=CACHE_DIR) -> CacheBackend:
+    with _backends_lock:
+        backend = _backends.get(cache_dir)
+        if backend is None:
+            os.makedirs(cache_dir, exist_ok=True)
+            backend = SQLiteBackend(cache_dir) if CACHE_BACKEND == "sqlite" else FileBackend(cache_dir)
+            _backends[cache_dir] = backend
+        return backend
+
+def save_to_cache(key: str, data: Any, cache_dir=CACHE_DIR, ttl=CACHE_EXPIRATION_SECONDS):
+    # ttl=None stores the entry without an expiry; it can still be evicted by the size cap
+    hashed_key = _hash_key(key)
+    payload = _encode(data)
+    created_at = time.time()
+    expires_at = created_at + ttl if ttl is not None else None
+    get_backend(cache_dir).set(hashed_key, payload, created_at, expires_at)
+    _memory.put((cache_dir, hashed_key), created_at, expires_at, payload)
+    metrics.inc("cache_writes_total", cache=os.path.basename(cache_dir))
+
+def load_from_cache(key: str, cache_dir=CACHE_DIR, ttl=CACHE_EXPIRATION_SECONDS):
+    # ttl=None keeps entries until they are overwritten
+    hashed_key = _hash_key(key)
+    cache, tier = os.path.basename(cache_dir), "memory"
+    entry = _memory.get((cache_dir, hashed_key))
+    if entry is None:
+        tier = "disk"
+        entry = get_backend(cache_dir).get(hashed_key)
+        if entry is None:
+            metrics.inc("cache_requests_total", cache=cache, result="miss", tier=tier)
+            return None
+        _memory.put((cache_dir, hashed_key), *entry)
+
+    created_at, expires_at, payload = entry
+    now = time.time()
+    if (ttl is not None and now - created_at > ttl) or (expires_at is not None and expires_at <= now):
+        metrics.inc("cache_requests_total", cache=cache, result="expired", tier=tier)
+        _memory.discard((cache_dir, hashed_key))
+        try:
+            get_backend(cache_dir).delete(hashed_key)
         except Exception as e:
-            print(f"[CACHE] Failed to remove expired cache file: {e}")
+            print(f"[CACHE] Failed to remove expired cache entry: {e}")
         return None
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        print("[CACHE] Using valid cache")
-        return json.load(f)
-    
+    metrics.inc("cache_requests_total", cache=cache, result="hit", tier=tier)
+    return _decode(payload)
+
+def migrate_json_dir(cache_dir: str, remove: bool = False) -> int:
+    # imports legacy {sha256(key)}.json files into the SQLite store of the same directory
+    backend = SQLiteBackend(cache_dir)
+    migrated = 0
+    for filepath in glob.glob(os.path.join(cache_dir, "*.json")):
+        hashed_key = os.path.splitext(os.path.basename(filepath))[0]
+        try:
+            with open(filepath, "rb") as f:
+                payload = _encode(_decode(f.read()))
+            backend.import_entry(hashed_key, payload, os.path.getmtime(filepath))
+        except Exception as e:
+            print(f"[CACHE] Skipping {filepath}: {e}")
+            continue
+        migrated += 1
+        if remove:
+            os.remove(filepath)
+    print(f"[CACHE] Migrated {migrated} files from {cache_dir}")
+    return migrated
+
 def read_cache_file(filepath):
     if not os.path.exists(filepath):
         return None
@@ -55,3 +308,10 @@ def read_cache_file(filepath):
     with open(filepath, "r", encoding="utf-8") as f:
         print("[CACHE] Using valid cache")
         return json.load(f)
+
+
+if __name__ == "__main__":
+    # python -m src.utils.cache data/cache data/summaries [--remove]
+    remove = "--remove" in sys.argv
+    for directory in [arg for arg in sys.argv[1:] if arg != "--remove"]:
+        migrate_json_dir(directory, remove=remove)
@@ -0,0 +1,182 @@
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+PARSE_PROCESSES = int(os.getenv("PARSE_PROCESSES", "0"))  # 0 parses in the calling thread
+BULK_CHUNKSIZE = 8
+
+LEAD_CONTAINER = "container_lead-plus-headlines-with-images"
+STRIP_CONTAINER = "container_vertical-strip"
+STRIP_CARDS = "container_vertical-strip__cards-wrapper"
+ARTICLE_CONTAINER = "article__content"
+
+# tags whose subtree is dropped from article text (the tail text after them is kept)
+DROPPED_TAGS = {"script", "style", "img", "figure", "table", "ul", "ol"}
+# BeautifulSoup's get_text never returns text from these, nor comments
+HIDDEN_TAGS = {"script", "style", "template", "rt", "rp"}
+
+# every tag, with quoted attribute values skipped whole, so a "</div>" inside one isn't taken for a tag
+_TAG = re.compile(r"""<!--.*?-->|<script\b.*?</script\s*>|<style\b.*?</style\s*>|"""
+                  r"""<(/?)([a-z][^\s/>]*)(?:[^>"']|"[^"]*"|'[^']*')*>""", re.IGNORECASE | re.DOTALL)
+_CLASS_ATTR = re.compile(r"""(?<![\w-])class\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""", re.IGNORECASE)
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_LEAD_XPATH = etree.XPath(f"//div[{_has_class('container')} and {_has_class(LEAD_CONTAINER)}]")
+_STRIP_XPATH = etree.XPath(f"//div[{_has_class('container')} and {_has_class(STRIP_CONTAINER)}]")
+_CARDS_WRAPPER_XPATH = etree.XPath(f".//div[{_has_class(STRIP_CARDS)}]")
+_CARDS_XPATH = etree.XPath(f".//div[{_has_class('card')} and {_has_class('container__item')}]")
+_HEADLINE_XPATH = etree.XPath(f".//span[{_has_class('container__headline-text')}]")
+_ARTICLE_XPATH = etree.XPath(f"//div[{_has_class(ARTICLE_CONTAINER)}]")
+
+
+def _parse(html: str) -> Optional[etree._Element]:
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+def _strings(element, skipped=HIDDEN_TAGS) -> Iterable[str]:
+    # text nodes in document order, as BeautifulSoup's get_text sees them; skipped subtrees keep their tail
+    if element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in skipped:
+            yield from _strings(child, skipped)
+        if child.tail:
+            yield child.tail
+
+def _text(element) -> str:
+    return "".join(_strings(element))
+
+def _rfind(html: str, needle: str, pos: int) -> int:
+    return max(html.rfind(needle, 0, pos), html.rfind(needle.upper(), 0, pos))
+
+def _find(html: str, needle: str, pos: int) -> int:
+    found = [i for i in (html.find(needle, pos), html.find(needle.upper(), pos)) if i != -1]
+    return min(found) if found else -1
+
+def _raw_text_end(html: str, pos: int) -> int:
+    # end of the comment, <script> or <style> that pos falls in; -1 when pos is in markup
+    for opener, closer in (("<!--", "-->"), ("<script", "</script"), ("<style", "</style")):
+        start = _rfind(html, opener, pos)
+        if start != -1 and _rfind(html, closer, pos) < start:
+            end = _find(html, closer, pos)
+            return end if end != -1 else len(html)
+    return -1
+
+def _container_slice(html: str, class_name: str) -> Optional[str]:
+    # the first <div class="... class_name ..."> element as a standalone snippet, found without parsing the page;
+    # None when it can't be isolated reliably and the caller should parse the whole page
+    pos = html.find(class_name)
+    while pos != -1:
+        start = html.rfind("<", 0, pos)
+        raw_end = _raw_text_end(html, start) if start != -1 else -1
+        if raw_end != -1:
+            pos = html.find(class_name, raw_end)
+            continue
+        tag_end = html.find(">", pos)
+        if start != -1 and tag_end != -1 and html[start:start + 4].lower() == "<div" \
+                and html.find("<", start + 1, pos) == -1 and html.find(">", start, pos) == -1:
+            match = _CLASS_ATTR.search(html, start, tag_end + 1)
+            if match and class_name in next(g for g in match.groups() if g is not None).split():
+                return _balanced_div(html, start)
+        pos = html.find(class_name, pos + len(class_name))
+    return None
+
+def _balanced_div(html: str, start: int) -> Optional[str]:
+    depth = 0
+    for match in _TAG.finditer(html, start):
+        name = match.group(2)
+        if name is None or name.lower() != "div":
+            continue
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return html[start:match.end()]
+    return None
+
+def _fragment(snippet: str, class_name: str) -> Optional[etree._Element]:
+    try:
+        element = lxml.html.fragment_fromstring(snippet)
+    except (etree.ParserError, ValueError):
+        return None
+    if element.tag != "div" or class_name not in (element.get("class") or "").split():
+        return None
+    return element
+
+
+def extract_content(html: str) -> str:
+    # article body text: same output as the BeautifulSoup html.parser extraction it replaces
+    snippet = _container_slice(html, ARTICLE_CONTAINER) if html else None
+    content_div = _fragment(snippet, ARTICLE_CONTAINER) if snippet else None
+    if content_div is None:
+        root = _parse(html)
+        if root is None:
+            return ""
+        found = _ARTICLE_XPATH(root)
+        content_div = found[0] if found else None
+        if content_div is None:
+            text_parts = ["".join(s.strip() for s in _strings(p)) for p in root.iter("p")]
+            return "\n\n".join([line for line in text_parts if line])
+
+    lines = []
+    for string in _strings(content_div, skipped=HIDDEN_TAGS | DROPPED_TAGS):
+        lines.extend(line.strip() for line in string.splitlines())
+    return "\n\n".join([line for line in lines if line])
+
+def extract_headlines(html: str, base_url: str) -> List[dict]:
+    # lead-plus cards first, then every vertical strip, in page order
+    root = _parse(html)
+    if root is None:
+        return []
+    headlines = []
+    lead = _LEAD_XPATH(root)
+    if lead:
+        headlines.extend(_cards(lead[0], base_url))
+    else:
+        print("No main container found.")
+    for container in _STRIP_XPATH(root):
+        wrapper = _CARDS_WRAPPER_XPATH(container)
+        if wrapper:
+            headlines.extend(_cards(wrapper[0], base_url))
+    return headlines
+
+def _cards(container, base_url: str) -> List[dict]:
+    cards = []
+    for card in _CARDS_XPATH(container):
+        headline = _HEADLINE_XPATH(card)
+        link = next(card.iter("a"), None)
+        if not headline or link is None or link.get("href") is None:
+            continue
+        cards.append({"title": _text(headline[0]).strip(), "url": urljoin(base_url, link.get("href"))})
+    return cards
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+
+def get_parse_pool(processes: int) -> ProcessPoolExecutor:
+    # one long-lived pool per process; workers only import this module
+    global _pool, _pool_size
+    if _pool is None or _pool_size != processes:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+        _pool_size = processes
+    return _pool
+
+def extract_contents(htmls: List[str], processes: int = PARSE_PROCESSES) -> List[str]:
+    # bulk extraction, in input order; spreads pages over worker processes when processes > 0
+    if processes <= 0 or len(htmls) < 2:
+        return [extract_content(html) for html in htmls]
+    return list(get_parse_pool(processes).map(extract_content, htmls, chunksize=BULK_CHUNKSIZE))
@@ -0,0 +1,32 @@
+import os
+import threading
+from typing import BinaryIO, Callable, Optional
+
+
+def file_version(path: str) -> Optional[tuple]:
+    # changes whenever the file is replaced; cheap enough to check on every page run. None when it doesn't exist
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+def atomic_write(path: str, writer: Callable[[BinaryIO], None], durable: bool = True):
+    # writer(f) fills a temporary file next to path, which then replaces it in one step, so readers see either
+    # the old file or the new one in full. durable fsyncs it first, so a crash can't leave a replaced but empty
+    # file; caches and metrics that are rewritten all the time skip it
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            writer(f)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)  # atomic on POSIX and Windows
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
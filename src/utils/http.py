@@ -0,0 +1,112 @@
+import time
+import random
+import threading
+import requests
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+from src.utils import metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_TIMEOUT = 30
+
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    # one keep-alive pool per session, sized to the number of workers using it
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    # exponential backoff with full jitter
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# caps in-flight requests and request rate per host
+class HostLimiter:
+    def __init__(self, max_concurrency: int = 4, min_interval: float = 0.0):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self._semaphores = defaultdict(lambda: threading.BoundedSemaphore(self.max_concurrency))
+        self._next_slot = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores[host]
+        with semaphore:
+            if self.min_interval:
+                with self._lock:
+                    now = time.monotonic()
+                    start = max(now, self._next_slot[host])
+                    self._next_slot[host] = start + self.min_interval
+                if start > now:
+                    time.sleep(start - now)
+            yield
+
+
+def request_with_retry(session: requests.Session, method: str, url: str, retries: int = 3,
+                       backoff: float = 0.5, limiter: HostLimiter = None, limit_key: str = None,
+                       **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    host = urlparse(url).netloc
+    for attempt in range(retries + 1):
+        try:
+            if limiter:
+                with limiter.slot(limit_key or url):
+                    response = _timed_request(session, method, url, host, **kwargs)
+            else:
+                response = _timed_request(session, method, url, host, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                return response
+            metrics.inc("http_retries_total", host=host, reason=str(response.status_code))
+            print(f"[WARN] {response.status_code} from {host}, retrying ({attempt + 1}/{retries})")
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                time.sleep(min(float(retry_after), 60.0))
+                continue
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            metrics.inc("http_retries_total", host=host, reason=type(e).__name__)
+            print(f"[WARN] {type(e).__name__} for {host}, retrying ({attempt + 1}/{retries})")
+        time.sleep(backoff_delay(attempt, base=backoff))
+
+
+def _timed_request(session: requests.Session, method: str, url: str, host: str, **kwargs) -> requests.Response:
+    # latency of the request itself, without time spent waiting for a limiter slot
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = session.request(method, url, **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        metrics.observe("http_request_seconds", time.perf_counter() - start, host=host, method=method, status=status)
+
+
+def conditional_headers(validators: dict) -> dict:
+    # If-None-Match / If-Modified-Since from the validators of an earlier response
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def update_validators(validators: dict, response: requests.Response):
+    # a 304 may leave the validators out, in which case the stored ones still apply
+    for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+        if response.headers.get(header):
+            validators[key] = response.headers[header]
+        elif response.status_code != 304:
+            validators.pop(key, None)
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import bisect
+import itertools
+import threading
+import contextvars
+from collections import deque
+from typing import Dict, List, Optional
+
+from src.utils.files import atomic_write
+
+METRICS_BACKEND = os.getenv("METRICS_BACKEND", "memory")  # "memory", or "null" to switch instrumentation off
+METRICS_DIR = os.getenv("METRICS_DIR", "data/metrics")
+TRACE_BUFFER = 10_000  # finished spans kept for export; the oldest are dropped first
+TRACE_FILE_MAX_BYTES = 64 * 1024 * 1024  # trace.jsonl is rotated to trace.jsonl.1 past this size
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+def _series(labels: dict) -> tuple:
+    return tuple(sorted(labels.items())) if labels else ()
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(series: tuple, le: str = None) -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in series]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsBackend:
+    # the null backend: every call is a no-op, so instrumented code pays only for the call itself
+    enabled = False
+
+    def inc(self, name: str, value: float, labels: dict):
+        pass
+
+    def observe(self, name: str, value: float, buckets: tuple, labels: dict):
+        pass
+
+    def record_span(self, record: dict):
+        pass
+
+    def prometheus_text(self) -> str:
+        return ""
+
+    def drain_spans(self) -> List[dict]:
+        return []
+
+    def reset(self):
+        pass
+
+
+class MemoryBackend(MetricsBackend):
+    enabled = True
+
+    def __init__(self, trace_buffer: int = TRACE_BUFFER):
+        self._counters: Dict[tuple, float] = {}
+        self._histograms: Dict[tuple, list] = {}  # (name, series) -> [buckets, counts, sum, count]
+        self._spans = deque(maxlen=trace_buffer)
+        self._lock = threading.Lock()
+
+    def inc(self, name, value, labels):
+        key = (name, _series(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets, labels):
+        key = (name, _series(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [buckets, [0] * (len(buckets) + 1), 0.0, 0]
+            histogram[1][bisect.bisect_left(histogram[0], value)] += 1
+            histogram[2] += value
+            histogram[3] += 1
+
+    def record_span(self, record):
+        self._spans.append(record)  # deque appends are thread-safe
+
+    def counter(self, name: str, **labels) -> float:
+        return self._counters.get((name, _series(labels)), 0)
+
+    def histogram(self, name: str, **labels) -> Optional[dict]:
+        histogram = self._histograms.get((name, _series(labels)))
+        if histogram is None:
+            return None
+        buckets, counts, total, count = histogram
+        return {"buckets": dict(zip(buckets, itertools.accumulate(counts))), "sum": total, "count": count}
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, [h[0], list(h[1]), h[2], h[3]]) for key, h in self._histograms.items())
+
+        lines, typed = [], set()
+        for (name, series), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(series)} {_format_value(value)}")
+        for (name, series), (buckets, counts, total, count) in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, cumulative in zip(buckets, itertools.accumulate(counts)):
+                lines.append(f"{name}_bucket{_format_labels(series, le=str(bound))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(series, le='+Inf')} {count}")
+            lines.append(f"{name}_sum{_format_labels(series)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(series)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def drain_spans(self):
+        spans = []
+        while True:
+            try:
+                spans.append(self._spans.popleft())
+            except IndexError:
+                return spans
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._spans.clear()
+
+
+class Span:
+    # times a stage into the stage_seconds histogram and, on exit, adds a trace record;
+    # spans opened inside it (same thread or task) become its children
+    __slots__ = ("name", "attrs", "span_id", "parent_id", "trace_id", "start", "_started", "_token")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, key: str, value):
+        self.attrs[key] = value
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        backend = _backend
+        labels = {"stage": self.name}
+        backend.observe("stage_seconds", elapsed, LATENCY_BUCKETS, labels)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+            backend.inc("stage_errors_total", 1, labels)
+        backend.record_span({
+            "name": self.name, "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "start": self.start, "duration_ms": elapsed * 1000, "thread": threading.current_thread().name,
+            **self.attrs,
+        })
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, key: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_backend: MetricsBackend = MemoryBackend() if METRICS_BACKEND == "memory" else MetricsBackend()
+
+def get_backend() -> MetricsBackend:
+    return _backend
+
+def set_backend(backend: MetricsBackend) -> MetricsBackend:
+    # returns the previous backend so callers can put it back
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+def inc(name: str, value: float = 1, **labels):
+    _backend.inc(name, value, labels)
+
+def observe(name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels):
+    _backend.observe(name, value, buckets, labels)
+
+def span(name: str, **attrs):
+    # attrs go on the trace record only, never on metric labels, so urls are fine here
+    if not _backend.enabled:
+        return _NULL_SPAN
+    return Span(name, attrs)
+
+def prometheus_text() -> str:
+    return _backend.prometheus_text()
+
+def spans_jsonl() -> str:
+    # finished spans since the last call, one JSON object per line
+    spans = _backend.drain_spans()
+    return "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in spans)
+
+def flush(directory: str = METRICS_DIR):
+    # metrics.prom is rewritten with the running totals (node_exporter textfile layout),
+    # finished spans are appended to trace.jsonl
+    if not _backend.enabled:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+        text = prometheus_text().encode("utf-8")
+        atomic_write(os.path.join(directory, "metrics.prom"), lambda f: f.write(text), durable=False)
+
+        lines = spans_jsonl()
+        if lines:
+            trace_path = os.path.join(directory, "trace.jsonl")
+            if os.path.exists(trace_path) and os.path.getsize(trace_path) > TRACE_FILE_MAX_BYTES:
+                os.replace(trace_path, trace_path + ".1")
+            with open(trace_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+    except OSError as e:
+        print(f"[WARN] Could not write metrics to {directory}: {e}")
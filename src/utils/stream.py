@@ -0,0 +1,148 @@
+import queue
+import threading
+import contextvars
+import time
+from typing import Callable, Iterable, Iterator, List
+
+STREAM_BUFFER = 16  # max items waiting between two stages
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    # blocks while the queue is full (backpressure) unless the consumer went away
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+def _feed(source: Iterable, inbox: queue.Queue, stop: threading.Event, consumers: int):
+    try:
+        for item in source:
+            if not _put(inbox, item, stop):
+                return
+    except Exception as e:
+        _put(inbox, _Failure(e), stop)
+    for _ in range(consumers):
+        _put(inbox, _DONE, stop)
+
+def _start(target, *args, name: str):
+    # each thread runs in a copy of the caller's context, so tracing spans nest across stages
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(target, *args), name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def map_stage(source: Iterable, fn: Callable, workers: int = 1, maxsize: int = STREAM_BUFFER,
+              name: str = "stage") -> Iterator:
+    # applies fn on `workers` threads and yields results in completion order; None results are dropped
+    inbox, outbox = queue.Queue(maxsize), queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def work():
+        while True:
+            item = _get(inbox, stop)
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                _put(outbox, item, stop)
+                break
+            try:
+                result = fn(item)
+            except Exception as e:
+                result = _Failure(e)
+            if result is not None and not _put(outbox, result, stop):
+                return
+        _put(outbox, _DONE, stop)
+
+    _start(_feed, source, inbox, stop, workers, name=f"{name}-feed")
+    for i in range(workers):
+        _start(work, name=f"{name}-{i}")
+
+    try:
+        finished = 0
+        while finished < workers:
+            item = outbox.get()
+            if item is _DONE:
+                finished += 1
+            elif isinstance(item, _Failure):
+                raise item.error
+            else:
+                yield item
+    finally:
+        stop.set()
+
+
+def batch_stage(source: Iterable, fn: Callable[[List], Iterable], batch_size: int, max_wait: float = 0.05,
+                maxsize: int = STREAM_BUFFER, name: str = "batch") -> Iterator:
+    # groups whatever is ready (up to batch_size, waiting at most max_wait) and yields from fn(batch)
+    inbox = queue.Queue(maxsize)
+    stop = threading.Event()
+    _start(_feed, source, inbox, stop, 1, name=f"{name}-feed")
+
+    try:
+        done = False
+        while not done:
+            batch = []
+            item = inbox.get()
+            deadline = time.monotonic() + max_wait
+            while True:
+                if item is _DONE:
+                    done = True
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    break
+                try:
+                    item = inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                yield from fn(batch)
+    finally:
+        stop.set()
+
+
+def merge_stage(sources: List[Iterable], timeout: float = None, maxsize: int = STREAM_BUFFER,
+                name: str = "merge") -> Iterator:
+    # drains each source on its own thread and yields items as they arrive;
+    # after `timeout` seconds stragglers are abandoned and the stream ends
+    outbox = queue.Queue(maxsize)
+    stop = threading.Event()
+    for i, source in enumerate(sources):
+        _start(_feed, source, outbox, stop, 1, name=f"{name}-{i}")
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        finished = 0
+        while finished < len(sources):
+            try:
+                item = outbox.get(timeout=max(0.0, deadline - time.monotonic()) if deadline else None)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                finished += 1
+            elif isinstance(item, _Failure):
+                raise item.error
+            else:
+                yield item
+    finally:
+        stop.set()